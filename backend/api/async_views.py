@@ -0,0 +1,125 @@
+"""
+Leituras de ativos para o servidor ASGI (ex.: `uvicorn backend.asgi:application`).
+
+As views do DRF são síncronas: em ASGI cada requisição ocupa uma thread
+enquanto espera o banco. Estas versões são `async def` e usam o ORM
+assíncrono (`afirst`, `async for`) e a autenticação JWT assíncrona, então
+um único worker atende muitos clientes lentos ao mesmo tempo.
+
+Devolvem exatamente o mesmo JSON de /api/assets/ (mesmo serializer,
+filtros, paginação por cursor e ETag), em /api/async/assets/.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, ValidationError
+from rest_framework.request import Request
+
+from . import renderers
+from .authentication import ClaimsJWTAuthentication
+from .caching import aget_asset_watermark, compute_etag, is_not_modified, validator_headers
+from .models import Asset
+from .pagination import KeysetCursorPagination
+from .serializers import AssetSerializer
+from .views import AssetViewSet
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    # Mesmo renderer das views do DRF (api/renderers.py).
+    return HttpResponse(renderers.dumps(data), status=status_code, headers=headers,
+                        content_type='application/json')
+
+
+def async_api_view(view):
+    """
+    Faz o papel do APIView nas views assíncronas: exige um token JWT válido e
+    converte as exceções do DRF nas mesmas respostas de erro.
+    """
+    authenticator = ClaimsJWTAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'Método "{request.method}" não permitido.'},
+                                 status.HTTP_405_METHOD_NOT_ALLOWED)
+        try:
+            authenticated = await authenticator.aauthenticate(request)
+            if authenticated is None:
+                raise NotAuthenticated()
+            request.user = authenticated[0]
+            return await view(Request(request), *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            headers = None
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                headers = {'WWW-Authenticate': authenticator.authenticate_header(request)}
+            return json_response(data, exc.status_code, headers)
+
+    return wrapper
+
+
+def conditional(request, etag, last_modified):
+    if is_not_modified(request, etag, last_modified):
+        return HttpResponseNotModified(headers=validator_headers(etag, last_modified))
+    return None
+
+
+# GET /api/async/assets/ (aceita os mesmos filtros de /api/assets/, inclusive ?q=)
+@async_api_view
+async def asset_list(request):
+    category_id = request.query_params.get('category_id', '')
+    watermark, last_modified = await aget_asset_watermark(category_id if category_id.isdigit() else None)
+    etag = compute_etag([request.get_full_path(), watermark])
+    not_modified = conditional(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    options = AssetViewSet.read_options(request.query_params)
+    # Os filtros por campo personalizado consultam as FieldDefinitions (ORM síncrono).
+    queryset = await sync_to_async(AssetViewSet.apply_filters)(
+        AssetViewSet.for_reading(Asset.objects.visible(), options.get('fields'), options.get('field_defs')),
+        request.query_params,
+    )
+    paginator = KeysetCursorPagination()
+    page = await paginator.apaginate_queryset(queryset, request, AssetViewSet)
+    if options['layout'] == 'columnar':
+        results = AssetSerializer(context=options).to_columns(page)
+    else:
+        results = AssetSerializer(page, many=True, context=options).data
+    data = {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': results,
+    }
+    return json_response(data, headers=validator_headers(etag, last_modified))
+
+
+# GET /api/async/assets/search/?q=<texto>
+@async_api_view
+async def asset_search(request):
+    if not request.query_params.get('q', '').strip():
+        raise ValidationError({'q': 'Informe o texto da busca.'})
+    return await asset_list.__wrapped__(request)
+
+
+# GET /api/async/assets/<id>/
+@async_api_view
+async def asset_detail(request, pk):
+    updated_at = await Asset.objects.visible().filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        raise NotFound()
+    etag = compute_etag([request.get_full_path(), updated_at])
+    not_modified = conditional(request, etag, updated_at.timestamp())
+    if not_modified:
+        return not_modified
+
+    options = AssetViewSet.read_options(request.query_params)
+    asset = await AssetViewSet.for_reading(
+        Asset.objects.visible().filter(pk=pk), options.get('fields'), options.get('field_defs')
+    ).afirst()
+    if asset is None:
+        raise NotFound()
+    data = AssetSerializer(asset, context=options).data
+    return json_response(data, headers=validator_headers(etag, updated_at.timestamp()))
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Profile
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuário "leve" montado a partir das claims do token de acesso.
+    Traz `id`, `username` e `role` sem consultar User nem Profile.
+    """
+
+    @cached_property
+    def id(self):
+        # O SimpleJWT grava o id como texto; as views comparam com ids inteiros.
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Autenticação JWT sem consulta ao banco no caminho comum.
+
+    A única verificação extra é a versão do papel (`role_version`), lida do
+    cache: quando um administrador altera o papel de alguém (ou desativa a
+    conta), os tokens já emitidos para essa pessoa deixam de ser aceitos na
+    hora, em vez de continuarem válidos até expirar.
+    """
+
+    def get_user(self, validated_token):
+        user = self.user_from_token(validated_token)
+        self.check_role_version(validated_token, Profile.current_role_version(user.id))
+        return user
+
+    # --- Caminho assíncrono (views ASGI em async_views.py) ---
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        # A validação do token é só CPU; apenas a versão do papel é assíncrona.
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = self.user_from_token(validated_token)
+        self.check_role_version(validated_token, await Profile.acurrent_role_version(user.id))
+        return user
+
+    @staticmethod
+    def user_from_token(validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('O token não identifica nenhum usuário.')
+        return ClaimsUser(validated_token)
+
+    @staticmethod
+    def check_role_version(validated_token, current_version):
+        if current_version is None:
+            raise AuthenticationFailed('Usuário não encontrado.', code='user_not_found')
+        if validated_token.get('role_version', 0) != current_version:
+            raise AuthenticationFailed(
+                'O papel do usuário foi alterado. Faça login novamente.', code='role_changed'
+            )
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend que traz o Profile junto com o usuário: o login em
+    /api/token/ precisa do papel para montar o token, e assim tudo sai de
+    uma única consulta. A conferência da senha é a do Django, que regrava o
+    hash quando ele foi feito com um algoritmo (ou custo) diferente do atual
+    (ver PASSWORD_HASHER em settings.py).
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = (
+            UserModel._default_manager.select_related('profile')
+            .filter(**{UserModel.USERNAME_FIELD: username})
+            .first()
+        )
+        if user is None:
+            # Calcula um hash mesmo assim, para o tempo de resposta não revelar
+            # se o usuário existe (mesmo cuidado do ModelBackend).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,127 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import search
+from .models import Asset, AssetChange, AssetFieldValue, AssetStatusCount
+
+# Limite de ids por requisição (uma única transação e poucos parâmetros por consulta).
+BATCH_MAX_IDS = 1000
+
+SET_STATUS = 'set_status'
+MOVE = 'move'
+DELETE = 'delete'
+
+
+def raw_delete(model, column, ids):
+    # DELETE direto: pelo ORM o Django carregaria cada linha para enviar os
+    # signals de remoção (e reindexaria um ativo por valor de campo).
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+            f'WHERE {connection.ops.quote_name(column)} IN ({placeholders})',
+            ids,
+        )
+
+
+class AssetBatch:
+    """
+    Aplica uma mesma alteração a vários ativos com um UPDATE/DELETE por tabela.
+
+    As escritas em conjunto não disparam os signals de Asset, então os
+    contadores por status, o índice de busca, o feed de alterações e a marca
+    d'água das listagens são atualizados aqui, na mesma transação.
+
+    Mover de categoria apaga os valores de campo dos ativos: as
+    FieldDefinitions pertencem à categoria antiga.
+    """
+
+    def __init__(self, ids):
+        self.ids = list(dict.fromkeys(ids))
+        self.results = {}
+
+    def run(self, action, status=None, category=None):
+        with transaction.atomic():
+            current = {
+                asset_id: (category_id, asset_status)
+                for asset_id, category_id, asset_status in Asset.objects.visible().select_for_update().filter(
+                    id__in=self.ids
+                ).values_list('id', 'category_id', 'status')
+            }
+            if action == SET_STATUS:
+                self.set_status(current, status)
+            elif action == MOVE:
+                self.move(current, category.id)
+            else:
+                self.delete(current)
+        return [{'id': asset_id, 'result': self.results.get(asset_id, 'not_found')} for asset_id in self.ids]
+
+    def set_status(self, current, status):
+        changed = self.split_unchanged(current, lambda key: key[1] == status)
+        if not changed:
+            return
+        Asset.objects.filter(id__in=changed).update(status=status, updated_at=timezone.now())
+        for (category_id, old_status), total in Counter(current[asset_id] for asset_id in changed).items():
+            AssetStatusCount.bump(category_id, old_status, -total)
+            AssetStatusCount.bump(category_id, status, total)
+        self.log_upserts(current, changed)
+        self.mark(changed, 'updated')
+
+    def move(self, current, category_id):
+        changed = self.split_unchanged(current, lambda key: key[0] == category_id)
+        if not changed:
+            return
+        raw_delete(AssetFieldValue, 'asset_id', changed)
+        Asset.objects.filter(id__in=changed).update(
+            category_id=category_id, field_snapshot={}, updated_at=timezone.now()
+        )
+        for (old_category_id, status), total in Counter(current[asset_id] for asset_id in changed).items():
+            AssetStatusCount.bump(old_category_id, status, -total)
+            AssetStatusCount.bump(category_id, status, total)
+        self.log_deletes(current, changed)
+        AssetChange.record(AssetChange.UPSERT, category_id, changed)
+        search.reindex_assets(changed)
+        self.mark(changed, 'updated')
+
+    def delete(self, current):
+        deleted = list(current)
+        if not deleted:
+            return
+        raw_delete(AssetFieldValue, 'asset_id', deleted)
+        raw_delete(Asset, 'id', deleted)
+        for (category_id, status), total in Counter(current.values()).items():
+            AssetStatusCount.bump(category_id, status, -total)
+        self.log_deletes(current, deleted)
+        search.remove_assets(deleted)
+        self.mark(deleted, 'deleted')
+
+    # --- Auxiliares ---
+
+    def split_unchanged(self, current, unchanged):
+        changed = []
+        for asset_id, key in current.items():
+            if unchanged(key):
+                self.results[asset_id] = 'unchanged'
+            else:
+                changed.append(asset_id)
+        return changed
+
+    def group_by_category(self, current, asset_ids):
+        groups = {}
+        for asset_id in asset_ids:
+            groups.setdefault(current[asset_id][0], []).append(asset_id)
+        return groups
+
+    def log_upserts(self, current, asset_ids):
+        for category_id, group in self.group_by_category(current, asset_ids).items():
+            AssetChange.record(AssetChange.UPSERT, category_id, group)
+
+    def log_deletes(self, current, asset_ids):
+        for category_id, group in self.group_by_category(current, asset_ids).items():
+            AssetChange.record(AssetChange.DELETE, category_id, group)
+
+    def mark(self, asset_ids, result):
+        for asset_id in asset_ids:
+            self.results[asset_id] = result
@@ -0,0 +1,26 @@
+"""Estatísticas comuns aos comandos de benchmark (benchmark_api, benchmark_asgi)."""
+
+
+def summarize(latencies, elapsed=None, errors=0):
+    """Resume uma lista de latências (segundos) em milissegundos; com `elapsed`, inclui req/s."""
+    latencies = sorted(latencies)
+
+    def percentile(fraction):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 2)
+
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        'min_ms': percentile(0),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+    if elapsed is not None:
+        summary['seconds'] = round(elapsed, 3)
+        summary['requests_per_second'] = round(len(latencies) / elapsed, 1) if elapsed else None
+    return summary
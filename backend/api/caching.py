@@ -0,0 +1,181 @@
+"""
+Cache das respostas de leitura do "esquema" (categorias e definições de campo).
+
+As respostas serializadas ficam no cache do Django junto com um ETag. As
+chaves incluem uma geração que é incrementada pelos signals de Category e
+FieldDefinition (em models.py) sempre que algo é salvo ou apagado, então
+a invalidação é precisa: só as respostas daquela categoria (e a listagem
+geral) deixam de valer.
+
+Com `If-None-Match` igual ao ETag guardado, a view devolve 304 sem
+serializar nada.
+
+Os ativos não ficam em cache (mudam demais), mas as leituras de
+/api/assets/ também são condicionais: cada categoria tem uma "marca d'água"
+derivada do feed de alterações (AssetChange) que forma o ETag e o
+Last-Modified da listagem, sem precisar montar a resposta.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+GENERATION_KEY = 'api:schema:gen:{}'
+RESPONSE_KEY = 'api:schema:{}:{}:{}'
+ALL_CATEGORIES = 'all'
+
+
+def get_generation(scope):
+    key = GENERATION_KEY.format(scope)
+    generation = cache.get(key)
+    if generation is None:
+        # Começa de um valor baseado no relógio: se a chave for descartada pelo
+        # cache, a nova geração nunca coincide com uma antiga ainda guardada.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(scope):
+    key = GENERATION_KEY.format(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_category(category_id):
+    def bump():
+        bump_generation(category_id)
+        bump_generation(ALL_CATEGORIES)
+
+    # Já (quem revalidar com o ETag antigo não recebe 304) e de novo no commit,
+    # para descartar o que uma leitura feita antes do commit tenha guardado
+    # sob a geração nova.
+    bump()
+    transaction.on_commit(bump)
+
+
+def compute_etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8')
+    return '"{}"'.format(hashlib.md5(payload, usedforsecurity=False).hexdigest())
+
+
+def etag_matches(request, etag):
+    # Comparação fraca (RFC 9110): a compressão (api/compression.py) devolve o
+    # ETag como W/"...", e é assim que o cliente o manda de volta.
+    header = request.headers.get('If-None-Match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag.removeprefix('W/') in tags or header.strip() == '*'
+
+
+def validator_headers(etag, last_modified=None):
+    headers = {
+        'ETag': etag,
+        # O navegador sempre revalida, mandando o ETag em If-None-Match.
+        'Cache-Control': 'private, no-cache',
+    }
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag, last_modified=None):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
+
+def is_not_modified(request, etag, last_modified=None):
+    # Como no Django, If-Modified-Since só é considerado sem If-None-Match.
+    if 'If-None-Match' in request.headers:
+        return etag_matches(request, etag)
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and last_modified is not None and int(last_modified) <= since
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Devolve 304 quando o cliente já tem a versão atual; caso contrário monta
+    a resposta com `build()` e acrescenta os validadores.
+    """
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        for header, value in validator_headers(etag, last_modified).items():
+            response[header] = value
+    return response
+
+
+# --- Marca d'água dos ativos ---
+
+# Os ids de AssetChange vêm de uma sequência: no PostgreSQL uma transação
+# longa pode gravar o id N e só ficar visível depois do N+1. Contar as
+# alterações entre os últimos WATERMARK_WINDOW ids faz a marca mudar também
+# quando uma delas aparece atrasada.
+WATERMARK_WINDOW = 100_000
+
+
+def watermark_queries(category_id=None):
+    from .models import AssetChange, Category
+
+    changes = AssetChange.objects.order_by('-id')
+    # Categorias excluídas que aguardam o expurgo: os ativos delas somem das
+    # listagens antes de o feed registrar a remoção.
+    deleted = Category.all_objects.filter(deleted_at__isnull=False)
+    if category_id:
+        changes = changes.filter(category_id=category_id)
+        deleted = deleted.filter(pk=category_id)
+    return changes, deleted
+
+
+def make_watermark(last, recent, deleted):
+    """Junta as partes em (marca para o ETag, Last-Modified em segundos ou None)."""
+    last_id, changed_at = last or (0, None)
+    instants = [moment.timestamp() for moment in (changed_at, deleted['last']) if moment is not None]
+    return (last_id, recent, deleted['count'], deleted['last']), max(instants, default=None)
+
+
+def get_asset_watermark(category_id=None):
+    """
+    Marca d'água da listagem de ativos da categoria (ou de todas), lida do
+    banco para valer em todos os processos, inclusive no worker: o último
+    AssetChange, quantas alterações há perto dele e as exclusões pendentes.
+    """
+    changes, deleted = watermark_queries(category_id)
+    last = changes.values_list('id', 'changed_at').first()
+    recent = changes.filter(id__gt=last[0] - WATERMARK_WINDOW).count() if last else 0
+    return make_watermark(last, recent, deleted.aggregate(count=Count('id'), last=Max('deleted_at')))
+
+
+async def aget_asset_watermark(category_id=None):
+    changes, deleted = watermark_queries(category_id)
+    last = await changes.values_list('id', 'changed_at').afirst()
+    recent = await changes.filter(id__gt=last[0] - WATERMARK_WINDOW).acount() if last else 0
+    return make_watermark(last, recent, await deleted.aaggregate(count=Count('id'), last=Max('deleted_at')))
+
+
+def cached_response(request, scope, build):
+    """
+    Devolve a resposta guardada para esta URL (ou 304), montando-a com
+    `build()` apenas quando ela não está no cache.
+    """
+    key = RESPONSE_KEY.format(scope, get_generation(scope), request.build_absolute_uri())
+    entry = cache.get(key)
+    if entry is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry = {'etag': compute_etag(response.data), 'data': response.data}
+        cache.set(key, entry, settings.API_SCHEMA_CACHE_TIMEOUT)
+
+    if etag_matches(request, entry['etag']):
+        return not_modified(entry['etag'])
+    return Response(entry['data'], headers=validator_headers(entry['etag']))
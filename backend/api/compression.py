@@ -0,0 +1,102 @@
+"""
+Compressão das respostas negociada pelo Accept-Encoding: brotli quando o
+cliente aceita e o pacote `brotli` está instalado, senão gzip.
+
+Estende o GZipMiddleware do Django (que continua cuidando do gzip, inclusive
+das respostas em streaming como as exportações) com o brotli e com uma
+negociação que respeita os pesos `q` do cabeçalho. Conteúdo que já vem
+comprimido (xlsx, imagens, zip) passa direto.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Em ordem de preferência quando o cliente aceita mais de uma com o mesmo peso.
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Respostas menores que isso não compensam (mesmo limite do GZipMiddleware).
+MIN_SIZE = 200
+
+ALREADY_COMPRESSED = (
+    'image/', 'video/', 'audio/', 'application/zip', 'application/gzip',
+    'application/vnd.openxmlformats-officedocument.',
+)
+
+
+def negotiate(accept_encoding):
+    """Escolhe a codificação a partir do Accept-Encoding; None se nenhuma servir."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        try:
+            weight = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+        except ValueError:
+            continue
+        weights[name.strip().lower()] = weight
+    default = weights.get('*', 0)
+    candidates = [(weights.get(name, default), name) for name in SUPPORTED_ENCODINGS]
+    weight, name = max(candidates, key=lambda candidate: candidate[0])
+    return name if weight > 0 else None
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=settings.API_BROTLI_QUALITY)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.API_BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.API_BROTLI_QUALITY)
+    async for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding') or response.get('Content-Type', '').startswith(ALREADY_COMPRESSED):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+        if encoding != 'br':
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = abrotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli_compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # Como no gzip: o corpo mudou, então o ETag forte vira fraco.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
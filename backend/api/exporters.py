@@ -0,0 +1,132 @@
+import csv
+import json
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+
+# Linhas buscadas do banco por vez; a memória fica constante em qualquer tamanho de inventário.
+EXPORT_CHUNK_SIZE = 2000
+
+BASE_COLUMNS = ['id', 'patrimonio', 'status', 'created_at', 'owner']
+
+
+class Echo:
+    """Objeto "arquivo" que apenas devolve o que foi escrito (padrão da doc do Django para CSV em streaming)."""
+    def write(self, value):
+        return value
+
+
+def field_columns(category):
+    # Uma coluna por FieldDefinition; nomes repetidos viram `field_<id>` para não se misturarem.
+    fields = list(category.field_definitions.order_by('id').values_list('id', 'name'))
+    names = [name for _, name in fields]
+    return [
+        (field_id, name if names.count(name) == 1 else f'field_{field_id}')
+        for field_id, name in fields
+    ]
+
+
+def iter_asset_rows(queryset, columns):
+    """
+    Percorre os ativos e "pivota" os valores EAV em uma linha por ativo.
+
+    Uma única consulta com LEFT JOIN ordenada por ativo traz uma linha por
+    valor de campo; as linhas consecutivas do mesmo ativo são agrupadas
+    enquanto o cursor avança, sem carregar o queryset inteiro.
+    """
+    positions = {field_id: index for index, (field_id, _) in enumerate(columns)}
+    rows = queryset.order_by('id').values_list(
+        'id', 'patrimonio', 'status', 'created_at', 'owner__username',
+        'field_values__field_definition_id', 'field_values__value',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for _, asset_rows in groupby(rows, key=itemgetter(0)):
+        values = [''] * len(columns)
+        base = None
+        for row in asset_rows:
+            base = row[:5]
+            index = positions.get(row[5])
+            if index is not None:
+                values[index] = row[6]
+        asset_id, patrimonio, status, created_at, owner = base
+        yield [asset_id, patrimonio, status, created_at.isoformat(), owner] + values
+
+
+def header(columns):
+    return BASE_COLUMNS + [name for _, name in columns]
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(Echo())
+    yield '\ufeff'  # BOM para o Excel reconhecer UTF-8
+    yield writer.writerow(header(columns))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(rows, columns):
+    names = header(columns)
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def write_xlsx(rows, columns, output):
+    # openpyxl é opcional: só é necessário para este formato.
+    from openpyxl import Workbook
+
+    # O modo write_only grava as linhas em disco à medida que são adicionadas,
+    # então a planilha não é montada em memória.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Ativos')
+    sheet.append(header(columns))
+    for row in rows:
+        sheet.append(row)
+    workbook.save(output)
+
+
+def write_export(file_format, rows, columns, output):
+    """Grava a exportação em um arquivo binário (exportações em segundo plano, ver api/jobs.py)."""
+    if file_format == 'xlsx':
+        write_xlsx(rows, columns, output)
+        return
+    lines = csv_lines if file_format == 'csv' else jsonl_lines
+    for line in lines(rows, columns):
+        output.write(line.encode('utf-8'))
+
+
+def csv_response(queryset, columns, filename):
+    response = StreamingHttpResponse(
+        csv_lines(iter_asset_rows(queryset, columns), columns), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def jsonl_response(queryset, columns, filename):
+    response = StreamingHttpResponse(
+        jsonl_lines(iter_asset_rows(queryset, columns), columns), content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.jsonl"'
+    return response
+
+
+def xlsx_response(queryset, columns, filename):
+    output = tempfile.TemporaryFile()
+    write_xlsx(iter_asset_rows(queryset, columns), columns, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+EXPORTERS = {
+    'csv': csv_response,
+    'jsonl': jsonl_response,
+    'xlsx': xlsx_response,
+}
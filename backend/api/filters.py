@@ -0,0 +1,71 @@
+import re
+from datetime import date
+
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from .models import AssetFieldValue, FieldDefinition
+
+# ?field_<id>=valor  ou  ?field_<id>__<operador>=valor
+FIELD_PARAM_RE = re.compile(r'^field_(?P<id>\d+)(?:__(?P<op>gt|gte|lt|lte))?$')
+
+# Coluna tipada usada por cada tipo de campo (ver AssetFieldValue).
+TYPED_COLUMNS = {
+    'number': 'value_number',
+    'date': 'value_date',
+    'text': 'value_text',
+}
+
+
+def _parse_filter_value(field, raw, param):
+    try:
+        if field.field_type == 'number':
+            return float(raw.replace(',', '.'))
+        if field.field_type == 'date':
+            return date.fromisoformat(raw)
+    except ValueError:
+        raise ValidationError({param: f"Valor inválido para o campo '{field.name}'."})
+    return raw
+
+
+def filter_by_field_values(queryset, query_params):
+    """
+    Aplica filtros de igualdade e intervalo sobre os campos personalizados.
+
+    Exemplos:
+        ?field_3__gt=200                              -> voltagem > 200
+        ?field_5__gte=2024-01-01&field_5__lt=2025-01-01  -> comprado em 2024
+        ?field_7=Dell                                 -> marca igual a "Dell"
+
+    Cada filtro vira um EXISTS sobre AssetFieldValue que usa o índice
+    composto (field_definition, valor tipado), então a filtragem acontece
+    no banco e não no Python ou no navegador.
+    """
+    params = []
+    for param in query_params:
+        match = FIELD_PARAM_RE.match(param)
+        if match:
+            params.append((param, int(match.group('id')), match.group('op')))
+    if not params:
+        return queryset
+
+    fields = FieldDefinition.objects.in_bulk({field_id for _, field_id, _ in params})
+    for param, field_id, op in params:
+        field = fields.get(field_id)
+        if field is None:
+            raise ValidationError({param: "Campo personalizado não encontrado."})
+        if op and field.field_type == 'text':
+            raise ValidationError({param: "Campos de texto aceitam apenas filtro de igualdade."})
+
+        for raw in query_params.getlist(param):
+            value = _parse_filter_value(field, raw.strip(), param)
+            column = TYPED_COLUMNS[field.field_type]
+            # Textos maiores que o índice só podem ser comparados pela coluna original.
+            if field.field_type == 'text' and len(value) > AssetFieldValue.TEXT_INDEX_LENGTH:
+                column = 'value'
+            lookup = f'{column}__{op}' if op else column
+            matching = AssetFieldValue.objects.filter(
+                asset=OuterRef('pk'), field_definition_id=field_id, **{lookup: value}
+            )
+            queryset = queryset.filter(Exists(matching))
+    return queryset
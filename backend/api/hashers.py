@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 do Django com o número de iterações vindo de settings.PBKDF2_ITERATIONS
+    (sem valor, vale o padrão do Django). Como o algoritmo continua sendo
+    "pbkdf2_sha256", os hashes existentes seguem válidos e são regravados com
+    o novo custo no próximo login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PBKDF2_ITERATIONS', None) or hashers.PBKDF2PasswordHasher.iterations
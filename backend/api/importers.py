@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+from collections import Counter
+from datetime import date
+
+from django.db import IntegrityError, connection, transaction
+
+from . import search, snapshots
+from .models import Asset, AssetChange, AssetFieldValue, AssetStatusCount, parse_typed_value
+
+# Quantidade de linhas validadas e gravadas por transação.
+IMPORT_BATCH_SIZE = 1000
+# Evita que um arquivo inteiro com erros gere uma resposta gigante.
+MAX_REPORTED_ERRORS = 1000
+# Ordem das colunas usada no INSERT em massa de AssetFieldValue.
+FIELD_VALUE_COLUMNS = ('asset', 'field_definition', 'value', 'value_number', 'value_date', 'value_text')
+
+
+class AssetImporter:
+    """
+    Importa ativos de um arquivo CSV ou JSONL para uma categoria.
+
+    O arquivo é lido linha a linha (nunca inteiro em memória). As linhas são
+    validadas em lotes contra as FieldDefinitions da categoria e cada lote
+    válido é gravado com `bulk_create` dentro de uma transação própria, então
+    uma falha em um lote não desfaz os anteriores.
+
+    Colunas esperadas: `patrimonio`, `status` (opcional) e um campo por
+    FieldDefinition, identificado pelo nome ou por `field_<id>`.
+    """
+    STATUS_VALUES = {value for value, _ in Asset.STATUS_CHOICES}
+
+    def __init__(self, category, owner_id, batch_size=None, on_progress=None):
+        self.category = category
+        self.owner_id = owner_id
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        # Chamado com o número de linhas lidas após cada lote (ex.: andamento de um Job).
+        self.on_progress = on_progress
+        self.fields = list(category.field_definitions.all())
+        self.columns = {}
+        for field in self.fields:
+            self.columns.setdefault(field.name, field)
+            self.columns[f'field_{field.id}'] = field
+        self.seen_patrimonios = set()
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    # --- Leitura dos formatos ---
+
+    def read_csv(self, binary_file):
+        reader = csv.DictReader(io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+        unknown = [
+            name for name in (reader.fieldnames or [])
+            if name not in ('patrimonio', 'status') and name not in self.columns
+        ]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas para esta categoria: {', '.join(unknown)}")
+        for row in reader:
+            yield row, None
+
+    def read_jsonl(self, binary_file):
+        for line in io.TextIOWrapper(binary_file, encoding='utf-8-sig'):
+            line = line.strip()
+            if not line:
+                # Linhas em branco ainda contam na numeração do relatório.
+                yield None, None
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield None, {'non_field_errors': ['JSON inválido.']}
+                continue
+            if not isinstance(row, dict):
+                yield None, {'non_field_errors': ['Cada linha deve ser um objeto JSON.']}
+                continue
+            yield row, None
+
+    # --- Processamento ---
+
+    def run(self, rows):
+        batch = []
+        line_number = 0
+        for line_number, (row, error) in enumerate(rows, start=1):
+            if row is None and error is None:
+                continue
+            if error:
+                self.add_error(line_number, error)
+                continue
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.process_batch(batch)
+                batch = []
+                if self.on_progress:
+                    self.on_progress(line_number)
+        if batch:
+            self.process_batch(batch)
+        if self.on_progress:
+            self.on_progress(line_number)
+        return self.report()
+
+    def process_batch(self, batch):
+        # Uma única consulta descobre quais patrimônios do lote já existem.
+        existing = set(Asset.objects.filter(
+            patrimonio__in=[str(row.get('patrimonio') or '').strip() for _, row in batch]
+        ).values_list('patrimonio', flat=True))
+
+        valid = []
+        for line_number, row in batch:
+            cleaned, errors = self.validate_row(row, existing)
+            if errors:
+                self.add_error(line_number, errors)
+            else:
+                self.seen_patrimonios.add(cleaned['patrimonio'])
+                valid.append((line_number, cleaned))
+        if valid:
+            self.write_batch(valid)
+
+    def validate_row(self, row, existing):
+        errors = {}
+        patrimonio = str(row.get('patrimonio') or '').strip()
+        if not patrimonio:
+            errors['patrimonio'] = ['Este campo é obrigatório.']
+        elif len(patrimonio) > Asset._meta.get_field('patrimonio').max_length:
+            errors['patrimonio'] = ['Patrimônio muito longo.']
+        elif patrimonio in existing or patrimonio in self.seen_patrimonios:
+            errors['patrimonio'] = ['Já existe um ativo com este patrimônio.']
+
+        status = str(row.get('status') or 'disponivel').strip()
+        if status not in self.STATUS_VALUES:
+            errors['status'] = [f'"{status}" não é um status válido.']
+
+        values = []
+        for column, raw in row.items():
+            if column in ('patrimonio', 'status'):
+                continue
+            field = self.columns.get(column)
+            if field is None:
+                errors[column] = ['Campo desconhecido para esta categoria.']
+                continue
+            if raw is None or str(raw).strip() == '':
+                continue
+            if any(existing_field is field for existing_field, _ in values):
+                errors[column] = ['Campo informado mais de uma vez (pelo nome e por field_<id>).']
+                continue
+            raw = str(raw).strip()
+            if not self.is_valid_for_type(field.field_type, raw):
+                errors[column] = [f'Valor inválido para um campo do tipo {field.get_field_type_display()}.']
+                continue
+            values.append((field, raw))
+
+        if errors:
+            return None, errors
+        return {'patrimonio': patrimonio, 'status': status, 'values': values}, None
+
+    @staticmethod
+    def is_valid_for_type(field_type, raw):
+        try:
+            if field_type == 'number':
+                float(raw.replace(',', '.'))
+            elif field_type == 'date':
+                date.fromisoformat(raw)
+        except ValueError:
+            return False
+        return True
+
+    def write_batch(self, valid):
+        try:
+            with transaction.atomic():
+                assets = Asset.objects.bulk_create([
+                    Asset(patrimonio=row['patrimonio'], status=row['status'],
+                          category=self.category, owner_id=self.owner_id,
+                          field_snapshot=snapshots.build_snapshot((field.pk, raw) for field, raw in row['values']))
+                    for _, row in valid
+                ])
+                field_values = []
+                for asset, (_, row) in zip(assets, valid):
+                    for field, raw in row['values']:
+                        number, day, text = parse_typed_value(field.field_type, raw)
+                        field_values.append((
+                            asset.pk, field.pk, raw, number,
+                            connection.ops.adapt_datefield_value(day), text,
+                        ))
+                self.insert_field_values(field_values)
+                # Os INSERTs em massa não disparam signals: atualiza a busca, os contadores,
+                # a marca d'água e o feed de alterações aqui.
+                asset_ids = [asset.pk for asset in assets]
+                search.reindex_assets(asset_ids)
+                AssetChange.record(AssetChange.UPSERT, self.category.id, asset_ids)
+                for status, total in Counter(row['status'] for _, row in valid).items():
+                    AssetStatusCount.bump(self.category.id, status, total)
+        except IntegrityError:
+            # Ex.: outro usuário cadastrou o mesmo patrimônio durante a importação.
+            for line_number, _ in valid:
+                self.add_error(line_number, {'non_field_errors': ['Falha ao gravar o lote desta linha.']})
+            return
+        self.created += len(valid)
+
+    @staticmethod
+    def insert_field_values(rows):
+        # São ~10 valores por ativo: montar um objeto de modelo para cada um
+        # custa mais que a própria escrita, então o INSERT é feito direto.
+        if not rows:
+            return
+        opts = AssetFieldValue._meta
+        columns = [opts.get_field(name).column for name in FIELD_VALUE_COLUMNS]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def add_error(self, line_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line_number, 'errors': errors})
+
+    def report(self):
+        return {
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
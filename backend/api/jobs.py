@@ -0,0 +1,229 @@
+"""
+Fila de tarefas em segundo plano guardada no próprio banco (modelo Job).
+
+As views gravam a tarefa com `enqueue` e respondem 202 com o id; o comando
+`run_jobs` (um ou mais processos worker) retira as tarefas da fila, executa
+o handler registrado para o tipo e grava o resultado. O handler informa o
+andamento por `JobContext.progress`, que é também onde um pedido de
+cancelamento interrompe a execução. Falhas são repetidas com espera
+exponencial até `max_attempts` (sem limite nas MUST_FINISH); tarefas de um
+worker que morreu no meio voltam para a fila (`requeue_stale`).
+"""
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.http import QueryDict
+from django.utils import timezone
+
+from .batch import BATCH_MAX_IDS, AssetBatch
+from .models import Asset, Category, Job
+
+logger = logging.getLogger('api.jobs')
+
+HANDLERS = {}
+
+# Tentativas por tipo (as demais usam settings.JOB_MAX_ATTEMPTS). A importação
+# roda uma vez só: repetida, acusaria como duplicados os ativos já gravados.
+MAX_ATTEMPTS = {Job.ASSET_IMPORT: 1}
+
+# Tarefas que não podem parar no meio: não são canceladas e, quando falham,
+# voltam para a fila sem limite de tentativas. Um expurgo abandonado deixaria
+# a categoria ou o campo excluído logicamente para sempre.
+MUST_FINISH = {Job.PURGE}
+
+
+class JobCancelled(Exception):
+    """Levantada por JobContext.progress quando alguém cancelou a tarefa."""
+
+
+def handler(kind):
+    """Registra a função que executa as tarefas do tipo `kind`."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload, user_id=None, input_file=None):
+    job = Job(
+        kind=kind,
+        payload=payload,
+        created_by_id=user_id,
+        max_attempts=MAX_ATTEMPTS.get(kind, settings.JOB_MAX_ATTEMPTS),
+    )
+    if input_file is not None:
+        job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    return job
+
+
+def cancel(job_id):
+    """
+    Cancela a tarefa: na fila, na hora; em execução, o worker para no próximo
+    `progress`. Retorna False se ela já tinha terminado ou não pode ser
+    cancelada (MUST_FINISH).
+    """
+    cancellable = Job.objects.filter(pk=job_id).exclude(kind__in=MUST_FINISH)
+    if cancellable.filter(status=Job.QUEUED).update(
+        status=Job.CANCELLED, cancel_requested=True, finished_at=timezone.now()
+    ):
+        return True
+    return bool(cancellable.filter(status=Job.RUNNING).update(cancel_requested=True))
+
+
+def claim(worker):
+    """
+    Retira da fila a próxima tarefa pronta para rodar. O UPDATE condicionado
+    ao status garante que dois workers nunca peguem a mesma tarefa.
+    """
+    while True:
+        job_id = Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now()).order_by(
+            'run_after', 'id'
+        ).values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F('attempts') + 1, started_at=now, heartbeat_at=now
+        ):
+            return Job.objects.get(pk=job_id)
+        # Outro worker pegou esta antes: tenta a seguinte.
+
+
+def requeue_stale(timeout=None):
+    """Trata como falha as tarefas cujo worker parou de dar sinal de vida. Retorna quantas eram."""
+    limit = timezone.now() - timedelta(seconds=timeout or settings.JOB_STALE_TIMEOUT)
+    stale = list(Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=limit))
+    for job in stale:
+        retry_or_fail(job, f'O worker {job.worker} parou de responder.')
+    return len(stale)
+
+
+def backoff(attempt):
+    """Espera (segundos) antes da próxima tentativa: dobra a cada falha, até o teto."""
+    return min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempt - 1), settings.JOB_RETRY_MAX_DELAY)
+
+
+def run(job):
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise ValueError(f'Tipo de tarefa desconhecido: {job.kind}')
+        result = func(job, JobContext(job))
+    except JobCancelled:
+        finish(job, Job.CANCELLED)
+    except Exception as exc:
+        logger.exception('Tarefa %s (%s) falhou na tentativa %s', job.pk, job.kind, job.attempts)
+        retry_or_fail(job, f'{type(exc).__name__}: {exc}')
+    else:
+        finish(job, Job.SUCCEEDED, result)
+    return job
+
+
+def finish(job, status, result=None):
+    job.status = status
+    job.result = result
+    job.finished_at = job.heartbeat_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'output_file', 'progress', 'total', 'finished_at', 'heartbeat_at'])
+
+
+def retry_or_fail(job, error):
+    job.error = error
+    job.refresh_from_db(fields=['cancel_requested'])
+    retry = job.attempts < job.max_attempts or job.kind in MUST_FINISH
+    if retry and not job.cancel_requested:
+        job.status = Job.QUEUED
+        job.run_after = timezone.now() + timedelta(seconds=backoff(job.attempts))
+        job.progress = 0
+    else:
+        job.status = Job.CANCELLED if job.cancel_requested else Job.FAILED
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'run_after', 'progress', 'finished_at'])
+
+
+class JobContext:
+    """Passado aos handlers para informar o andamento da tarefa."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, done, total=None):
+        fields = {'progress': done, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            fields['total'] = total
+        # Um só UPDATE grava o andamento e descobre se houve pedido de cancelamento.
+        if not Job.objects.filter(pk=self.job.pk, cancel_requested=False).update(**fields):
+            raise JobCancelled()
+        for name, value in fields.items():
+            setattr(self.job, name, value)
+
+    def track(self, items, total=None, every=1000):
+        """Percorre `items` informando o andamento a cada `every` itens."""
+        done = 0
+        self.progress(done, total)
+        for item in items:
+            yield item
+            done += 1
+            if done % every == 0:
+                self.progress(done, total)
+        self.progress(done, total)
+
+
+# --- Handlers ---
+
+@handler(Job.ASSET_IMPORT)
+def import_assets(job, context):
+    from .importers import AssetImporter
+
+    category = Category.objects.get(pk=job.payload['category_id'])
+    importer = AssetImporter(category, job.created_by_id, on_progress=context.progress)
+    reader = importer.read_csv if job.payload['format'] == 'csv' else importer.read_jsonl
+    with job.input_file.open('rb') as upload:
+        return importer.run(reader(upload))
+
+
+@handler(Job.ASSET_EXPORT)
+def export_assets(job, context):
+    from .exporters import EXPORT_CHUNK_SIZE, field_columns, iter_asset_rows, write_export
+    from .views import AssetViewSet
+
+    category = Category.objects.get(pk=job.payload['category_id'])
+    file_format = job.payload['file_format']
+    # Os mesmos filtros da exportação síncrona, guardados como query string.
+    queryset = AssetViewSet.apply_filters(Asset.objects.visible(), QueryDict(job.payload.get('query', '')))
+    columns = field_columns(category)
+    rows = context.track(iter_asset_rows(queryset, columns), queryset.count(), EXPORT_CHUNK_SIZE)
+    with tempfile.TemporaryFile() as output:
+        write_export(file_format, rows, columns, output)
+        output.seek(0)
+        job.output_file.save(f'ativos-{category.id}-{job.pk}.{file_format}', File(output), save=False)
+    return {'rows': job.progress}
+
+
+@handler(Job.ASSET_BATCH)
+def batch_assets(job, context):
+    payload = job.payload
+    category = Category.objects.get(pk=payload['category']) if payload.get('category') else None
+    ids = payload['ids']
+    results = []
+    # Uma transação por fatia: o cancelamento (ou uma falha) preserva as fatias
+    # já aplicadas, e repetir a tarefa é seguro (o que já mudou vira "unchanged").
+    for start in range(0, len(ids), BATCH_MAX_IDS):
+        context.progress(start, len(ids))
+        results += AssetBatch(ids[start:start + BATCH_MAX_IDS]).run(
+            payload['action'], payload.get('status'), category
+        )
+    context.progress(len(ids), len(ids))
+    return {'results': results}
+
+
+@handler(Job.PURGE)
+def purge_deleted(job, context):
+    from . import purge
+
+    return purge.purge(job.payload['target'], job.payload['id'], context.progress)
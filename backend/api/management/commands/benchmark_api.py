@@ -0,0 +1,170 @@
+import json
+import platform
+import subprocess
+import time
+import uuid
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.benchmarking import summarize
+from api.models import Asset, AssetFieldValue, AssetStatusCount, Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os principais endpoints (listagem/criação/edição de ativos, categorias, token) "
+        "pelo cliente de teste do Django, sem rede, e grava o resultado em JSON para comparar commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Requisições medidas por cenário.")
+        parser.add_argument('--warmup', type=int, default=5, help="Requisições descartadas antes de medir.")
+        parser.add_argument('--category', type=int, help="Categoria usada (padrão: a com mais ativos).")
+        parser.add_argument('--username', default='benchmark', help="Usuário (admin) criado/atualizado para o teste.")
+        parser.add_argument('--password', default='benchmark-senha-1')
+        parser.add_argument('--output', help="Arquivo JSON de saída (padrão: stdout).")
+
+    def handle(self, *args, **options):
+        category = self.pick_category(options['category'])
+        self.user = self.ensure_user(options['username'], options['password'])
+        self.client = Client()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.iterations = options['iterations']
+        self.warmup = options['warmup']
+
+        credentials = {'username': options['username'], 'password': options['password']}
+        access = self.client.post('/api/token/', credentials, content_type='application/json').json()['access']
+        self.headers = {'Authorization': f'Bearer {access}'}
+        self.fields = list(category.field_definitions.order_by('id'))
+        sample = AssetFieldValue.objects.filter(asset__category=category, value_text__isnull=False).values_list(
+            'value_text', flat=True
+        ).first() or 'a'
+
+        scenarios = {
+            'token_obtain': lambda: self.client.post('/api/token/', credentials, content_type='application/json'),
+            'category_list': lambda: self.get('/api/categories/'),
+            'category_detail': lambda: self.get(f'/api/categories/{category.id}/'),
+            'asset_list': lambda: self.get(f'/api/assets/?category_id={category.id}'),
+            'asset_search': lambda: self.get(f'/api/assets/?q={sample.split()[0]}'),
+            'asset_create': lambda: self.create_asset(category),
+        }
+        try:
+            results = {name: self.measure(request) for name, request in scenarios.items()}
+            asset_ids = iter(list(
+                Asset.objects.filter(patrimonio__startswith=self.prefix).values_list('id', flat=True)
+            ))
+            results['asset_update'] = self.measure(lambda: self.update_asset(next(asset_ids), category))
+        finally:
+            Asset.objects.filter(patrimonio__startswith=self.prefix).delete()
+
+        report = {'meta': self.meta(category), 'scenarios': results}
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n', encoding='utf-8')
+            self.stderr.write(f"Resultado gravado em {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    # --- Preparação ---
+
+    def pick_category(self, category_id):
+        if category_id:
+            category = Category.objects.filter(pk=category_id).first()
+        else:
+            largest = AssetStatusCount.objects.values('category_id').annotate(total=Sum('count')).order_by('-total').first()
+            category = Category.objects.filter(pk=largest['category_id']).first() if largest else None
+        if category is None:
+            raise CommandError("Nenhuma categoria com ativos. Rode antes: manage.py seed_inventory")
+        return category
+
+    @staticmethod
+    def ensure_user(username, password):
+        user, _ = User.objects.get_or_create(username=username)
+        user.set_password(password)
+        user.save()
+        if user.profile.role != 'admin':
+            user.profile.change_role('admin')
+        return user
+
+    @property
+    def prefix(self):
+        return f'BENCH-{self.run_id}-'
+
+    # --- Requisições ---
+
+    def get(self, path):
+        return self.client.get(path, headers=self.headers)
+
+    def field_values(self):
+        values = {'text': 'Benchmark', 'number': '220', 'date': timezone.localdate().isoformat()}
+        return [{'field_definition': field.id, 'value': values[field.field_type]} for field in self.fields]
+
+    def create_asset(self, category):
+        self.sequence += 1
+        return self.client.post('/api/assets/', {
+            'patrimonio': f'{self.prefix}{self.sequence:06}',
+            'category': category.id,
+            'status': 'disponivel',
+            'field_values': self.field_values(),
+        }, content_type='application/json', headers=self.headers)
+
+    def update_asset(self, asset_id, category):
+        values = self.field_values()
+        if values:
+            values[0]['value'] = f'Editado {asset_id}'
+        return self.client.put(f'/api/assets/{asset_id}/', {
+            'patrimonio': f'{self.prefix}{asset_id}',
+            'category': category.id,
+            'status': 'em_uso',
+            'field_values': values,
+        }, content_type='application/json', headers=self.headers)
+
+    def measure(self, request):
+        for _ in range(self.warmup):
+            request()
+        latencies, queries, errors = [], [], 0
+        for _ in range(self.iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = request()
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(ctx.captured_queries))
+            errors += response.status_code >= 400
+        summary = summarize(latencies, errors=errors)
+        summary['queries_per_request'] = sorted(queries)[len(queries) // 2] if queries else None
+        return summary
+
+    # --- Metadados para comparar execuções ---
+
+    def meta(self, category):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'git_commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'category_id': category.id,
+            'counts': {
+                'categories': Category.objects.count(),
+                'assets': Asset.objects.count(),
+                'field_values': AssetFieldValue.objects.count(),
+            },
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from api.benchmarking import summarize
+from api.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara requisições por segundo e latência p99 entre a listagem síncrona (WSGI) "
+        "e a assíncrona (ASGI) sob carga concorrente. Imprime o resultado em JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Total de requisições por modo.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Requisições simultâneas.")
+        parser.add_argument('--username', help="Usuário do token (padrão: o primeiro cadastrado).")
+        parser.add_argument('--query', default='', help="Query string comum aos dois modos (ex.: category_id=1).")
+        parser.add_argument('--sync-path', default='/api/assets/')
+        parser.add_argument('--async-path', default='/api/async/assets/')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        if user is None:
+            raise CommandError("Nenhum usuário encontrado para gerar o token.")
+        self.headers = {'Authorization': f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'}
+        self.total = options['requests']
+        self.concurrency = options['concurrency']
+        query = f"?{options['query']}" if options['query'] else ''
+
+        # Os dois handlers rodam no próprio processo (pelos clientes de teste do
+        # Django), então a comparação mede o Django e o banco, não a rede.
+        result = {
+            'requests': self.total,
+            'concurrency': self.concurrency,
+            'wsgi': self.run_wsgi(options['sync_path'] + query),
+            'asgi': asyncio.run(self.run_asgi(options['async_path'] + query)),
+        }
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_wsgi(self, path):
+        def worker(count):
+            client = Client(headers=self.headers)
+            latencies, errors = [], 0
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+            connections.close_all()
+            return latencies, errors
+
+        counts = self.split(self.total, self.concurrency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(worker, counts))
+        elapsed = time.perf_counter() - start
+        return summarize([lat for lats, _ in results for lat in lats], elapsed, sum(err for _, err in results))
+
+    async def run_asgi(self, path):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies, errors = [], 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, headers=self.headers)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(self.total)))
+        return summarize(latencies, time.perf_counter() - start, errors)
+
+    @staticmethod
+    def split(total, parts):
+        return [total // parts + (1 if index < total % parts else 0) for index in range(parts)]
@@ -0,0 +1,70 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+
+from api.benchmarking import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede logins por segundo em /api/token/ e renovações por segundo em /api/token/refresh/ "
+        "com o algoritmo de senha configurado (PASSWORD_HASHER). Imprime o resultado em JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Total de requisições por endpoint.")
+        parser.add_argument('--concurrency', type=int, default=4, help="Requisições simultâneas (threads).")
+        parser.add_argument('--username', default='benchmark-login', help="Usuário criado/atualizado para o teste.")
+        parser.add_argument('--password', default='benchmark-senha-1')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=options['username'])
+        # Grava a senha com o algoritmo atual: o primeiro login não paga a regravação.
+        user.set_password(options['password'])
+        user.save()
+
+        self.total = options['requests']
+        self.concurrency = options['concurrency']
+        self.credentials = {'username': options['username'], 'password': options['password']}
+        refresh = Client().post('/api/token/', self.credentials, content_type='application/json').json()['refresh']
+
+        hasher = get_hasher()
+        result = {
+            'requests': self.total,
+            'concurrency': self.concurrency,
+            'password_hasher': {
+                'setting': settings.PASSWORD_HASHER,
+                'algorithm': hasher.algorithm,
+                'iterations': getattr(hasher, 'iterations', None),
+            },
+            'token_obtain': self.run('/api/token/', self.credentials),
+            'token_refresh': self.run('/api/token/refresh/', {'refresh': refresh}),
+        }
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run(self, path, payload):
+        def worker(count):
+            client = Client()
+            latencies, errors = [], 0
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.post(path, payload, content_type='application/json')
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+            connections.close_all()
+            return latencies, errors
+
+        counts = [self.total // self.concurrency + (1 if index < self.total % self.concurrency else 0)
+                  for index in range(self.concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(worker, counts))
+        elapsed = time.perf_counter() - start
+        return summarize([lat for lats, _ in results for lat in lats], elapsed, sum(err for _, err in results))
@@ -0,0 +1,81 @@
+import gzip
+import io
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import compression
+from api.benchmarking import summarize
+from api.models import Asset
+from api.renderers import ORJSONParser, ORJSONRenderer, orjson
+from api.serializers import AssetSerializer
+from api.views import AssetViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Serializa N ativos com o AssetSerializer e compara o JSONRenderer do DRF com o "
+        "ORJSONRenderer (tempo de render e de parse) e o tamanho do corpo sem compressão, "
+        "com gzip e com brotli. Imprime o resultado em JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assets', type=int, default=10_000, help="Quantidade de ativos no payload.")
+        parser.add_argument('--repeat', type=int, default=10, help="Repetições de cada medição.")
+        parser.add_argument('--category', type=int, help="Usa apenas os ativos desta categoria.")
+
+    def handle(self, *args, **options):
+        queryset = AssetViewSet.for_reading(Asset.objects.visible()).order_by('id')
+        if options['category']:
+            queryset = queryset.filter(category_id=options['category'])
+        assets = list(queryset[:options['assets']])
+        if not assets:
+            raise CommandError("Nenhum ativo para serializar (use seed_inventory).")
+        self.repeat = options['repeat']
+
+        start = time.perf_counter()
+        data = AssetSerializer(assets, many=True).data
+        serialize_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        stdlib = JSONRenderer().render(data)
+        fast = ORJSONRenderer().render(data)
+        if json.loads(stdlib) != json.loads(fast):
+            raise CommandError("Os dois renderers produziram JSON diferente.")
+
+        result = {
+            'assets': len(assets),
+            'repeat': self.repeat,
+            'orjson_installed': orjson is not None,
+            'serialize_ms': serialize_ms,
+            'render': {
+                'drf_json': self.measure(lambda: JSONRenderer().render(data)),
+                'orjson': self.measure(lambda: ORJSONRenderer().render(data)),
+            },
+            'parse': {
+                'drf_json': self.measure(lambda: JSONParser().parse(io.BytesIO(fast))),
+                'orjson': self.measure(lambda: ORJSONParser().parse(io.BytesIO(fast))),
+            },
+            'bytes': {'identity': len(fast)},
+            'compress': {},
+        }
+        # Mesmo nível do GZipMiddleware do Django.
+        encoders = {'gzip': lambda: gzip.compress(fast, compresslevel=6, mtime=0)}
+        if compression.brotli:
+            encoders[f'br (quality {settings.API_BROTLI_QUALITY})'] = lambda: compression.brotli_compress(fast)
+        for name, encode in encoders.items():
+            result['bytes'][name] = len(encode())
+            result['compress'][name] = self.measure(encode)
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def measure(self, function):
+        latencies = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - start)
+        summary = summarize(latencies)
+        return {key: summary[key] for key in ('mean_ms', 'min_ms', 'p50_ms', 'max_ms')}
@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import snapshots
+from api.models import Asset, AssetChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o snapshot de valores de cada ativo (Asset.field_snapshot) com a tabela "
+        "AssetFieldValue e, com --repair, regrava os divergentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help="Corrige os snapshots divergentes.")
+        parser.add_argument('--chunk-size', type=int, default=snapshots.CHUNK_SIZE, help="Ativos lidos por consulta.")
+
+    def handle(self, *args, **options):
+        drift = list(snapshots.find_drift(options['chunk_size']))
+        for asset_id, stored, expected in drift[:10]:
+            self.stdout.write(f"Ativo {asset_id}: salvo {stored}, esperado {expected}")
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Nenhum snapshot divergente."))
+            return
+        if not options['repair']:
+            raise CommandError(f"{len(drift)} ativos com snapshot divergente. Rode com --repair para corrigir.")
+
+        with transaction.atomic():
+            total = snapshots.repair(drift, chunk_size=options['chunk_size'])
+            # A resposta desses ativos mudou: invalida ETags e publica no feed de alterações.
+            asset_ids = [asset_id for asset_id, _, _ in drift]
+            by_category, now = defaultdict(list), timezone.now()
+            for start in range(0, len(asset_ids), options['chunk_size']):
+                chunk = Asset.objects.filter(id__in=asset_ids[start:start + options['chunk_size']])
+                for asset_id, category_id in chunk.values_list('id', 'category_id'):
+                    by_category[category_id].append(asset_id)
+                chunk.update(updated_at=now)
+            for category_id, ids in by_category.items():
+                AssetChange.record(AssetChange.UPSERT, category_id, ids)
+        self.stdout.write(self.style.SUCCESS(f"{total} snapshots corrigidos."))
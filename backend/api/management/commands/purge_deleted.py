@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Expurga agora, em lotes, as categorias e campos excluídos que ainda aguardam a tarefa "
+        "em segundo plano (ex.: depois de uma falha do worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help="Linhas apagadas por transação.")
+
+    def handle(self, *args, **options):
+        pending = purge.pending()
+        for target, object_id in pending:
+            result = purge.purge(target, object_id, chunk_size=options['chunk_size'])
+            self.stdout.write(f"{target} {object_id}: {result}")
+        self.stdout.write(self.style.SUCCESS(f"{len(pending)} exclusões expurgadas."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import AssetStatusCount
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero a contagem de ativos por categoria e status (AssetStatusCount)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = AssetStatusCount.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{total} contadores recalculados."))
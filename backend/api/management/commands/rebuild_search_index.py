@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Recria do zero o índice de busca textual dos ativos (api_asset_search)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=search.REINDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not search.is_indexed():
+            self.stdout.write(self.style.WARNING("Este banco não tem índice de busca; nada a fazer."))
+            return
+        with transaction.atomic():
+            total = search.rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ativos indexados."))
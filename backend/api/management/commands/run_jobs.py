@@ -0,0 +1,65 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de tarefas em segundo plano (importações, exportações, alterações em lote). "
+        "Rode um ou mais processos ao lado do servidor web; não precisa de broker externo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Esvazia a fila e sai, em vez de esperar novas tarefas.")
+        parser.add_argument('--max-jobs', type=int, help="Sai depois de executar esta quantidade de tarefas.")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Segundos entre consultas com a fila vazia.")
+        parser.add_argument('--worker-id', default=None, help="Identificação gravada nas tarefas (padrão: host:pid).")
+
+    def handle(self, *args, **options):
+        worker = options['worker_id'] or f'{socket.gethostname()}:{os.getpid()}'
+        poll_interval = options['poll_interval'] or settings.JOB_POLL_INTERVAL
+        self.stopping = False
+        # SIGTERM/SIGINT: termina a tarefa atual e sai.
+        previous = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            done = self.work(worker, poll_interval, options['once'], options['max_jobs'])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(f"Worker {worker} encerrado após {done} tarefas.")
+
+    def work(self, worker, poll_interval, once, max_jobs):
+        done = 0
+        self.stdout.write(f"Worker {worker} aguardando tarefas.")
+        while not self.stopping and (max_jobs is None or done < max_jobs):
+            # Dentro de uma transação de quem chamou (ex.: os testes) a conexão
+            # não pode ser devolvida; com o pool do PostgreSQL ela seria.
+            if not connection.in_atomic_block:
+                close_old_connections()
+            requeued = jobs.requeue_stale()
+            if requeued:
+                self.stderr.write(f"{requeued} tarefas de workers parados voltaram para a fila.")
+            job = jobs.claim(worker)
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            start = time.perf_counter()
+            jobs.run(job)
+            done += 1
+            self.stdout.write(
+                f"Tarefa {job.pk} ({job.kind}): {job.status} em {time.perf_counter() - start:.1f}s"
+                + (f" - {job.error}" if job.status != job.SUCCEEDED and job.error else '')
+            )
+        return done
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,80 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.importers import AssetImporter
+from api.models import Asset, Category, FieldDefinition
+
+BRANDS = ['Dell', 'Lenovo', 'HP', 'Apple', 'Samsung', 'Positivo', 'Acer', 'Asus', 'Cisco', 'Epson']
+WORDS = ['Latitude', 'ThinkPad', 'EliteBook', 'Inspiron', 'Vostro', 'Optiplex', 'Catalyst', 'EcoTank',
+         'Galaxy', 'MacBook', 'Predator', 'Zenbook', 'Aspire', 'ProBook', 'IdeaPad', 'Precision']
+PLACES = ['Bloco A', 'Bloco B', 'Bloco C', 'Laboratório 1', 'Laboratório 2', 'Almoxarifado', 'Reitoria']
+FIELD_TYPES = ['text', 'text', 'number', 'date']
+STATUSES = [value for value, _ in Asset.STATUS_CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um inventário sintético (categorias, campos, ativos e valores) para testes de carga. "
+        "Os ativos passam pelo mesmo caminho da importação em massa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=10, help="Quantidade de categorias.")
+        parser.add_argument('--fields', type=int, default=10, help="FieldDefinitions por categoria.")
+        parser.add_argument('--assets', type=int, default=10000, help="Ativos por categoria.")
+        parser.add_argument('--owner', default='seed', help="Usuário dono dos dados (criado se não existir).")
+        parser.add_argument('--prefix', default='SEED', help="Prefixo dos nomes e patrimônios gerados.")
+        parser.add_argument('--seed', type=int, default=42, help="Semente do gerador (mesmos dados a cada execução).")
+        parser.add_argument('--batch-size', type=int, default=None, help="Linhas gravadas por transação.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        owner, _ = User.objects.get_or_create(username=options['owner'])
+        if Category.objects.filter(name__startswith=f'{prefix} ').exists():
+            raise CommandError(f"Já existem categorias com o prefixo '{prefix}'. Use outro --prefix.")
+
+        start = time.perf_counter()
+        created = 0
+        for index in range(options['categories']):
+            with transaction.atomic():
+                category = Category.objects.create(name=f'{prefix} Categoria {index + 1:03}', owner=owner)
+                fields = FieldDefinition.objects.bulk_create([
+                    FieldDefinition(category=category, name=f'Campo {number + 1}',
+                                    field_type=FIELD_TYPES[number % len(FIELD_TYPES)])
+                    for number in range(options['fields'])
+                ])
+            importer = AssetImporter(category, owner.id, options['batch_size'])
+            report = importer.run(
+                (self.fake_row(rng, f'{prefix}-{index + 1:03}-{number + 1:07}', fields), None)
+                for number in range(options['assets'])
+            )
+            if report['error_count']:
+                raise CommandError(f"Falha ao gerar a categoria {category.name}: {report['errors'][:3]}")
+            created += report['created']
+            self.stdout.write(f"{category.name}: {report['created']} ativos")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} ativos e {created * options['fields']} valores de campo gerados em {elapsed:.1f}s."
+        ))
+
+    @staticmethod
+    def fake_row(rng, patrimonio, fields):
+        row = {'patrimonio': patrimonio, 'status': rng.choice(STATUSES)}
+        for field in fields:
+            if field.field_type == 'number':
+                value = str(rng.choice([110, 127, 220, 380]) if field.id % 2 else rng.randint(1, 5000))
+            elif field.field_type == 'date':
+                value = (date(2015, 1, 1) + timedelta(days=rng.randint(0, 3650))).isoformat()
+            elif field.id % 3 == 0:
+                value = rng.choice(PLACES)
+            else:
+                value = f'{rng.choice(BRANDS)} {rng.choice(WORDS)} {rng.randint(100, 9999)}'
+            row[f'field_{field.id}'] = value
+        return row
@@ -0,0 +1,97 @@
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.test import Client
+
+from api.models import Asset, Category
+from api.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de estresse: várias threads criando e editando ativos ao mesmo tempo pela API. "
+        "Mostra quantas escritas falharam (ex.: 'database is locked') com a configuração atual do banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Escritores simultâneos.")
+        parser.add_argument('--writes', type=int, default=25, help="Ativos criados (e editados) por thread.")
+        parser.add_argument('--category', type=int, help="Categoria usada (padrão: a primeira).")
+        parser.add_argument('--username', help="Usuário editor/admin (padrão: o primeiro admin).")
+
+    def handle(self, *args, **options):
+        category = Category.objects.filter(pk=options['category']).first() if options['category'] \
+            else Category.objects.order_by('id').first()
+        users = User.objects.filter(profile__role__in=['admin', 'editor']).order_by('id')
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        if category is None or user is None:
+            raise CommandError("É preciso ao menos uma categoria e um usuário admin/editor.")
+
+        self.headers = {'Authorization': f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'}
+        self.category = category
+        self.prefix = f'STRESS-{uuid.uuid4().hex[:8]}-'
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                results = list(pool.map(
+                    lambda worker: self.write(worker, options['writes']), range(options['threads'])
+                ))
+        finally:
+            Asset.objects.filter(patrimonio__startswith=self.prefix).delete()
+        elapsed = time.perf_counter() - start
+
+        errors = [error for _, worker_errors in results for error in worker_errors]
+        journal_mode = None
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+        self.stdout.write(json.dumps({
+            'threads': options['threads'],
+            'successful_writes': sum(ok for ok, _ in results),
+            'failed_writes': len(errors),
+            'error_samples': sorted(set(errors))[:5],
+            'seconds': round(elapsed, 2),
+            'database': {
+                'vendor': connection.vendor,
+                'journal_mode': journal_mode,
+                'options': connection.settings_dict['OPTIONS'],
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            },
+        }, indent=2))
+
+    def write(self, worker, count):
+        client = Client()
+        ok, errors = 0, []
+        try:
+            for number in range(count):
+                created = self.request(client, 'post', '/api/assets/', {
+                    'patrimonio': f'{self.prefix}{worker:02}-{number:04}',
+                    'category': self.category.id,
+                    'field_values': [],
+                }, errors)
+                if created is None:
+                    continue
+                ok += 1
+                if self.request(client, 'patch', f"/api/assets/{created['id']}/", {'status': 'em_uso'}, errors):
+                    ok += 1
+        finally:
+            connections.close_all()
+        return ok, errors
+
+    def request(self, client, method, path, data, errors):
+        try:
+            response = getattr(client, method)(path, data, content_type='application/json', headers=self.headers)
+        except DatabaseError as exc:
+            errors.append(str(exc))
+            return None
+        if response.status_code >= 400:
+            errors.append(f'HTTP {response.status_code}')
+            return None
+        return response.json()
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+from datetime import date
+
+from django.db import migrations, models
+
+
+def fill_typed_values(apps, schema_editor):
+    # Cópia local da conversão de api.models.parse_typed_value, para que a
+    # migração não dependa do código atual dos modelos.
+    AssetFieldValue = apps.get_model('api', 'AssetFieldValue')
+    batch = []
+    rows = AssetFieldValue.objects.select_related('field_definition').only(
+        'id', 'value', 'field_definition__field_type'
+    )
+    for fv in rows.iterator(chunk_size=2000):
+        raw = (fv.value or '').strip()
+        fv.value_number = fv.value_date = fv.value_text = None
+        field_type = fv.field_definition.field_type
+        if field_type == 'number':
+            try:
+                fv.value_number = float(raw.replace(',', '.'))
+            except ValueError:
+                pass
+        elif field_type == 'date':
+            try:
+                fv.value_date = date.fromisoformat(raw)
+            except ValueError:
+                pass
+        elif len(raw) <= 255:
+            fv.value_text = raw
+        batch.append(fv)
+        if len(batch) >= 2000:
+            AssetFieldValue.objects.bulk_update(batch, ['value_number', 'value_date', 'value_text'])
+            batch = []
+    if batch:
+        AssetFieldValue.objects.bulk_update(batch, ['value_number', 'value_date', 'value_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_asset_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetfieldvalue',
+            name='value_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetfieldvalue',
+            name='value_number',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetfieldvalue',
+            name='value_text',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assetfieldvalue',
+            index=models.Index(fields=['field_definition', 'value_number'], name='api_afv_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetfieldvalue',
+            index=models.Index(fields=['field_definition', 'value_date'], name='api_afv_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetfieldvalue',
+            index=models.Index(fields=['field_definition', 'value_text'], name='api_afv_text_idx'),
+        ),
+        migrations.RunPython(fill_typed_values, migrations.RunPython.noop),
+    ]
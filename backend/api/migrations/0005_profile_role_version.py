@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_assetfieldvalue_typed_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='role_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
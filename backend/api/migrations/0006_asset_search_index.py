@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Cópia local da criação e da carga do índice de api/search.py, para que a
+# migração não dependa do código atual do módulo.
+SEARCH_TABLE = 'api_asset_search'
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(content, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, content) "
+            "SELECT a.id, a.patrimonio || ' ' || COALESCE(GROUP_CONCAT(v.value, ' '), '') "
+            "FROM api_asset a LEFT JOIN api_assetfieldvalue v ON v.asset_id = a.id GROUP BY a.id"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "asset_id bigint PRIMARY KEY REFERENCES api_asset(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)"
+        )
+        # Sem remoção de acentos aqui: a 0014 recria os documentos já normalizados.
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (asset_id, document) "
+            "SELECT a.id, to_tsvector('simple', a.patrimonio || ' ' || COALESCE(STRING_AGG(v.value, ' '), '')) "
+            "FROM api_asset a LEFT JOIN api_assetfieldvalue v ON v.asset_id = a.id GROUP BY a.id"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_profile_role_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_existing_assets(apps, schema_editor):
+    Asset = apps.get_model('api', 'Asset')
+    AssetStatusCount = apps.get_model('api', 'AssetStatusCount')
+    totals = Asset.objects.values('category_id', 'status').annotate(total=models.Count('id')).order_by()
+    AssetStatusCount.objects.bulk_create([
+        AssetStatusCount(category_id=row['category_id'], status=row['status'], count=row['total'])
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_asset_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('disponivel', 'Disponível'), ('em_uso', 'Em Uso'), ('manutencao', 'Em Manutenção'), ('inativo', 'Inativo/Descartado')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counts', to='api.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'status'), name='api_status_count_unique')],
+            },
+        ),
+        migrations.RunPython(count_existing_assets, migrations.RunPython.noop),
+    ]
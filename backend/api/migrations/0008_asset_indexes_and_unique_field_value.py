@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_field_values(apps, schema_editor):
+    # Antes da restrição única, mantém só o primeiro valor de cada (ativo, campo).
+    AssetFieldValue = apps.get_model('api', 'AssetFieldValue')
+    keep = (
+        AssetFieldValue.objects.values('asset_id', 'field_definition_id')
+        .annotate(first_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in keep.iterator():
+        AssetFieldValue.objects.filter(
+            asset_id=row['asset_id'], field_definition_id=row['field_definition_id']
+        ).exclude(id=row['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_assetstatuscount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_field_values, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['category', 'status', 'created_at'], name='api_asset_cat_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='api_asset_cat_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='assetfieldvalue',
+            constraint=models.UniqueConstraint(fields=('asset', 'field_definition'), name='api_afv_asset_field_unique'),
+        ),
+    ]
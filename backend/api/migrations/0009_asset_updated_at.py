@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Ativos já existentes passam a ter sido "alterados" quando foram criados.
+    Asset = apps.get_model('api', 'Asset')
+    Asset.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_asset_indexes_and_unique_field_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_asset_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.BigIntegerField()),
+                ('category_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Criado/alterado'), ('delete', 'Removido')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category_id', 'id'], name='api_change_cat_id')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+
+
+def backfill_field_snapshot(apps, schema_editor):
+    # Monta o snapshot dos ativos existentes a partir de AssetFieldValue, em
+    # lotes. A lógica fica aqui (e não em api.snapshots) para a migração não
+    # mudar quando o código do app mudar.
+    Asset = apps.get_model('api', 'Asset')
+    AssetFieldValue = apps.get_model('api', 'AssetFieldValue')
+    last_id = 0
+    while True:
+        asset_ids = list(Asset.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:CHUNK_SIZE])
+        if not asset_ids:
+            return
+        snapshots = {asset_id: {} for asset_id in asset_ids}
+        rows = AssetFieldValue.objects.filter(asset_id__in=asset_ids).order_by('id').values_list(
+            'asset_id', 'field_definition_id', 'value'
+        )
+        for asset_id, field_id, value in rows:
+            snapshots[asset_id][str(field_id)] = value
+        Asset.objects.bulk_update(
+            [Asset(id=asset_id, field_snapshot=snapshot) for asset_id, snapshot in snapshots.items()],
+            ['field_snapshot'],
+        )
+        last_id = asset_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_assetchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='field_snapshot',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_field_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+import unicodedata
+
+from django.db import migrations
+
+SEARCH_TABLE = 'api_asset_search'
+BATCH_SIZE = 500
+
+
+def fold_accents(text):
+    # Cópia local de api.search.fold_accents.
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def refold_documents(apps, schema_editor):
+    # No PostgreSQL os documentos passam a ser gravados sem acentos (como o
+    # FTS5 do SQLite já faz): regrava os existentes. No SQLite nada muda.
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    Asset = apps.get_model('api', 'Asset')
+    AssetFieldValue = apps.get_model('api', 'AssetFieldValue')
+    last_id = 0
+    while True:
+        assets = list(Asset.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'patrimonio')[:BATCH_SIZE])
+        if not assets:
+            return
+        documents = {asset_id: [patrimonio] for asset_id, patrimonio in assets}
+        for asset_id, value in AssetFieldValue.objects.filter(asset_id__in=list(documents)).values_list(
+            'asset_id', 'value'
+        ):
+            documents[asset_id].append(value)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {SEARCH_TABLE} SET document = to_tsvector('simple', %s) WHERE asset_id = %s",
+                [(fold_accents(' '.join(parts)), asset_id) for asset_id, parts in documents.items()],
+            )
+        last_id = assets[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(refold_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_search_fold_accents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assetchange',
+            index=models.Index(fields=['changed_at'], name='api_change_changed_at'),
+        ),
+    ]
@@ -1,11 +1,36 @@
+from datetime import date, timedelta
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.utils import timezone
 from django.dispatch import receiver
 
+from . import caching, search, snapshots
+
+class SoftDeleteManager(models.Manager):
+    """Esconde as linhas excluídas logicamente (`deleted_at` preenchido), que aguardam o expurgo em api/purge.py."""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Category(models.Model):
-    name = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="categories")
+    # Preenchido ao excluir: a categoria some das consultas na hora e os ativos
+    # dela são apagados depois, em lotes, por uma tarefa em segundo plano.
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            # O nome de uma categoria excluída (ainda não expurgada) pode ser reutilizado.
+            models.UniqueConstraint(fields=['name'], condition=models.Q(deleted_at__isnull=True),
+                                    name='api_category_name_unique'),
+        ]
+
     def __str__(self): return self.name
 
 class FieldDefinition(models.Model):
@@ -13,8 +38,19 @@ class FieldDefinition(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='field_definitions')
     name = models.CharField(max_length=100)
     field_type = models.CharField(max_length=20, choices=FIELD_TYPE_CHOICES, default='text')
+    # Exclusão lógica, como em Category: os valores do campo são expurgados em lotes.
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     def __str__(self): return f"{self.category.name} - {self.name}"
 
+class AssetQuerySet(models.QuerySet):
+    def visible(self):
+        """Sem os ativos de categorias excluídas que ainda aguardam o expurgo."""
+        return self.exclude(category_id__in=Category.all_objects.filter(deleted_at__isnull=False).values('id'))
+
 class Asset(models.Model):
 
     STATUS_CHOICES = [
@@ -28,16 +64,255 @@ class Asset(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='assets')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assets")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Atualizado a cada gravação do ativo (inclusive quando só os valores dos campos mudam).
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disponivel')
+    # Cópia de {field_definition_id: valor} dos AssetFieldValue, lida pela API sem
+    # juntar a tabela de valores (ver api/snapshots.py e check_field_snapshots).
+    field_snapshot = models.JSONField(default=dict, blank=True)
+
+    objects = AssetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Listagem por categoria filtrada por status, em ordem de criação.
+            models.Index(fields=['category', 'status', 'created_at'], name='api_asset_cat_status_created'),
+            # Listagem por categoria paginada por (created_at, id): o índice já entrega a ordem.
+            models.Index(fields=['category', 'created_at', 'id'], name='api_asset_cat_created'),
+        ]
 
     def __str__(self): return self.patrimonio
 
+def parse_typed_value(field_type, raw):
+    """
+    Converte o valor digitado (sempre texto) para o tipo do campo.
+    Retorna (numero, data, texto); só um deles é preenchido, e valores que não
+    puderem ser convertidos ficam como None (o texto original é preservado em `value`).
+    """
+    raw = (raw or '').strip()
+    if field_type == 'number':
+        try:
+            return float(raw.replace(',', '.')), None, None
+        except ValueError:
+            return None, None, None
+    if field_type == 'date':
+        try:
+            return None, date.fromisoformat(raw), None
+        except ValueError:
+            return None, None, None
+    # Textos longos demais não entram no índice; filtros de igualdade usam `value`.
+    if len(raw) <= AssetFieldValue.TEXT_INDEX_LENGTH:
+        return None, None, raw
+    return None, None, None
+
 class AssetFieldValue(models.Model):
+    TEXT_INDEX_LENGTH = 255
+
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='field_values')
     field_definition = models.ForeignKey(FieldDefinition, on_delete=models.CASCADE)
     value = models.TextField()
+    # Cópias tipadas de `value`, preenchidas conforme `field_definition.field_type`,
+    # para que filtros como "voltagem > 200" sejam resolvidos pelo índice do banco.
+    value_number = models.FloatField(null=True, blank=True)
+    value_date = models.DateField(null=True, blank=True)
+    value_text = models.CharField(max_length=TEXT_INDEX_LENGTH, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Um valor por campo em cada ativo; o índice também atende as leituras por (asset, campo).
+            models.UniqueConstraint(fields=['asset', 'field_definition'], name='api_afv_asset_field_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['field_definition', 'value_number'], name='api_afv_number_idx'),
+            models.Index(fields=['field_definition', 'value_date'], name='api_afv_date_idx'),
+            models.Index(fields=['field_definition', 'value_text'], name='api_afv_text_idx'),
+        ]
+
     def __str__(self): return f"{self.asset.patrimonio} - {self.field_definition.name}: {self.value}"
 
+    def fill_typed_values(self, field_type=None):
+        # `field_type` pode ser informado para evitar buscar a FieldDefinition (ex.: bulk_create).
+        if field_type is None:
+            field_type = self.field_definition.field_type
+        self.value_number, self.value_date, self.value_text = parse_typed_value(field_type, self.value)
+
+    def save(self, *args, **kwargs):
+        self.fill_typed_values()
+        super().save(*args, **kwargs)
+
+class AssetStatusCount(models.Model):
+    """
+    Resumo materializado: quantidade de ativos por (categoria, status).
+    Mantido de forma incremental pelos signals de Asset abaixo e pelas
+    escritas em massa; `rebuild_asset_stats` recalcula tudo do zero.
+    """
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='status_counts')
+    status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'status'], name='api_status_count_unique'),
+        ]
+
+    def __str__(self): return f"{self.category_id} - {self.status}: {self.count}"
+
+    @classmethod
+    def bump(cls, category_id, status, delta):
+        if not delta:
+            return
+        updated = cls.objects.filter(category_id=category_id, status=status).update(
+            count=models.F('count') + delta
+        )
+        if not updated and delta > 0:
+            counter, created = cls.objects.get_or_create(
+                category_id=category_id, status=status, defaults={'count': delta}
+            )
+            if not created:
+                cls.objects.filter(pk=counter.pk).update(count=models.F('count') + delta)
+
+    @classmethod
+    def rebuild(cls):
+        """Recalcula todos os contadores a partir da tabela de ativos."""
+        totals = Asset.objects.values('category_id', 'status').annotate(total=models.Count('id')).order_by()
+        cls.objects.all().delete()
+        cls.objects.bulk_create([
+            cls(category_id=row['category_id'], status=row['status'], count=row['total'])
+            for row in totals
+        ])
+        return len(totals)
+
+class AssetChange(models.Model):
+    """
+    Registro das alterações em ativos, base do feed /api/assets/changes/.
+
+    O `id` crescente é o token de sincronização: o cliente pede o que mudou
+    depois do último id que recebeu. Como os ids são reservados no INSERT e
+    só ficam visíveis no commit (no PostgreSQL, fora de ordem), o feed só
+    avança até `settled_until`. Guarda apenas ids (sem chave
+    estrangeira) para que as remoções continuem registradas depois que o
+    ativo ou a categoria deixam de existir. Mover um ativo de categoria gera
+    uma remoção na antiga e uma alteração na nova.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [(UPSERT, 'Criado/alterado'), (DELETE, 'Removido')]
+
+    asset_id = models.BigIntegerField()
+    category_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Feed filtrado por categoria, lido em ordem de id.
+            models.Index(fields=['category_id', 'id'], name='api_change_cat_id'),
+            # Alterações recentes, procuradas por settled_until.
+            models.Index(fields=['changed_at'], name='api_change_changed_at'),
+        ]
+
+    def __str__(self): return f"{self.id}: {self.action} {self.asset_id}"
+
+    @classmethod
+    def record(cls, action, category_id, asset_ids):
+        cls.objects.bulk_create([
+            cls(asset_id=asset_id, category_id=category_id, action=action) for asset_id in asset_ids
+        ])
+
+    @classmethod
+    def latest_token(cls):
+        last = cls.objects.aggregate(last=models.Max('id'))['last'] or 0
+        return cls.settled_until(0, last)
+
+    @classmethod
+    def settled_until(cls, since, until):
+        """
+        Maior id h em [since, until] tal que nenhum id em (since, h] ainda pode
+        aparecer. Um id que falta logo abaixo de uma alteração recente (menos de
+        API_CHANGES_SETTLE_SECONDS) pode ser de uma transação ainda aberta; os
+        buracos mais antigos são rollbacks e não seguram o feed.
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.API_CHANGES_SETTLE_SECONDS)
+        recent = list(cls.objects.filter(id__gt=since, id__lte=until, changed_at__gte=cutoff).order_by(
+            'id'
+        ).values_list('id', flat=True))
+        present = set(recent)
+        for change_id in recent:
+            missing = change_id - 1
+            if missing <= since or missing in present or cls.objects.filter(id=missing).exists():
+                continue
+            below = cls.objects.filter(id__gt=since, id__lt=missing).aggregate(last=models.Max('id'))['last']
+            return below or since
+        return until
+
+class Job(models.Model):
+    """
+    Tarefa longa (importação, exportação, alteração em lote) executada fora
+    da requisição pelo comando `run_jobs` (ver api/jobs.py). A própria tabela
+    é a fila: não há broker externo.
+    """
+    ASSET_IMPORT = 'asset_import'
+    ASSET_EXPORT = 'asset_export'
+    ASSET_BATCH = 'asset_batch'
+    PURGE = 'purge'
+    KIND_CHOICES = [
+        (ASSET_IMPORT, 'Importação de ativos'),
+        (ASSET_EXPORT, 'Exportação de ativos'),
+        (ASSET_BATCH, 'Alteração de ativos em lote'),
+        (PURGE, 'Expurgo de categoria/campo excluído'),
+    ]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Em execução'),
+        (SUCCEEDED, 'Concluída'),
+        (FAILED, 'Falhou'),
+        (CANCELLED, 'Cancelada'),
+    ]
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # Itens processados / total (None quando o total não é conhecido de antemão).
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Só é retirada da fila a partir deste instante (espera entre tentativas).
+    run_after = models.DateTimeField(default=timezone.now)
+    cancel_requested = models.BooleanField(default=False)
+    # Worker que pegou a tarefa e o último sinal de vida dele.
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', blank=True)
+    output_file = models.FileField(upload_to='jobs/output/', blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # O worker busca a próxima tarefa da fila pronta para rodar.
+            models.Index(fields=['status', 'run_after', 'id'], name='api_job_status_run_after'),
+        ]
+
+    def __str__(self): return f"{self.id}: {self.kind} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        return min(100, self.progress * 100 // self.total) if self.total else None
+
 class Profile(models.Model):
     ROLE_CHOICES = (
         ('viewer', 'Visualizador'),
@@ -49,12 +324,174 @@ class Profile(models.Model):
     secret_answer = models.CharField(max_length=128, blank=True, null=True)
     # Define o papel do usuário, com "Visualizador" como padrão.
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='viewer')
+    # Incrementado a cada troca de papel; tokens emitidos com uma versão antiga são recusados.
+    role_version = models.PositiveIntegerField(default=0)
+
+    ROLE_VERSION_CACHE_KEY = 'api:role_version:{}'
 
     def __str__(self):
         return f"{self.user.username} - {self.get_role_display()}"
 
+    def change_role(self, role):
+        self.role = role
+        self.role_version += 1
+        self.save(update_fields=['role', 'role_version'])
+
+    @classmethod
+    def current_role_version(cls, user_id):
+        """
+        Versão atual do papel do usuário, lida do cache (o banco só é consultado
+        quando a entrada expira). Retorna None se o usuário não existe mais.
+        """
+        key = cls.ROLE_VERSION_CACHE_KEY.format(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls.objects.filter(user_id=user_id).values_list('role_version', flat=True).first()
+            if version is not None:
+                cache.set(key, version, settings.ROLE_VERSION_CACHE_TIMEOUT)
+        return version
+
+    @classmethod
+    async def acurrent_role_version(cls, user_id):
+        """Igual a `current_role_version`, para o caminho assíncrono."""
+        key = cls.ROLE_VERSION_CACHE_KEY.format(user_id)
+        version = await cache.aget(key)
+        if version is None:
+            version = await cls.objects.filter(user_id=user_id).values_list('role_version', flat=True).afirst()
+            if version is not None:
+                await cache.aset(key, version, settings.ROLE_VERSION_CACHE_TIMEOUT)
+        return version
+
 # Este "signal" garante que um Profile seja criado automaticamente sempre que um novo User for registrado
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+# Mantém o cache de versões de papel em dia (ver Profile.current_role_version).
+@receiver(post_save, sender=Profile)
+def cache_role_version(sender, instance, **kwargs):
+    cache.set(
+        Profile.ROLE_VERSION_CACHE_KEY.format(instance.user_id),
+        instance.role_version,
+        settings.ROLE_VERSION_CACHE_TIMEOUT,
+    )
+
+@receiver(post_delete, sender=Profile)
+def forget_role_version(sender, instance, **kwargs):
+    cache.delete(Profile.ROLE_VERSION_CACHE_KEY.format(instance.user_id))
+
+# Desativar (ou reativar) um usuário também revoga os tokens já emitidos: a
+# autenticação JWT não consulta User, só a versão do papel.
+@receiver(pre_save, sender=User)
+def load_user_is_active(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'is_active' not in update_fields):
+        instance._was_active = None
+    else:
+        instance._was_active = User.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_deactivation(sender, instance, created, **kwargs):
+    was_active = getattr(instance, '_was_active', None)
+    if was_active is not None and was_active != instance.is_active:
+        Profile.objects.filter(user=instance).update(role_version=models.F('role_version') + 1)
+        cache.delete(Profile.ROLE_VERSION_CACHE_KEY.format(instance.pk))
+
+# Mantém o índice de busca textual atualizado (ver api/search.py).
+@receiver(post_save, sender=Asset)
+def index_asset(sender, instance, **kwargs):
+    search.schedule_reindex(instance.pk)
+
+@receiver(post_delete, sender=Asset)
+def unindex_asset(sender, instance, **kwargs):
+    search.remove_assets([instance.pk])
+
+@receiver(post_save, sender=AssetFieldValue)
+@receiver(post_delete, sender=AssetFieldValue)
+def reindex_field_value_asset(sender, instance, **kwargs):
+    search.schedule_reindex(instance.asset_id)
+
+# Valores gravados ou apagados um a um (admin, shell) também chegam ao
+# snapshot do ativo (ver snapshots.write_value). O AssetSerializer já monta o
+# snapshot antes de gravar os valores, então ali nada muda.
+@receiver(post_save, sender=AssetFieldValue)
+def snapshot_field_value(sender, instance, **kwargs):
+    snapshots.write_value(instance.asset_id, instance.field_definition_id, instance.value)
+
+@receiver(post_delete, sender=AssetFieldValue)
+def unsnapshot_field_value(sender, instance, origin=None, **kwargs):
+    # Na exclusão em cascata de um ativo ou campo, quem apaga cuida do snapshot.
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is AssetFieldValue:
+        snapshots.write_value(instance.asset_id, instance.field_definition_id, remove=True)
+
+# Mantém AssetStatusCount em dia. O par (categoria, status) lido do banco é
+# guardado no post_init para saber, no post_save, de qual contador descontar.
+@receiver(post_init, sender=Asset)
+def remember_asset_stats_key(sender, instance, **kwargs):
+    loaded = instance.pk and 'status' in instance.__dict__ and 'category_id' in instance.__dict__
+    instance._stats_key = (instance.category_id, instance.status) if loaded else None
+
+@receiver(pre_save, sender=Asset)
+def load_asset_stats_key(sender, instance, **kwargs):
+    # Instâncias carregadas com only()/defer() não têm o par original: busca no banco.
+    if not instance._state.adding and getattr(instance, '_stats_key', None) is None:
+        instance._stats_key = Asset.objects.filter(pk=instance.pk).values_list('category_id', 'status').first()
+
+# Alimenta o feed de alterações (AssetChange), de onde sai também a marca d'água
+# das listagens. Precisa rodar antes de count_asset, que troca `_stats_key`.
+@receiver(post_save, sender=Asset)
+def log_saved_asset(sender, instance, created, **kwargs):
+    previous = None if created else getattr(instance, '_stats_key', None)
+    if previous and previous[0] != instance.category_id:
+        AssetChange.record(AssetChange.DELETE, previous[0], [instance.pk])
+    AssetChange.record(AssetChange.UPSERT, instance.category_id, [instance.pk])
+
+@receiver(post_delete, sender=Asset)
+def log_deleted_asset(sender, instance, **kwargs):
+    AssetChange.record(AssetChange.DELETE, instance.category_id, [instance.pk])
+
+@receiver(post_save, sender=Asset)
+def count_asset(sender, instance, created, **kwargs):
+    key = (instance.category_id, instance.status)
+    previous = None if created else getattr(instance, '_stats_key', None)
+    if previous != key:
+        if previous is not None:
+            AssetStatusCount.bump(*previous, -1)
+        AssetStatusCount.bump(*key, 1)
+    instance._stats_key = key
+
+@receiver(post_delete, sender=Asset)
+def uncount_asset(sender, instance, **kwargs):
+    AssetStatusCount.bump(instance.category_id, instance.status, -1)
+
+# Invalida as respostas em cache do esquema da categoria (ver api/caching.py).
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    caching.invalidate_category(instance.pk)
+
+@receiver(post_save, sender=FieldDefinition)
+@receiver(post_delete, sender=FieldDefinition)
+def invalidate_field_definition_cache(sender, instance, **kwargs):
+    caching.invalidate_category(instance.category_id)
+
+# Apagar um campo apaga os valores dele em cascata (sem passar pelo ativo):
+# marca os ativos afetados como alterados para os ETags deixarem de valer.
+@receiver(pre_delete, sender=FieldDefinition)
+def touch_field_definition_assets(sender, instance, **kwargs):
+    affected = list(Asset.objects.filter(field_values__field_definition=instance).only('id', 'field_snapshot'))
+    AssetChange.record(AssetChange.UPSERT, instance.category_id, [asset.id for asset in affected])
+    # Tira o campo do snapshot junto com a marca de alteração.
+    now, key = timezone.now(), str(instance.pk)
+    for asset in affected:
+        asset.field_snapshot.pop(key, None)
+        asset.updated_at = now
+    Asset.objects.bulk_update(affected, ['field_snapshot', 'updated_at'], batch_size=1000)
+
+# Os arquivos de uma tarefa saem do disco junto com ela.
+@receiver(post_delete, sender=Job)
+def delete_job_files(sender, instance, **kwargs):
+    for file in (instance.input_file, instance.output_file):
+        if file:
+            file.delete(save=False)
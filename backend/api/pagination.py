@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) sobre uma ordenação composta.
+
+    O cursor guarda os valores de TODOS os campos da ordenação do último (ou
+    primeiro) item da página, e a página seguinte é obtida com um filtro
+    `(a, b) > (x, y)`. Diferente de OFFSET, o banco não precisa percorrer as
+    linhas das páginas anteriores, então a página 1000 custa o mesmo que a 1.
+
+    A view define a ordenação em `cursor_ordering`; o último campo deve ser
+    único (normalmente `id`) para desempatar registros com o mesmo valor.
+    """
+    page_size_query_param = 'page_size'
+    # Limite rígido: nenhum cliente consegue pedir mais do que isso por página.
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        return self._finish_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão para views assíncronas: a página é lida com o ORM assíncrono."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        return self._finish_page([obj async for obj in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor['reverse'])
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if self.cursor:
+            queryset = queryset.filter(self._keyset_filter(self.cursor['position'], reverse))
+        # Busca um item a mais apenas para saber se existe outra página.
+        return queryset[:self.page_size + 1]
+
+    def _finish_page(self, results):
+        reverse = bool(self.cursor and self.cursor['reverse'])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Página vazia (ex.: itens removidos): volta para o início da listagem.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._build_link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            values = [
+                self.model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, position)
+            ]
+            return {'position': values, 'reverse': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, binascii.Error, FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        position = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in cursor['position']
+        ]
+        payload = {'p': position}
+        if cursor['reverse']:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    # --- Auxiliares internos ---
+
+    def _build_link(self, instance, reverse):
+        position = [getattr(instance, name.lstrip('-')) for name in self.ordering]
+        return self.encode_cursor({'position': position, 'reverse': reverse})
+
+    def _order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def _keyset_filter(self, position, reverse):
+        # Expande (a, b, c) > (x, y, z) em:
+        #   a > x OU (a = x E b > y) OU (a = x E b = y E c > z)
+        # respeitando a direção (asc/desc) de cada campo.
+        keyset = Q()
+        equal_prefix = Q()
+        for name, value in zip(self.ordering, position):
+            descending = name.startswith('-') != reverse
+            field = name.lstrip('-')
+            lookup = 'lt' if descending else 'gt'
+            keyset |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+            equal_prefix &= Q(**{field: value})
+        return keyset
@@ -1,11 +1,24 @@
 from rest_framework import permissions
+from rest_framework_simplejwt.models import TokenUser
+
+
+def get_role(user):
+    """
+    Papel do usuário autenticado. Com JWT o papel já vem no token;
+    nas sessões (admin, browsable API) ele é lido do Profile.
+    """
+    if isinstance(user, TokenUser):
+        return user.role
+    profile = getattr(user, 'profile', None)
+    return profile.role if profile else None
+
 
 class IsAdminUser(permissions.BasePermission):
     """
     Permite acesso apenas a usuários administradores.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.profile.role == 'admin'
+        return request.user and request.user.is_authenticated and get_role(request.user) == 'admin'
 
 class IsAdminOrEditorUser(permissions.BasePermission):
     """
@@ -14,4 +27,4 @@ class IsAdminOrEditorUser(permissions.BasePermission):
     def has_permission(self, request, view):
         if not (request.user and request.user.is_authenticated):
             return False
-        return request.user.profile.role in ['admin', 'editor']
\ No newline at end of file
+        return get_role(request.user) in ['admin', 'editor']
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Profiling das requisições, ligado com DJANGO_API_PROFILING=1.
+
+Para cada requisição o middleware mede o tempo total, a quantidade e o
+tempo das consultas SQL e o tamanho da resposta, agrupados pelo nome da
+rota (`asset-list`, `category-detail`, `field-definition-list`...). Os
+números ficam em histogramas na memória do processo e são expostos no
+formato do Prometheus em /api/metrics/ (somente administradores).
+
+Requisições acima de API_SLOW_REQUEST_MS são registradas no logger
+`api.profiling`, com o SQL executado.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('api.profiling')
+
+# SQL guardado por requisição para o log de lentidão.
+MAX_LOGGED_QUERIES = 50
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Histograma cumulativo no estilo do Prometheus, com um conjunto de contadores por rótulo."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0, 'count': 0}
+            series['buckets'][bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+                total = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series['buckets']):
+                    total += count
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {total}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label_text}}} {series["count"]}')
+        return lines
+
+
+REQUEST_DURATION = Histogram('api_request_duration_seconds', 'Tempo total da requisição.', DURATION_BUCKETS)
+DB_QUERIES = Histogram('api_request_db_queries', 'Consultas SQL por requisição.', QUERY_BUCKETS)
+DB_DURATION = Histogram('api_request_db_duration_seconds', 'Tempo gasto no banco por requisição.', DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram('api_response_size_bytes', 'Tamanho do corpo da resposta.', SIZE_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, RESPONSE_SIZE)
+
+
+def render_metrics():
+    return '\n'.join(line for histogram in HISTOGRAMS for line in histogram.render()) + '\n'
+
+
+def reset_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+class QueryRecorder:
+    """`execute_wrapper` que conta e cronometra as consultas (funciona também com DEBUG=False)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+# Equivalentes a entrar e sair de `connection.execute_wrapper`, chamados na
+# thread onde a conexão será usada.
+def install_recorder(recorder):
+    connection.execute_wrappers.append(recorder)
+
+
+def remove_recorder(recorder):
+    connection.execute_wrappers.remove(recorder)
+
+
+class RequestProfilingMiddleware:
+    """
+    Middleware híbrido: no ASGI as views assíncronas (api/async_views.py)
+    continuam assíncronas em vez de passarem por uma thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'API_SLOW_REQUEST_MS', 500) / 1000
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # O ORM assíncrono executa as consultas na thread das chamadas
+        # sync_to_async (thread_sensitive), com a conexão daquela thread: o
+        # recorder é instalado e removido lá, não na thread do event loop.
+        await sync_to_async(install_recorder)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_recorder)(recorder)
+        self.observe(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    def observe(self, request, response, elapsed, recorder):
+        match = request.resolver_match
+        labels = (('method', request.method), ('view', match.url_name if match and match.url_name else 'unresolved'))
+        REQUEST_DURATION.observe(labels, elapsed)
+        DB_QUERIES.observe(labels, recorder.count)
+        DB_DURATION.observe(labels, recorder.duration)
+        # Respostas em streaming (exportação) não têm tamanho conhecido aqui.
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
+
+        if elapsed >= self.slow_threshold:
+            logger.warning(
+                'Requisição lenta: %s %s (%s) %.0f ms, %d consultas em %.0f ms\n%s',
+                request.method, request.get_full_path(), labels[1][1], elapsed * 1000,
+                recorder.count, recorder.duration * 1000,
+                '\n'.join(f'  [{query_time * 1000:.1f} ms] {sql}' for query_time, sql in recorder.queries),
+            )
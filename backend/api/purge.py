@@ -0,0 +1,172 @@
+"""
+Exclusão de categorias e campos em duas etapas.
+
+Com `on_delete=CASCADE`, apagar uma categoria pelo ORM faria o Django
+carregar em memória todos os ativos e valores dela e apagá-los em uma única
+transação, travando o banco por minutos em categorias grandes. Aqui a
+exclusão apenas marca `deleted_at` (a linha some das consultas na hora, ver
+SoftDeleteManager e AssetQuerySet.visible; um campo também sai do snapshot
+dos ativos e da busca, em lotes, ainda na requisição) e agenda uma tarefa
+`purge` que apaga as linhas dependentes com DELETEs diretos, em lotes de tamanho fixo,
+cada um na sua transação e com uma pausa entre eles para que as outras
+escritas não fiquem esperando. Com PURGE_IN_BACKGROUND desligado (instalação
+sem worker), `purge_now` faz o mesmo expurgo em lotes na própria requisição.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .batch import raw_delete
+from .models import Asset, AssetChange, AssetFieldValue, AssetStatusCount, Category, FieldDefinition, Job
+
+CATEGORY = 'category'
+FIELD_DEFINITION = 'field_definition'
+
+
+def target_of(instance):
+    return CATEGORY if isinstance(instance, Category) else FIELD_DEFINITION
+
+
+def mark_deleted(instance):
+    instance.deleted_at = timezone.now()
+    # O post_save invalida as respostas em cache da categoria.
+    instance.save(update_fields=['deleted_at'])
+
+
+def schedule_purge(instance, user_id=None):
+    """Exclui logicamente a categoria ou o campo e agenda o expurgo. Retorna o Job."""
+    from . import jobs
+
+    with transaction.atomic():
+        mark_deleted(instance)
+        job = jobs.enqueue(Job.PURGE, {'target': target_of(instance), 'id': instance.pk}, user_id)
+    if target_of(instance) == FIELD_DEFINITION:
+        # Se a requisição cair no meio, o expurgo termina de tirar o campo dos snapshots.
+        hide_field_values(instance.pk, instance.category_id)
+    return job
+
+
+def purge_now(instance):
+    """Exclui logicamente e expurga em seguida, sem o worker. Se falhar no meio, `purge_deleted` termina."""
+    with transaction.atomic():
+        mark_deleted(instance)
+    return purge(target_of(instance), instance.pk)
+
+
+def pause():
+    if settings.PURGE_CHUNK_PAUSE:
+        time.sleep(settings.PURGE_CHUNK_PAUSE)
+
+
+def strip_field(field_id, category_id, asset_ids):
+    """
+    Tira o campo do snapshot (e da busca) dos ativos que ainda o têm, marcando-os
+    como alterados para o feed e os ETags. Chamar dentro de uma transação.
+    """
+    key = str(field_id)
+    affected = [
+        asset for asset in Asset.objects.select_for_update().filter(id__in=asset_ids).only('id', 'field_snapshot')
+        if key in asset.field_snapshot
+    ]
+    now = timezone.now()
+    for asset in affected:
+        del asset.field_snapshot[key]
+        asset.updated_at = now
+    Asset.objects.bulk_update(affected, ['field_snapshot', 'updated_at'])
+    changed = [asset.id for asset in affected]
+    search.reindex_assets(changed)
+    AssetChange.record(AssetChange.UPSERT, category_id, changed)
+
+
+def hide_field_values(field_id, category_id, chunk_size=None):
+    """Tira o campo excluído dos snapshots em lotes, antes do expurgo dos valores."""
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    asset_ids = AssetFieldValue.objects.filter(field_definition_id=field_id).order_by('asset_id').values_list(
+        'asset_id', flat=True
+    )
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(asset_ids.filter(asset_id__gt=last_id)[:chunk_size])
+            if not ids:
+                return
+            strip_field(field_id, category_id, ids)
+        last_id = ids[-1]
+        pause()
+
+
+def purge_category(category_id, on_progress=None, chunk_size=None):
+    """Apaga os ativos (e valores) da categoria excluída em lotes e, por fim, a própria categoria."""
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    category = Category.all_objects.filter(pk=category_id, deleted_at__isnull=False).first()
+    if category is None:
+        return {'deleted_assets': 0}
+
+    assets = Asset.objects.filter(category_id=category_id).order_by('id')
+    total, done = assets.count(), 0
+    while True:
+        with transaction.atomic():
+            ids = list(assets.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            # Sem signals: o feed de alterações e a busca são atualizados aqui.
+            raw_delete(AssetFieldValue, 'asset_id', ids)
+            raw_delete(Asset, 'id', ids)
+            search.remove_assets(ids)
+            AssetChange.record(AssetChange.DELETE, category_id, ids)
+        done += len(ids)
+        if on_progress:
+            on_progress(done, max(total, done))
+        pause()
+
+    with transaction.atomic():
+        AssetStatusCount.objects.filter(category_id=category_id).delete()
+        FieldDefinition.all_objects.filter(category_id=category_id).delete()
+        category.delete()
+    return {'deleted_assets': done}
+
+
+def purge_field_definition(field_id, on_progress=None, chunk_size=None):
+    """Apaga os valores do campo excluído em lotes, tirando-o do snapshot dos ativos, e depois o campo."""
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    field = FieldDefinition.all_objects.filter(pk=field_id, deleted_at__isnull=False).first()
+    if field is None:
+        return {'deleted_values': 0}
+
+    values = AssetFieldValue.objects.filter(field_definition_id=field_id).order_by('id')
+    total, done = values.count(), 0
+    while True:
+        with transaction.atomic():
+            rows = list(values.values_list('id', 'asset_id')[:chunk_size])
+            if not rows:
+                break
+            raw_delete(AssetFieldValue, 'id', [value_id for value_id, _ in rows])
+            # Normalmente a exclusão já tirou o campo dos snapshots; aqui só sobra
+            # o que ela não chegou a fazer.
+            strip_field(field_id, field.category_id, [asset_id for _, asset_id in rows])
+        done += len(rows)
+        if on_progress:
+            on_progress(done, max(total, done))
+        pause()
+
+    # Sem valores restantes, a exclusão pelo ORM não tem o que carregar.
+    field.delete()
+    return {'deleted_values': done}
+
+
+def purge(target, object_id, on_progress=None, chunk_size=None):
+    function = purge_category if target == CATEGORY else purge_field_definition
+    return function(object_id, on_progress, chunk_size)
+
+
+def pending():
+    """Categorias e campos excluídos que ainda não foram expurgados, como pares (alvo, id)."""
+    return [
+        *((CATEGORY, pk) for pk in Category.all_objects.filter(deleted_at__isnull=False).values_list('id', flat=True)),
+        *((FIELD_DEFINITION, pk) for pk in FieldDefinition.all_objects.filter(
+            deleted_at__isnull=False
+        ).values_list('id', flat=True)),
+    ]
@@ -0,0 +1,55 @@
+"""
+Renderer e parser JSON do DRF baseados no orjson.
+
+O orjson serializa as listas de ativos várias vezes mais rápido que o
+`json` da biblioteca padrão usado pelo JSONRenderer. A saída é a mesma do
+renderer do DRF (UTF-8, sem espaços): tipos que o orjson não conhece
+(Decimal, strings traduzíveis, datas...) passam pelo mesmo encoder do DRF.
+Sem o orjson instalado, as duas classes se comportam exatamente como as
+originais do DRF.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datas vão para o encoder do DRF para sair no mesmo formato (ex.: "Z" em UTC).
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        options = ORJSON_OPTIONS
+        # O orjson só indenta com 2 espaços; qualquer indent pedido vira 2.
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self.encoder_class().default, option=options)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        # O orjson só lê UTF-8; outros charsets ficam com o parser do DRF.
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def dumps(data):
+    """JSON em bytes no formato das respostas da API (usado fora das views do DRF)."""
+    return ORJSONRenderer().render(data)
@@ -0,0 +1,175 @@
+"""
+Índice invertido para a busca textual de ativos (`?q=` em /api/assets/).
+
+Cada ativo tem um documento com o patrimônio e todos os valores dos seus
+campos personalizados. O índice fica em uma tabela própria do banco:
+
+* SQLite: tabela virtual FTS5 `api_asset_search` (rowid = id do ativo);
+* PostgreSQL: tabela `api_asset_search` com coluna `tsvector` e índice GIN.
+
+Nos dois a busca ignora maiúsculas e acentos ("manutencao" encontra
+"Manutenção"): o FTS5 pelo tokenizer `remove_diacritics`, o PostgreSQL
+porque documentos e termos passam por `fold_accents` antes do
+`to_tsvector`/`to_tsquery` (a configuração 'simple' não tira acentos).
+
+Em outros bancos a busca cai para um `icontains`, sem índice.
+
+O índice é atualizado de forma incremental pelos signals de Asset e
+AssetFieldValue (em models.py). Escritas em massa usam `deferred_reindex`
+ou chamam `reindex_assets` diretamente.
+"""
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'api_asset_search'
+REINDEX_BATCH_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_state = threading.local()
+
+
+def fold_accents(text):
+    """Remove os acentos (o mesmo efeito do `remove_diacritics` do FTS5 nas letras latinas)."""
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def is_indexed():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+# --- Manutenção do índice ---
+
+def build_documents(asset_ids, asset_model=None, value_model=None):
+    """Monta {asset_id: texto} para os ativos informados (duas consultas por lote)."""
+    from .models import Asset, AssetFieldValue
+    asset_model = asset_model or Asset
+    value_model = value_model or AssetFieldValue
+
+    documents = {
+        asset_id: [patrimonio]
+        for asset_id, patrimonio in asset_model.objects.filter(id__in=asset_ids).values_list('id', 'patrimonio')
+    }
+    # Valores de campos excluídos (aguardando o expurgo) não entram na busca.
+    values = value_model.objects.filter(
+        asset_id__in=list(documents), field_definition__deleted_at__isnull=True
+    ).values_list('asset_id', 'value')
+    for asset_id, value in values:
+        documents[asset_id].append(value)
+    return {asset_id: ' '.join(parts) for asset_id, parts in documents.items()}
+
+
+def reindex_assets(asset_ids, asset_model=None, value_model=None):
+    """Atualiza (ou remove, se o ativo não existe mais) os documentos dos ativos."""
+    if not is_indexed():
+        return
+    asset_ids = list(asset_ids)
+    for start in range(0, len(asset_ids), REINDEX_BATCH_SIZE):
+        batch = asset_ids[start:start + REINDEX_BATCH_SIZE]
+        documents = build_documents(batch, asset_model, value_model)
+        removed = [asset_id for asset_id in batch if asset_id not in documents]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, content) VALUES (%s, %s)",
+                    list(documents.items()),
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (asset_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+                    "ON CONFLICT (asset_id) DO UPDATE SET document = EXCLUDED.document",
+                    [(asset_id, fold_accents(document)) for asset_id, document in documents.items()],
+                )
+            if removed:
+                remove_assets(removed, cursor)
+
+
+def remove_assets(asset_ids, cursor=None):
+    if not is_indexed() or not asset_ids:
+        return
+    key = 'rowid' if connection.vendor == 'sqlite' else 'asset_id'
+    sql = f"DELETE FROM {SEARCH_TABLE} WHERE {key} = %s"
+    params = [(asset_id,) for asset_id in asset_ids]
+    if cursor is not None:
+        cursor.executemany(sql, params)
+    else:
+        with connection.cursor() as own_cursor:
+            own_cursor.executemany(sql, params)
+
+
+def rebuild_index(chunk_size=REINDEX_BATCH_SIZE, asset_model=None, value_model=None):
+    """Recria o índice inteiro a partir das tabelas (migração e comando de manutenção)."""
+    from .models import Asset
+    asset_model = asset_model or Asset
+    if not is_indexed():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    total = 0
+    batch = []
+    for asset_id in asset_model.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        batch.append(asset_id)
+        if len(batch) >= chunk_size:
+            reindex_assets(batch, asset_model, value_model)
+            total += len(batch)
+            batch = []
+    if batch:
+        reindex_assets(batch, asset_model, value_model)
+        total += len(batch)
+    return total
+
+
+@contextmanager
+def deferred_reindex():
+    """
+    Adia a reindexação até o fim do bloco: cada ativo alterado dentro dele é
+    reindexado uma única vez, mesmo que vários valores de campo tenham mudado.
+    """
+    depth = getattr(_state, 'depth', 0)
+    if depth == 0:
+        _state.pending = set()
+    _state.depth = depth + 1
+    try:
+        yield
+        if depth == 0:
+            reindex_assets(_state.pending)
+    finally:
+        _state.depth = depth
+        if depth == 0:
+            _state.pending = None
+
+
+def schedule_reindex(asset_id):
+    if getattr(_state, 'depth', 0):
+        _state.pending.add(asset_id)
+    else:
+        reindex_assets([asset_id])
+
+
+# --- Consulta ---
+
+def search_assets(queryset, text):
+    """Filtra o queryset de ativos pelos termos de `text` (todos obrigatórios, por prefixo)."""
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return queryset
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,)
+        ))
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{fold_accents(token)}:*' for token in tokens)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT asset_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)", (tsquery,)
+        ))
+    # Sem índice: busca simples (lenta em bases grandes).
+    for token in tokens:
+        queryset = queryset.filter(Q(patrimonio__icontains=token) | Q(field_values__value__icontains=token))
+    return queryset.distinct()
@@ -2,8 +2,15 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Profile
 from django.contrib.auth.hashers import make_password
-from .models import Asset, Category, FieldDefinition, AssetFieldValue
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from django.db import transaction
+from .models import Asset, Category, FieldDefinition, AssetFieldValue, Job
+from . import search, snapshots
+from .batch import BATCH_MAX_IDS, DELETE, MOVE, SET_STATUS, raw_delete
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework.validators import UniqueValidator
 
 # Serializer antigo, pode ser usado para listar usuários se necessário no futuro
 class UserSerializer(serializers.ModelSerializer):
@@ -48,30 +55,108 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'owner', 'field_definitions']
-        extra_kwargs = {"owner": {"read_only": True}}
+        # A unicidade do nome vale só entre as categorias não excluídas (a
+        # constraint é condicional e o DRF não a valida sozinho).
+        extra_kwargs = {
+            "owner": {"read_only": True},
+            "name": {"validators": [UniqueValidator(queryset=Category.objects.all())]},
+        }
+
+class AssetFieldValueListSerializer(serializers.ListSerializer):
+    """
+    Lista de valores de campo de um ativo, lida de `Asset.field_snapshot`
+    (ver api/snapshots.py): a leitura não consulta a tabela de valores.
+    """
+
+    def get_attribute(self, instance):
+        field_defs = self.context.get('field_defs')
+        if field_defs == []:
+            # ?field_defs= vazio: o snapshot nem foi lido (ver AssetViewSet.for_reading).
+            return []
+        return snapshots.snapshot_items(instance.field_snapshot, field_defs)
+
+    def to_representation(self, data):
+        if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+            return data
+        return super().to_representation(data)
 
 class AssetFieldValueSerializer(serializers.ModelSerializer):
     class Meta:
         model = AssetFieldValue
         fields = ['field_definition', 'value']
+        list_serializer_class = AssetFieldValueListSerializer
 
 class AssetSerializer(serializers.ModelSerializer):
     field_values = AssetFieldValueSerializer(many=True)
 
     class Meta:
         model = Asset
-        fields = ['id', 'patrimonio', 'status', 'category', 'owner', 'created_at', 'field_values']
+        fields = ['id', 'patrimonio', 'status', 'category', 'owner', 'created_at', 'updated_at', 'field_values']
         extra_kwargs = {
             "owner": {"read_only": True},
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Sparse fieldset (?fields=, ver AssetViewSet.read_options): só os atributos pedidos.
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def to_columns(self, instances):
+        """
+        Layout colunar (?layout=columnar): um cabeçalho com os nomes das colunas
+        e uma lista de valores por coluna, em vez de um dict por ativo. Cada
+        campo personalizado vira a coluna `field_<id>` (null onde não há valor).
+        """
+        def represent(field, instance):
+            # Como em Serializer.to_representation: None não passa pelo campo.
+            attribute = field.get_attribute(instance)
+            return None if attribute is None else field.to_representation(attribute)
+
+        columns, values = [], []
+        for name, field in self.fields.items():
+            if name == 'field_values':
+                continue
+            columns.append(name)
+            values.append([represent(field, instance) for instance in instances])
+        if 'field_values' in self.fields:
+            field_defs = self.context.get('field_defs')
+            if field_defs is None:
+                field_defs = sorted({int(key) for instance in instances for key in instance.field_snapshot})
+            for field_id in field_defs:
+                key = str(field_id)
+                columns.append(f'field_{field_id}')
+                values.append([instance.field_snapshot.get(key) for instance in instances])
+        return {'columns': columns, 'values': values}
+
+    def validate_field_values(self, value):
+        # Cada campo só pode ter um valor por ativo (restrição única no banco).
+        definitions = [item['field_definition'].id for item in value]
+        if len(definitions) != len(set(definitions)):
+            raise serializers.ValidationError("O mesmo campo foi informado mais de uma vez.")
+        return value
+
+    # A transação mantém o ativo, seus valores e o índice de busca consistentes;
+    # deferred_reindex reindexa o ativo uma única vez ao final.
+    @transaction.atomic
     def create(self, validated_data):
         field_values_data = validated_data.pop('field_values', [])
-        asset = Asset.objects.create(**validated_data)
-        for field_value_data in field_values_data:
-            AssetFieldValue.objects.create(asset=asset, **field_value_data)
+        validated_data['field_snapshot'] = self.build_snapshot(field_values_data)
+        with search.deferred_reindex():
+            asset = Asset.objects.create(**validated_data)
+            # O snapshot já foi montado acima: bulk_create dispensa os signals de
+            # AssetFieldValue (o post_save do ativo já agendou a reindexação).
+            field_values = []
+            for field_value_data in field_values_data:
+                field_value = AssetFieldValue(asset=asset, **field_value_data)
+                field_value.fill_typed_values(field_value_data['field_definition'].field_type)
+                field_values.append(field_value)
+            AssetFieldValue.objects.bulk_create(field_values)
         return asset
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         # Remove os campos dinâmicos para tratar separadamente
         field_values_data = validated_data.pop('field_values', [])
@@ -80,43 +165,152 @@ class AssetSerializer(serializers.ModelSerializer):
         instance.status = validated_data.get('status', instance.status)
         instance.patrimonio = validated_data.get('patrimonio', instance.patrimonio)
         instance.category = validated_data.get('category', instance.category)
+        if field_values_data:
+            # Os valores enviados substituem todos os do ativo (ver sync_field_values).
+            instance.field_snapshot = self.build_snapshot(field_values_data)
         
-        # Salva as alterações do ativo principal
-        instance.save()
+        with search.deferred_reindex():
+            # Salva as alterações do ativo principal
+            instance.save()
 
-        # Atualiza os campos dinâmicos
-        if field_values_data:
-            instance.field_values.all().delete()
-            for field_value_data in field_values_data:
-                AssetFieldValue.objects.create(asset=instance, **field_value_data)
+            # Atualiza os campos dinâmicos
+            if field_values_data:
+                self.sync_field_values(instance, field_values_data)
 
         return instance
 
+    @staticmethod
+    def build_snapshot(field_values_data):
+        return snapshots.build_snapshot((data['field_definition'].id, data['value']) for data in field_values_data)
+
+    TYPED_VALUE_FIELDS = ['value', 'value_number', 'value_date', 'value_text']
+
+    def sync_field_values(self, instance, field_values_data):
+        """
+        Aplica apenas a diferença entre os valores salvos e os enviados:
+        atualiza os que mudaram, cria os novos e apaga os que não vieram,
+        em vez de apagar e recriar todas as linhas a cada edição.
+        """
+        existing = {}
+        duplicated = []
+        for field_value in instance.field_values.all():
+            if field_value.field_definition_id in existing:
+                duplicated.append(field_value.pk)
+            else:
+                existing[field_value.field_definition_id] = field_value
+
+        incoming = {data['field_definition'].id: data for data in field_values_data}
+
+        to_update, to_create = [], []
+        for field_value_data in incoming.values():
+            definition = field_value_data['field_definition']
+            value = field_value_data['value']
+            field_value = existing.pop(definition.id, None)
+            if field_value is None:
+                field_value = AssetFieldValue(asset=instance, field_definition=definition, value=value)
+                to_create.append(field_value)
+            elif field_value.value != value:
+                field_value.value = value
+                to_update.append(field_value)
+            else:
+                continue
+            field_value.fill_typed_values(definition.field_type)
+
+        to_delete = [field_value.pk for field_value in existing.values()] + duplicated
+        if to_update:
+            AssetFieldValue.objects.bulk_update(to_update, self.TYPED_VALUE_FIELDS)
+        if to_create:
+            AssetFieldValue.objects.bulk_create(to_create)
+        if to_delete:
+            # Sem signals: o snapshot já foi gravado sem esses campos.
+            raw_delete(AssetFieldValue, 'id', to_delete)
+            search.schedule_reindex(instance.pk)
+        # bulk_update/bulk_create não disparam signals: agenda a busca manualmente.
+        if to_update or to_create:
+            search.schedule_reindex(instance.pk)
+
+# Entrada de POST /api/assets/batch/: a mesma alteração aplicada a vários ativos.
+class AssetBatchSerializer(serializers.Serializer):
+    ACTION_CHOICES = [(SET_STATUS, 'Alterar status'), (MOVE, 'Mover de categoria'), (DELETE, 'Excluir')]
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1)
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    status = serializers.ChoiceField(choices=Asset.STATUS_CHOICES, required=False)
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+
+    def validate_ids(self, value):
+        # Em segundo plano (Job) o limite é maior: a view informa `max_ids` no contexto.
+        limit = self.context.get('max_ids', BATCH_MAX_IDS)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Envie no máximo {limit} ids por requisição.')
+        return value
+
+    def validate(self, data):
+        if data['action'] == SET_STATUS and 'status' not in data:
+            raise serializers.ValidationError({'status': 'Informe o novo status.'})
+        if data['action'] == MOVE and 'category' not in data:
+            raise serializers.ValidationError({'category': 'Informe a categoria de destino.'})
+        return data
+
+class JobSerializer(serializers.ModelSerializer):
+    has_output = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'progress', 'total', 'percent', 'attempts', 'max_attempts',
+            'cancel_requested', 'error', 'result', 'has_output', 'run_after',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_has_output(self, job):
+        return bool(job.output_file)
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Adiciona campos ao token de REFRESH
-        token['role'] = user.profile.role
+        # Adiciona campos ao token de REFRESH; o token de acesso gerado a partir
+        # dele copia essas claims.
+        profile = user.profile
+        token['role'] = profile.role
+        token['role_version'] = profile.role_version
         token['username'] = user.username
         return token
 
     def validate(self, attrs):
-        # 1. Valida usuário e senha (padrão do JWT)
-        data = super().validate(attrs)
+        # Valida usuário e senha pelo TokenObtainSerializer (uma consulta, ver
+        # ProfileModelBackend) sem passar pelo validate de TokenObtainPairSerializer,
+        # que já assinaria um par de tokens para ser descartado aqui.
+        data = super(TokenObtainPairSerializer, self).validate(attrs)
 
-        # 2. Gera o token de refresh com as nossas infos extras
         refresh = self.get_token(self.user)
-
-        # 3. FORÇA a inclusão das infos no token de ACESSO (Access Token)
-        # O SimpleJWT não faz isso automaticamente, por isso precisamos fazer aqui:
-        refresh.access_token['role'] = self.user.profile.role
-        refresh.access_token['username'] = self.user.username
-
-        # 4. Atualiza a resposta para enviar esse novo token de acesso modificado
+        data['refresh'] = str(refresh)
         data['access'] = str(refresh.access_token)
 
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
         return data
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        # Busca o papel atual: se ele mudou desde o login, o novo token de
+        # acesso já sai com o papel e a versão corretos.
+        profile = (
+            Profile.objects.select_related('user')
+            .only('role', 'role_version', 'user__is_active')
+            .filter(user_id=refresh[jwt_settings.USER_ID_CLAIM])
+            .first()
+        )
+        if profile is None or not profile.user.is_active:
+            raise AuthenticationFailed('Usuário não encontrado ou inativo.', code='user_not_found')
+
+        refresh['role'] = profile.role
+        refresh['role_version'] = profile.role_version
+        return {'access': str(refresh.access_token)}
     
 class AdminUserSerializer(serializers.ModelSerializer):
     role = serializers.CharField(source='profile.role', read_only=True) # Role é tratada separadamente ou bloqueada aqui
@@ -0,0 +1,118 @@
+"""
+Cópia desnormalizada dos valores de campo em `Asset.field_snapshot`.
+
+O snapshot (`{"<field_definition_id>": valor}`) é o que as leituras de
+/api/assets/ devolvem em `field_values`, então listar ou detalhar ativos não
+precisa juntar AssetFieldValue. A tabela de valores continua sendo a fonte
+de verdade (filtros, busca e exportação usam ela); o snapshot é reescrito
+pelo AssetSerializer, pela importação, pelas operações em lote e pela
+remoção de campos; gravações e exclusões avulsas de AssetFieldValue (admin,
+shell) passam por `write_value`, chamada pelos signals em models.py. Escritas
+em massa que pulam os signals podem deixá-lo divergente:
+`check_field_snapshots` encontra e corrige.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+def build_snapshot(values):
+    """`values`: pares (field_definition_id, valor)."""
+    return {str(field_id): value for field_id, value in values}
+
+
+def snapshot_items(snapshot, field_defs=None):
+    # Mesmo formato de AssetFieldValueSerializer, em ordem de campo; com
+    # `field_defs` (ids), só os valores desses campos.
+    items = (snapshot or {}).items()
+    if field_defs is not None:
+        wanted = {str(field_id) for field_id in field_defs}
+        items = [(field_id, value) for field_id, value in items if field_id in wanted]
+    return [
+        {'field_definition': int(field_id), 'value': value}
+        for field_id, value in sorted(items, key=lambda item: int(item[0]))
+    ]
+
+
+def write_value(asset_id, field_id, value=None, remove=False):
+    """
+    Grava o valor de um campo no snapshot do ativo (ou o tira, com
+    `remove=True`) lendo a linha de novo com lock, para que gravações
+    simultâneas no mesmo ativo não percam as chaves uma da outra. Como as
+    demais escritas de ativos, avança `updated_at`, registra a alteração no
+    feed (que também move a marca d'água das listagens). Retorna False se
+    nada mudou.
+    """
+    from .models import Asset, AssetChange
+
+    key = str(field_id)
+    with transaction.atomic():
+        row = Asset.objects.select_for_update().filter(pk=asset_id).values_list(
+            'category_id', 'field_snapshot'
+        ).first()
+        if row is None:
+            return False
+        category_id, snapshot = row[0], row[1] or {}
+        if remove:
+            if key not in snapshot:
+                return False
+            del snapshot[key]
+        elif key in snapshot and snapshot[key] == value:
+            return False
+        else:
+            snapshot[key] = value
+        Asset.objects.filter(pk=asset_id).update(field_snapshot=snapshot, updated_at=timezone.now())
+        AssetChange.record(AssetChange.UPSERT, category_id, [asset_id])
+    return True
+
+
+def expected_snapshots(asset_ids, value_model=None):
+    """Monta o snapshot correto de cada ativo a partir de AssetFieldValue (uma consulta)."""
+    from .models import AssetFieldValue
+    value_model = value_model or AssetFieldValue
+    snapshots = {asset_id: {} for asset_id in asset_ids}
+    rows = value_model.objects.filter(asset_id__in=asset_ids).order_by('asset_id', 'id').values_list(
+        'asset_id', 'field_definition_id', 'value'
+    )
+    for asset_id, asset_rows in groupby(rows, key=itemgetter(0)):
+        snapshots[asset_id] = build_snapshot((field_id, value) for _, field_id, value in asset_rows)
+    return snapshots
+
+
+def find_drift(chunk_size=CHUNK_SIZE, asset_model=None, value_model=None):
+    """Percorre todos os ativos em lotes e gera (asset_id, snapshot salvo, snapshot correto) dos divergentes."""
+    from .models import Asset
+    asset_model = asset_model or Asset
+    last_id = 0
+    while True:
+        stored = list(asset_model.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'field_snapshot'
+        )[:chunk_size])
+        if not stored:
+            return
+        expected = expected_snapshots([asset_id for asset_id, _ in stored], value_model)
+        for asset_id, snapshot in stored:
+            if (snapshot or {}) != expected[asset_id]:
+                yield asset_id, snapshot, expected[asset_id]
+        last_id = stored[-1][0]
+
+
+def repair(drift, asset_model=None, chunk_size=CHUNK_SIZE):
+    """Grava os snapshots corretos (`drift` vem de find_drift). Retorna quantos ativos foram corrigidos."""
+    from .models import Asset
+    asset_model = asset_model or Asset
+    batch, total = [], 0
+    for asset_id, _, expected in drift:
+        batch.append(asset_model(id=asset_id, field_snapshot=expected))
+        if len(batch) >= chunk_size:
+            asset_model.objects.bulk_update(batch, ['field_snapshot'])
+            total += len(batch)
+            batch = []
+    if batch:
+        asset_model.objects.bulk_update(batch, ['field_snapshot'])
+        total += len(batch)
+    return total
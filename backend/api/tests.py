@@ -2,7 +2,35 @@
 from django.contrib.auth.models import User # type: ignore
 from rest_framework.test import APITestCase # type: ignore
 from rest_framework import status # type: ignore
-from .models import Asset, Category, Profile
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile # type: ignore
+from django.core.management import call_command # type: ignore
+from django.core.management.base import CommandError # type: ignore
+from django.conf import settings # type: ignore
+from django.core.cache.backends.locmem import LocMemCache # type: ignore
+from django.db import OperationalError, connection, connections # type: ignore
+from django.db.utils import ConnectionHandler # type: ignore
+from django.test import override_settings # type: ignore
+from django.test.utils import CaptureQueriesContext # type: ignore
+from django.utils import timezone # type: ignore
+from .models import Asset, AssetChange, AssetFieldValue, AssetStatusCount, Category, FieldDefinition, Job, Profile
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken # type: ignore
+from .pagination import KeysetCursorPagination
+from .profiling import reset_metrics
+from . import caching, compression, jobs, snapshots
+from .batch import BATCH_MAX_IDS
 
 class AssetTests(APITestCase):
     
@@ -94,4 +122,1846 @@ class AssetTests(APITestCase):
         }
         response = self.client.post(self.url, data, format='json')
         
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class AssetPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='leitor', password='123')
+        self.category = Category.objects.create(name='Notebooks', owner=self.user)
+        for i in range(7):
+            Asset.objects.create(patrimonio=f"NB-{i:02d}", category=self.category, owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/assets/?category_id={self.category.id}&page_size=3'
+
+    # CT05: Percorre todas as páginas pelo cursor, sem repetir nem pular ativos
+    def test_cursor_walk_returns_every_asset_once(self):
+        seen = []
+        url = self.url
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(asset['patrimonio'] for asset in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [f"NB-{i:02d}" for i in range(7)])
+
+    # CT06: O link "previous" volta exatamente para a página anterior
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url)
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [a['id'] for a in back.data['results']],
+            [a['id'] for a in first.data['results']],
+        )
+        self.assertIsNone(back.data['previous'])
+
+    # CT07: ?page_size= nunca ultrapassa o limite configurado
+    def test_page_size_is_capped(self):
+        with patch.object(KeysetCursorPagination, 'max_page_size', 4):
+            response = self.client.get('/api/assets/?page_size=100000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+
+    # CT08: Cursor adulterado é rejeitado
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/assets/?cursor=nao-e-um-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # CT82: Só ativos, categorias, usuários e tarefas são paginados; os campos de uma categoria seguem como array
+    def test_field_definition_list_is_not_paginated(self):
+        FieldDefinition.objects.create(category=self.category, name='Tela', field_type='text')
+        self.user.profile.change_role('editor')
+        response = self.client.get(f'/api/categories/{self.category.id}/fields/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([field['name'] for field in response.data], ['Tela'])
+        self.assertIn('results', self.client.get('/api/categories/').data)
+
+
+class QueryCountMixin:
+    """
+    Garante que um endpoint de listagem executa o mesmo número de consultas
+    independente da quantidade de itens (proteção contra N+1).
+    """
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, grow, expected=None):
+        # `grow` cria mais itens entre as duas medições.
+        before = self.count_queries(url)
+        grow()
+        after = self.count_queries(url)
+        self.assertEqual(before, after, f"{url}: {before} consultas antes, {after} depois")
+        if expected is not None:
+            self.assertEqual(after, expected)
+
+
+class QueryCountTests(QueryCountMixin, APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='contador', password='123')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Monitores', owner=self.user)
+        self.fields = [
+            FieldDefinition.objects.create(category=self.category, name=name, field_type='text')
+            for name in ('Marca', 'Modelo', 'Serial')
+        ]
+
+    def create_assets(self, start, count):
+        for i in range(start, start + count):
+            asset = Asset.objects.create(patrimonio=f"MON-{i}", category=self.category, owner=self.user)
+            for field in self.fields:
+                AssetFieldValue.objects.create(asset=asset, field_definition=field, value=f"{field.name}-{i}")
+
+    # CT09: Listar ativos não faz uma consulta por ativo
+    def test_asset_list_constant_queries(self):
+        self.create_assets(0, 2)
+        # Uma consulta de ativos (os valores de campo vêm de Asset.field_snapshot)
+        # e as três da marca d'água (caching.get_asset_watermark).
+        self.assertConstantQueries(
+            f'/api/assets/?category_id={self.category.id}',
+            lambda: self.create_assets(2, 20),
+            expected=4,
+        )
+
+    # CT10: Listar categorias não faz uma consulta por categoria
+    def test_category_list_constant_queries(self):
+        def grow():
+            for i in range(10):
+                category = Category.objects.create(name=f'Categoria {i}', owner=self.user)
+                FieldDefinition.objects.create(category=category, name='Cor')
+
+        self.assertConstantQueries('/api/categories/', grow, expected=2)
+
+    # CT11: Listar usuários não consulta o perfil de cada um
+    def test_user_list_constant_queries(self):
+        self.user.profile.role = 'admin'
+        self.user.profile.save()
+
+        def grow():
+            for i in range(10):
+                User.objects.create_user(username=f'usuario{i}', password='123')
+
+        self.assertConstantQueries('/api/users/', grow)
+
+
+class FieldValueFilterTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='filtro', password='123')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Nobreaks', owner=self.user)
+        self.voltage = FieldDefinition.objects.create(category=self.category, name='Voltagem', field_type='number')
+        self.bought = FieldDefinition.objects.create(category=self.category, name='Compra', field_type='date')
+        self.brand = FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text')
+        for patrimonio, voltage, bought, brand in [
+            ('NB-1', '110', '2023-12-31', 'APC'),
+            ('NB-2', '220', '2024-03-10', 'SMS'),
+            ('NB-3', '380', '2024-11-02', 'APC'),
+        ]:
+            asset = Asset.objects.create(patrimonio=patrimonio, category=self.category, owner=self.user)
+            AssetFieldValue.objects.create(asset=asset, field_definition=self.voltage, value=voltage)
+            AssetFieldValue.objects.create(asset=asset, field_definition=self.bought, value=bought)
+            AssetFieldValue.objects.create(asset=asset, field_definition=self.brand, value=brand)
+
+    def get_patrimonios(self, query):
+        response = self.client.get(f'/api/assets/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(asset['patrimonio'] for asset in response.data['results'])
+
+    # CT12: Os valores tipados são preenchidos conforme o tipo do campo
+    def test_typed_columns_are_filled(self):
+        fv = AssetFieldValue.objects.get(asset__patrimonio='NB-2', field_definition=self.voltage)
+        self.assertEqual(fv.value_number, 220.0)
+        fv = AssetFieldValue.objects.get(asset__patrimonio='NB-2', field_definition=self.bought)
+        self.assertEqual(str(fv.value_date), '2024-03-10')
+        self.assertIsNone(fv.value_number)
+
+    # CT13: Filtros de intervalo numérico e de data
+    def test_range_filters(self):
+        self.assertEqual(self.get_patrimonios(f'field_{self.voltage.id}__gt=200'), ['NB-2', 'NB-3'])
+        self.assertEqual(
+            self.get_patrimonios(f'field_{self.bought.id}__gte=2024-01-01&field_{self.bought.id}__lt=2025-01-01'),
+            ['NB-2', 'NB-3'],
+        )
+        self.assertEqual(
+            self.get_patrimonios(f'field_{self.voltage.id}__lte=220&field_{self.brand.id}=APC'),
+            ['NB-1'],
+        )
+
+    # CT14: Valor incompatível com o tipo do campo retorna 400
+    def test_invalid_filter_value(self):
+        response = self.client.get(f'/api/assets/?field_{self.voltage.id}__gt=muito')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/assets/?field_999999=x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkImportTests(APITestCase):
+
+    def setUp(self):
+        self.editor = User.objects.create_user(username='editor', password='123')
+        self.editor.profile.role = 'editor'
+        self.editor.profile.save()
+        self.client.force_authenticate(user=self.editor)
+        self.category = Category.objects.create(name='Impressoras', owner=self.editor)
+        self.brand = FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text')
+        self.pages = FieldDefinition.objects.create(category=self.category, name='Paginas', field_type='number')
+        Asset.objects.create(patrimonio='IMP-EXISTENTE', category=self.category, owner=self.editor)
+        self.url = '/api/assets/bulk-import/'
+
+    def upload(self, name, content):
+        return self.client.post(self.url, {
+            'category': self.category.id,
+            'file': SimpleUploadedFile(name, content.encode('utf-8')),
+        }, format='multipart')
+
+    # CT15: Importação CSV grava as linhas válidas e relata as inválidas
+    def test_csv_import_with_row_errors(self):
+        content = (
+            "patrimonio,status,Marca,Paginas\n"
+            "IMP-1,em_uso,HP,1500\n"
+            "IMP-2,,Epson,\n"
+            "IMP-EXISTENTE,,Canon,10\n"
+            "IMP-3,quebrado,HP,10\n"
+            "IMP-4,,HP,muitas\n"
+            "IMP-1,,HP,1\n"
+        )
+        with patch('api.importers.IMPORT_BATCH_SIZE', 2):
+            response = self.upload('ativos.csv', content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4, 5, 6])
+        self.assertIn('status', response.data['errors'][1]['errors'])
+        self.assertIn('Paginas', response.data['errors'][2]['errors'])
+
+        asset = Asset.objects.get(patrimonio='IMP-1')
+        self.assertEqual(asset.status, 'em_uso')
+        self.assertEqual(asset.owner, self.editor)
+        pages = asset.field_values.get(field_definition=self.pages)
+        self.assertEqual(pages.value_number, 1500.0)
+        self.assertEqual(Asset.objects.get(patrimonio='IMP-2').field_values.count(), 1)
+
+    # CT16: Importação JSONL aceita campos pelo nome ou por field_<id>
+    def test_jsonl_import(self):
+        content = "\n".join([
+            json.dumps({"patrimonio": "J-1", "Marca": "Brother"}),
+            "nao e json",
+            json.dumps({"patrimonio": "J-2", f"field_{self.pages.id}": 42}),
+        ])
+        response = self.upload('ativos.jsonl', content)
+
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertEqual(
+            AssetFieldValue.objects.get(asset__patrimonio='J-2').value_number, 42.0
+        )
+
+    # CT17: Coluna desconhecida é recusada antes de gravar qualquer linha
+    def test_csv_unknown_column(self):
+        response = self.upload('ativos.csv', "patrimonio,Cor\nX-1,azul\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Asset.objects.filter(patrimonio='X-1').exists())
+
+    # CT18: Visualizador não pode importar
+    def test_viewer_cannot_import(self):
+        viewer = User.objects.create_user(username='so-leitura', password='123')
+        self.client.force_authenticate(user=viewer)
+        response = self.upload('ativos.csv', "patrimonio\nV-1\n")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AssetExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auditor', password='123')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Servidores', owner=self.user)
+        self.cpu = FieldDefinition.objects.create(category=self.category, name='CPU', field_type='text')
+        self.ram = FieldDefinition.objects.create(category=self.category, name='RAM', field_type='number')
+        first = Asset.objects.create(patrimonio='SRV-1', category=self.category, owner=self.user)
+        AssetFieldValue.objects.create(asset=first, field_definition=self.cpu, value='Xeon')
+        AssetFieldValue.objects.create(asset=first, field_definition=self.ram, value='64')
+        Asset.objects.create(patrimonio='SRV-2', category=self.category, owner=self.user, status='inativo')
+
+    def export(self, file_format):
+        return self.client.get(
+            f'/api/assets/export/?category_id={self.category.id}&file_format={file_format}'
+        )
+
+    # CT19: CSV em streaming com uma coluna por campo personalizado
+    def test_csv_export(self):
+        response = self.export('csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+
+        self.assertEqual(rows[0], ['id', 'patrimonio', 'status', 'created_at', 'owner', 'CPU', 'RAM'])
+        self.assertEqual(rows[1][1:3] + rows[1][4:], ['SRV-1', 'disponivel', 'auditor', 'Xeon', '64'])
+        self.assertEqual(rows[2][1:3] + rows[2][4:], ['SRV-2', 'inativo', 'auditor', '', ''])
+        self.assertEqual(len(rows), 3)
+
+    # CT20: JSONL traz um objeto por ativo
+    def test_jsonl_export(self):
+        response = self.export('jsonl')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['patrimonio'] for row in rows], ['SRV-1', 'SRV-2'])
+        self.assertEqual(rows[0]['RAM'], '64')
+        self.assertEqual(rows[1]['status'], 'inativo')
+
+    # CT21: Categoria e formato são validados
+    def test_export_validation(self):
+        self.assertEqual(self.client.get('/api/assets/export/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.export('pdf').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JWTRoleTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='chefe', password='senha-forte-1')
+        self.admin.profile.change_role('admin')
+        self.editor = User.objects.create_user(username='colaborador', password='senha-forte-2')
+        self.editor.profile.change_role('editor')
+        self.category = Category.objects.create(name='Mesas', owner=self.admin)
+
+    def login(self, username, password):
+        response = self.client.post('/api/token/', {'username': username, 'password': password}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    # CT22: Requisições com JWT não consultam User nem Profile
+    def test_jwt_request_skips_user_and_profile_queries(self):
+        access = self.login('colaborador', 'senha-forte-2')['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/assets/', {
+                "patrimonio": "MESA-01", "category": self.category.id, "field_values": []
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Asset.objects.get(patrimonio='MESA-01').owner, self.editor)
+        tables = ' '.join(query['sql'] for query in ctx.captured_queries)
+        self.assertNotIn('auth_user', tables)
+        self.assertNotIn('api_profile', tables)
+
+    # CT23: Alterar o papel revoga os tokens antigos; o refresh emite um token com o papel novo
+    def test_role_change_revokes_old_tokens(self):
+        tokens = self.login('colaborador', 'senha-forte-2')
+        admin_access = self.login('chefe', 'senha-forte-1')['access']
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {admin_access}")
+        response = self.client.put(f'/api/users/{self.editor.id}/update-role/', {'role': 'viewer'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/categories/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/categories/').status_code, status.HTTP_200_OK)
+        response = self.client.post('/api/assets/', {
+            "patrimonio": "MESA-02", "category": self.category.id, "field_values": []
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    # CT92: Desativar o usuário recusa o token de acesso já emitido
+    def test_deactivation_revokes_tokens(self):
+        tokens = self.login('colaborador', 'senha-forte-2')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/categories/').status_code, status.HTTP_200_OK)
+
+        self.editor.is_active = False
+        self.editor.save()
+        self.assertEqual(self.client.get('/api/categories/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AssetSearchTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='busca', password='123')
+        self.admin.profile.change_role('admin')
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Rede', owner=self.admin)
+        self.serial = FieldDefinition.objects.create(category=self.category, name='Serial', field_type='text')
+        self.place = FieldDefinition.objects.create(category=self.category, name='Local', field_type='text')
+
+    def create_asset(self, patrimonio, serial, place):
+        response = self.client.post('/api/assets/', {
+            "patrimonio": patrimonio,
+            "category": self.category.id,
+            "field_values": [
+                {"field_definition": self.serial.id, "value": serial},
+                {"field_definition": self.place.id, "value": place},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def search(self, text):
+        response = self.client.get('/api/assets/', {'q': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(asset['patrimonio'] for asset in response.data['results'])
+
+    # CT24: Busca por patrimônio (prefixo) e por valores de campos, ignorando acentos
+    def test_search_patrimonio_and_field_values(self):
+        self.create_asset('100200', 'SN-ABC-77', 'Almoxarifado Térreo')
+        self.create_asset('100300', 'SN-XYZ-12', 'Sala de Reunião')
+
+        self.assertEqual(self.search('1002'), ['100200'])
+        self.assertEqual(self.search('xyz'), ['100300'])
+        self.assertEqual(self.search('reuniao'), ['100300'])
+        self.assertEqual(self.search('sala almox'), [])
+        self.assertEqual(self.search('sn'), ['100200', '100300'])
+
+    # CT25: O índice acompanha edições e exclusões
+    def test_index_follows_updates_and_deletes(self):
+        asset_id = self.create_asset('500', 'SN-OLD', 'Depósito')
+        response = self.client.put(f'/api/assets/{asset_id}/', {
+            "patrimonio": "500",
+            "category": self.category.id,
+            "field_values": [{"field_definition": self.serial.id, "value": "SN-NEW"}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.search('old'), [])
+        self.assertEqual(self.search('new'), ['500'])
+
+        self.client.delete(f'/api/assets/{asset_id}/')
+        self.assertEqual(self.search('new'), [])
+
+    # CT26: Ativos importados em massa também entram no índice
+    def test_bulk_import_is_indexed(self):
+        response = self.client.post('/api/assets/bulk-import/', {
+            'category': self.category.id,
+            'file': SimpleUploadedFile('rede.csv', "patrimonio,Serial\nSW-1,CISCO-9000\n".encode()),
+        }, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(self.search('cisco'), ['SW-1'])
+
+
+class AssetUpdateWritesTests(APITestCase):
+    """Mede quantas escritas cada edição de ativo gera em api_assetfieldvalue."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='edicao', password='123')
+        self.admin.profile.change_role('admin')
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Projetores', owner=self.admin)
+        self.fields = [
+            FieldDefinition.objects.create(category=self.category, name=f'Campo {i}', field_type='text')
+            for i in range(10)
+        ]
+        response = self.client.post('/api/assets/', self.payload('disponivel', {}), format='json')
+        self.asset_id = response.data['id']
+
+    def payload(self, asset_status, changes):
+        return {
+            "patrimonio": "PROJ-1",
+            "status": asset_status,
+            "category": self.category.id,
+            "field_values": [
+                {"field_definition": field.id, "value": changes.get(field.id, f'valor {i}')}
+                for i, field in enumerate(self.fields)
+                if changes.get(field.id) != ''
+            ],
+        }
+
+    def field_value_writes(self, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f'/api/assets/{self.asset_id}/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            q['sql'].split()[0] for q in ctx.captured_queries
+            if 'api_assetfieldvalue' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+
+    # CT27: Mudar só o status não reescreve nenhum valor de campo (antes: 1 DELETE + 10 INSERTs)
+    def test_status_only_edit_has_no_field_value_writes(self):
+        self.assertEqual(self.field_value_writes(self.payload('manutencao', {})), [])
+        self.assertEqual(Asset.objects.get(pk=self.asset_id).status, 'manutencao')
+
+    # CT28: Alterar, remover e manter valores gera uma escrita por tipo de operação
+    def test_diff_update(self):
+        changed, removed = self.fields[0], self.fields[1]
+        original_ids = set(AssetFieldValue.objects.filter(asset_id=self.asset_id).values_list('id', flat=True))
+
+        writes = self.field_value_writes(self.payload('disponivel', {changed.id: 'novo', removed.id: ''}))
+
+        self.assertEqual(sorted(writes), ['DELETE', 'UPDATE'])
+        values = dict(AssetFieldValue.objects.filter(asset_id=self.asset_id).values_list('field_definition_id', 'value'))
+        self.assertEqual(values[changed.id], 'novo')
+        self.assertNotIn(removed.id, values)
+        self.assertEqual(len(values), 9)
+        # As linhas mantidas são as mesmas (não foram recriadas)
+        current_ids = set(AssetFieldValue.objects.filter(asset_id=self.asset_id).values_list('id', flat=True))
+        self.assertTrue(current_ids <= original_ids)
+
+
+class InventoryStatsTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='painel', password='123')
+        self.admin.profile.change_role('admin')
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Cadeiras', owner=self.admin)
+        self.other = Category.objects.create(name='Armários', owner=self.admin)
+
+    def create_asset(self, patrimonio, category, asset_status='disponivel'):
+        response = self.client.post('/api/assets/', {
+            "patrimonio": patrimonio, "status": asset_status, "category": category.id, "field_values": []
+        }, format='json')
+        return response.data['id']
+
+    def stats(self):
+        response = self.client.get('/api/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    # CT29: Os contadores acompanham criação, mudança de status/categoria e exclusão
+    def test_counters_follow_asset_changes(self):
+        first = self.create_asset('C-1', self.category)
+        self.create_asset('C-2', self.category, 'em_uso')
+        self.create_asset('A-1', self.other)
+
+        asset = Asset.objects.get(pk=first)
+        asset.status = 'manutencao'
+        asset.save()
+        moved = Asset.objects.get(patrimonio='C-2')
+        moved.category = self.other
+        moved.save()
+        Asset.objects.get(patrimonio='A-1').delete()
+
+        data = self.stats()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['by_status']['manutencao'], 1)
+        self.assertEqual(data['by_status']['disponivel'], 0)
+        by_category = {entry['category']: entry for entry in data['categories']}
+        self.assertEqual(by_category[self.category.id]['by_status']['manutencao'], 1)
+        self.assertEqual(by_category[self.other.id]['by_status']['em_uso'], 1)
+        self.assertEqual(by_category[self.other.id]['total'], 1)
+
+    # CT30: O endpoint não consulta a tabela de ativos, e o comando de rebuild chega ao mesmo resultado
+    def test_stats_read_summary_only_and_rebuild(self):
+        for i in range(5):
+            self.create_asset(f'C-{i}', self.category, 'em_uso')
+        self.client.post('/api/assets/bulk-import/', {
+            'category': self.category.id,
+            'file': SimpleUploadedFile('c.csv', "patrimonio,status\nC-10,inativo\nC-11,\n".encode()),
+        }, format='multipart')
+        before = self.stats()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.stats()
+        self.assertFalse(any('api_asset"' in q['sql'] or 'api_asset ' in q['sql'] for q in ctx.captured_queries))
+
+        AssetStatusCount.objects.all().delete()
+        call_command('rebuild_asset_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(), before)
+        self.assertEqual(before['total'], 7)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Os planos verificados são do SQLite (EXPLAIN QUERY PLAN).")
+class QueryPlanTests(APITestCase):
+    """
+    Confere, via EXPLAIN, que as consultas principais de AssetViewSet e
+    CategoryViewSet usam índices em vez de varrer a tabela inteira.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planos', password='123')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Switches', owner=self.user)
+        field = FieldDefinition.objects.create(category=self.category, name='Portas', field_type='number')
+        for i in range(3):
+            asset = Asset.objects.create(patrimonio=f'SW-{i}', category=self.category, owner=self.user)
+            AssetFieldValue.objects.create(asset=asset, field_definition=field, value='24')
+
+    def plans_for(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans[query['sql']] = ' | '.join(row[-1] for row in cursor.fetchall())
+        return plans
+
+    def plan_touching(self, plans, table):
+        matches = [plan for sql, plan in plans.items() if f'FROM "{table}"' in sql]
+        self.assertTrue(matches, f"Nenhuma consulta em {table}")
+        return matches[0]
+
+    def assertUsesIndex(self, plan, table):
+        self.assertIn(f'SEARCH {table} USING', plan)
+        self.assertNotIn(f'SCAN {table}\n', plan + '\n')
+
+    # CT31: Lista por categoria usa o índice composto e não ordena em memória
+    def test_asset_list_by_category(self):
+        plans = self.plans_for(f'/api/assets/?category_id={self.category.id}')
+        plan = self.plan_touching(plans, 'api_asset')
+        self.assertIn('api_asset_cat_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        # Os valores de campo vêm do snapshot na própria linha do ativo.
+        self.assertFalse(any('api_assetfieldvalue' in sql for sql in plans))
+
+    # CT32: Filtro por categoria e status usa o índice (categoria, status, created_at)
+    def test_asset_list_by_category_and_status(self):
+        plans = self.plans_for(f'/api/assets/?category_id={self.category.id}&status=disponivel')
+        plan = self.plan_touching(plans, 'api_asset')
+        self.assertIn('api_asset_cat_status_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    # CT33: Detalhe de ativo e categoria buscam pela chave e pelos índices das relações
+    def test_detail_queries(self):
+        asset = Asset.objects.first()
+        plans = self.plans_for(f'/api/assets/{asset.id}/')
+        self.assertUsesIndex(self.plan_touching(plans, 'api_asset'), 'api_asset')
+        self.assertFalse(any('api_assetfieldvalue' in sql for sql in plans))
+
+        plans = self.plans_for(f'/api/categories/{self.category.id}/')
+        self.assertUsesIndex(self.plan_touching(plans, 'api_category'), 'api_category')
+        self.assertUsesIndex(self.plan_touching(plans, 'api_fielddefinition'), 'api_fielddefinition')
+
+    # CT34: A listagem de categorias busca as definições de campo pelo índice da FK
+    def test_category_list(self):
+        plans = self.plans_for('/api/categories/')
+        self.assertUsesIndex(self.plan_touching(plans, 'api_fielddefinition'), 'api_fielddefinition')
+
+
+class SchemaCacheTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='esquema', password='123')
+        self.admin.profile.change_role('admin')
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Câmeras', owner=self.admin)
+        FieldDefinition.objects.create(category=self.category, name='Resolução', field_type='text')
+        self.url = f'/api/categories/{self.category.id}/'
+
+    # CT35: Segunda leitura sai do cache; com If-None-Match volta 304 sem consultar o banco
+    def test_cached_detail_and_not_modified(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    # CT36: Criar um campo invalida a categoria, a listagem e a lista de campos
+    def test_field_definition_change_invalidates(self):
+        detail = self.client.get(self.url)
+        listing = self.client.get('/api/categories/')
+        fields_url = f'/api/categories/{self.category.id}/fields/'
+        fields = self.client.get(fields_url)
+
+        response = self.client.post(fields_url, {'name': 'Lente', 'field_type': 'text'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        new_detail = self.client.get(self.url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(new_detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(new_detail.data['field_definitions']), 2)
+        self.assertNotEqual(self.client.get('/api/categories/')['ETag'], listing['ETag'])
+        self.assertEqual(len(self.client.get(fields_url).data), 2)
+        self.assertEqual(len(fields.data), 1)
+
+    # CT37: Alterar outra categoria não invalida esta
+    def test_other_category_change_keeps_entry(self):
+        detail = self.client.get(self.url)
+        other = Category.objects.create(name='Drones', owner=self.admin)
+        FieldDefinition.objects.create(category=other, name='Autonomia', field_type='number')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    # CT93: O que for lido e guardado antes do commit de uma alteração é descartado no commit
+    def test_generation_bumped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Câmeras IP'
+            self.category.save()
+            # Leitura concorrente antes do commit: guarda a resposta sob a geração nova.
+            before_commit = self.client.get(self.url)
+        self.assertEqual(before_commit.status_code, status.HTTP_200_OK)
+        # A entrada guardada antes do commit não é reaproveitada: a resposta é montada de novo.
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertGreater(len(ctx.captured_queries), 0)
+        self.assertEqual(response.data['name'], 'Câmeras IP')
+
+
+class AssetConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.editor = User.objects.create_user(username='condicional', password='123')
+        self.editor.profile.change_role('editor')
+        self.client.force_authenticate(user=self.editor)
+        self.category = Category.objects.create(name='Roteadores', owner=self.editor)
+        self.other = Category.objects.create(name='Switches', owner=self.editor)
+        self.field = FieldDefinition.objects.create(category=self.category, name='Portas', field_type='number')
+        self.asset = Asset.objects.create(patrimonio='RT-001', category=self.category, owner=self.editor)
+        AssetFieldValue.objects.create(asset=self.asset, field_definition=self.field, value='8')
+        self.list_url = f'/api/assets/?category_id={self.category.id}'
+        self.detail_url = f'/api/assets/{self.asset.id}/'
+
+    # CT38: Listagem sem mudanças volta 304 (por ETag ou Last-Modified) sem consultar os ativos
+    def test_list_not_modified(self):
+        first = self.client.get(self.list_url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            by_etag = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=first['ETag'])
+            by_date = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        # Só a marca d'água é lida (AssetChange e categorias excluídas).
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'FROM "api_asset"' in q['sql']], [])
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_etag['ETag'], first['ETag'])
+        # Outra URL (filtro diferente) tem outro ETag.
+        filtered = self.client.get(self.list_url + '&status=em_uso', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(filtered.status_code, status.HTTP_200_OK)
+
+    # CT39: Editar o ativo invalida a listagem e o detalhe
+    def test_update_changes_etags(self):
+        listing = self.client.get(self.list_url)
+        detail = self.client.get(self.detail_url)
+        self.assertEqual(
+            self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        response = self.client.patch(self.detail_url, {'status': 'em_uso'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        new_listing = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag'])
+        new_detail = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(new_listing.status_code, status.HTTP_200_OK)
+        self.assertEqual(new_listing.data['results'][0]['status'], 'em_uso')
+        self.assertEqual(new_detail.status_code, status.HTTP_200_OK)
+
+    # CT40: Mudanças em outra categoria não invalidam esta; mover um ativo invalida as duas
+    def test_watermark_is_per_category(self):
+        listing = self.client.get(self.list_url)
+        other_url = f'/api/assets/?category_id={self.other.id}'
+        other_listing = self.client.get(other_url)
+
+        Asset.objects.create(patrimonio='SW-001', category=self.other, owner=self.editor)
+        self.assertEqual(
+            self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        self.assertEqual(
+            self.client.get(other_url, HTTP_IF_NONE_MATCH=other_listing['ETag']).status_code,
+            status.HTTP_200_OK,
+        )
+
+        other_listing = self.client.get(other_url)
+        self.asset.category = self.other
+        self.asset.save()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag']).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(other_url, HTTP_IF_NONE_MATCH=other_listing['ETag']).status_code, status.HTTP_200_OK)
+
+    # CT94: Alterações feitas pelo worker (outro processo, com outro cache) invalidam a listagem
+    def test_worker_writes_change_list_etag(self):
+        listing = self.client.get(self.list_url)
+        response = self.client.post('/api/assets/batch/?background=1', {
+            'ids': [self.asset.id], 'action': 'set_status', 'status': 'em_uso',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        with patch.object(caching, 'cache', LocMemCache('worker', {})):
+            call_command('run_jobs', once=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['status'], 'em_uso')
+
+    # CT95: Uma alteração que fica visível depois de outra de id maior também muda a marca d'água
+    def test_late_commit_changes_list_etag(self):
+        AssetChange.record(AssetChange.UPSERT, self.category.id, [self.asset.id, self.asset.id])
+        late = AssetChange.objects.order_by('-id')[1]
+        late.delete()
+        listing = self.client.get(self.list_url)
+
+        AssetChange.objects.create(id=late.id, asset_id=self.asset.id, category_id=self.category.id,
+                                   action=AssetChange.UPSERT)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # CT96: Excluir a categoria muda a marca d'água da listagem geral antes do expurgo
+    def test_soft_deleted_category_changes_list_etag(self):
+        self.editor.profile.change_role('admin')
+        listing = self.client.get('/api/assets/')
+        self.client.delete(f'/api/categories/{self.category.id}/')
+        response = self.client.get('/api/assets/', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+    # CT41: Apagar um campo (que apaga os valores em cascata) invalida o detalhe dos ativos afetados
+    def test_field_definition_delete_changes_detail_etag(self):
+        detail = self.client.get(self.detail_url)
+        self.field.delete()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['field_values'], [])
+
+
+# No PostgreSQL os ids de AssetChange desfeitos pelos testes anteriores deixam
+# buracos recentes na sequência, que seguram o feed (AssetChange.settled_until).
+@override_settings(API_CHANGES_SETTLE_SECONDS=0)
+class AssetChangeFeedTests(APITestCase):
+
+    def setUp(self):
+        self.editor = User.objects.create_user(username='sincroniza', password='123')
+        self.editor.profile.change_role('editor')
+        self.client.force_authenticate(user=self.editor)
+        self.category = Category.objects.create(name='Coletores', owner=self.editor)
+        self.other = Category.objects.create(name='Etiquetas', owner=self.editor)
+        self.asset = Asset.objects.create(patrimonio='CL-001', category=self.category, owner=self.editor)
+        self.url = '/api/assets/changes/'
+
+    def token(self):
+        return self.client.get(self.url).data['next']
+
+    # CT42: O feed traz criados e alterados (uma vez cada) e remoções como tombstones
+    def test_changes_since_token(self):
+        token = self.token()
+        created = self.client.post('/api/assets/', {
+            'patrimonio': 'CL-002', 'category': self.category.id, 'field_values': [],
+        }, format='json')
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.client.patch(f'/api/assets/{self.asset.id}/', {'status': 'em_uso'}, format='json')
+        self.client.patch(f'/api/assets/{self.asset.id}/', {'status': 'manutencao'}, format='json')
+        self.client.delete(f"/api/assets/{created.data['id']}/")
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['changed']], [self.asset.id])
+        self.assertEqual(response.data['changed'][0]['status'], 'manutencao')
+        self.assertEqual(response.data['deleted'], [created.data['id']])
+        self.assertFalse(response.data['has_more'])
+
+        # Com o novo token não há mais nada a sincronizar.
+        empty = self.client.get(self.url, {'since': response.data['next']})
+        self.assertEqual(empty.data['changed'], [])
+        self.assertEqual(empty.data['deleted'], [])
+        self.assertEqual(empty.data['next'], response.data['next'])
+
+    # CT43: Filtrado por categoria, mover um ativo para outra aparece como remoção
+    def test_category_feed_and_limit(self):
+        token = self.token()
+        Asset.objects.create(patrimonio='CL-003', category=self.category, owner=self.editor)
+        self.asset.category = self.other
+        self.asset.save()
+
+        first = self.client.get(self.url, {'since': token, 'category_id': self.category.id, 'limit': 1})
+        self.assertTrue(first.data['has_more'])
+        self.assertEqual(len(first.data['changed']), 1)
+        rest = self.client.get(self.url, {'since': first.data['next'], 'category_id': self.category.id})
+        self.assertFalse(rest.data['has_more'])
+        self.assertEqual(rest.data['deleted'], [self.asset.id])
+
+        other = self.client.get(self.url, {'since': token, 'category_id': self.other.id})
+        self.assertEqual([item['id'] for item in other.data['changed']], [self.asset.id])
+
+    # CT44: Importação em massa entra no feed; token inválido é recusado
+    def test_bulk_import_is_logged_and_bad_token(self):
+        token = self.token()
+        upload = SimpleUploadedFile('ativos.csv', b'patrimonio\nCL-100\nCL-101\n', content_type='text/csv')
+        self.client.post('/api/assets/bulk-import/', {'file': upload, 'category': self.category.id}, format='multipart')
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(sorted(item['patrimonio'] for item in response.data['changed']), ['CL-100', 'CL-101'])
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CT97: O feed não passa de um id que ainda não apareceu (transação aberta) até ele
+    # aparecer ou o buraco ficar mais velho que API_CHANGES_SETTLE_SECONDS (rollback)
+    @override_settings(API_CHANGES_SETTLE_SECONDS=30)
+    def test_feed_stops_before_uncommitted_id(self):
+        settled = timezone.now() - timedelta(seconds=31)
+        AssetChange.objects.update(changed_at=settled)
+        token = self.token()
+        assets = [Asset.objects.create(patrimonio=f'CL-2{i}', category=self.category, owner=self.editor)
+                  for i in range(3)]
+        # A alteração do segundo ativo "ainda não foi commitada".
+        pending_id = AssetChange.objects.get(asset_id=assets[1].id).id
+        AssetChange.objects.filter(id=pending_id).delete()
+
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual([item['id'] for item in response.data['changed']], [assets[0].id])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(self.token(), response.data['next'])
+
+        AssetChange.objects.create(id=pending_id, asset_id=assets[1].id, category_id=self.category.id,
+                                   action=AssetChange.UPSERT)
+        response = self.client.get(self.url, {'since': response.data['next']})
+        self.assertEqual([item['id'] for item in response.data['changed']], [assets[1].id, assets[2].id])
+
+        # Um buraco antigo é de uma transação desfeita: não segura o feed.
+        next_token = response.data['next']
+        late = Asset.objects.create(patrimonio='CL-30', category=self.category, owner=self.editor)
+        Asset.objects.create(patrimonio='CL-31', category=self.category, owner=self.editor)
+        AssetChange.objects.filter(asset_id=late.id).delete()
+        AssetChange.objects.filter(id__gt=next_token).update(changed_at=settled)
+        response = self.client.get(self.url, {'since': next_token})
+        self.assertEqual([item['patrimonio'] for item in response.data['changed']], ['CL-31'])
+
+
+# No PostgreSQL os ids de AssetChange desfeitos pelos testes anteriores deixam
+# buracos recentes na sequência, que seguram o feed (AssetChange.settled_until).
+@override_settings(API_CHANGES_SETTLE_SECONDS=0)
+class AssetBatchTests(APITestCase):
+
+    def setUp(self):
+        self.editor = User.objects.create_user(username='lote', password='123')
+        self.editor.profile.change_role('editor')
+        self.client.force_authenticate(user=self.editor)
+        self.category = Category.objects.create(name='Notebooks', owner=self.editor)
+        self.target = Category.objects.create(name='Sucata', owner=self.editor)
+        self.field = FieldDefinition.objects.create(category=self.category, name='Modelo', field_type='text')
+        self.assets = [
+            Asset.objects.create(patrimonio=f'NB-{i:03}', category=self.category, owner=self.editor, status='em_uso')
+            for i in range(5)
+        ]
+        for asset in self.assets:
+            AssetFieldValue.objects.create(asset=asset, field_definition=self.field, value='Latitude')
+        self.ids = [asset.id for asset in self.assets]
+        self.url = '/api/assets/batch/'
+
+    def counts(self, category):
+        return dict(AssetStatusCount.objects.filter(category=category, count__gt=0).values_list('status', 'count'))
+
+    # CT45: Troca de status em lote com poucas consultas e resultado por id
+    def test_set_status(self):
+        Asset.objects.filter(pk=self.ids[0]).update(status='manutencao')
+        AssetStatusCount.rebuild()
+        payload = {'ids': self.ids + [999999], 'action': 'set_status', 'status': 'manutencao'}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        results = {item['id']: item['result'] for item in response.data['results']}
+        self.assertEqual(results[self.ids[0]], 'unchanged')
+        self.assertEqual(results[self.ids[1]], 'updated')
+        self.assertEqual(results[999999], 'not_found')
+        self.assertEqual(Asset.objects.filter(status='manutencao').count(), 5)
+        self.assertEqual(self.counts(self.category), {'manutencao': 5})
+
+    # CT46: Mover de categoria atualiza contadores, busca e feed; os valores antigos saem
+    def test_move(self):
+        token = self.client.get('/api/assets/changes/').data['next']
+        response = self.client.post(self.url, {'ids': self.ids[:2], 'action': 'move', 'category': self.target.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(Asset.objects.filter(category=self.target).count(), 2)
+        self.assertFalse(AssetFieldValue.objects.filter(asset_id__in=self.ids[:2]).exists())
+        self.assertEqual(self.counts(self.category), {'em_uso': 3})
+        self.assertEqual(self.counts(self.target), {'em_uso': 2})
+        self.assertEqual(len(self.client.get('/api/assets/', {'q': 'Latitude'}).data['results']), 3)
+        feed = self.client.get('/api/assets/changes/', {'since': token, 'category_id': self.category.id})
+        self.assertEqual(feed.data['deleted'], sorted(self.ids[:2]))
+
+    # CT47: Exclusão em lote e permissão verificada uma vez (viewer não pode)
+    def test_delete_and_permission(self):
+        viewer = User.objects.create_user(username='olha', password='123')
+        self.client.force_authenticate(user=viewer)
+        response = self.client.post(self.url, {'ids': self.ids, 'action': 'delete'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.editor)
+        response = self.client.post(self.url, {'ids': self.ids, 'action': 'delete'}, format='json')
+        self.assertEqual({item['result'] for item in response.data['results']}, {'deleted'})
+        self.assertFalse(Asset.objects.filter(pk__in=self.ids).exists())
+        self.assertFalse(AssetFieldValue.objects.filter(asset_id__in=self.ids).exists())
+        self.assertEqual(self.counts(self.category), {})
+
+        invalid = self.client.post(self.url, {'ids': self.ids, 'action': 'set_status'}, format='json')
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncAssetViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='assincrono', password='senha-forte-3')
+        self.category = Category.objects.create(name='Servidores', owner=self.user)
+        self.field = FieldDefinition.objects.create(category=self.category, name='Rack', field_type='text')
+        for i in range(5):
+            asset = Asset.objects.create(patrimonio=f'SRV-{i:02}', category=self.category, owner=self.user)
+            AssetFieldValue.objects.create(asset=asset, field_definition=self.field, value=f'R{i % 2}')
+        self.asset = asset
+        response = self.client.post('/api/token/', {'username': 'assincrono', 'password': 'senha-forte-3'}, format='json')
+        self.access = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    # CT48: A listagem assíncrona devolve o mesmo JSON da síncrona, inclusive a paginação
+    def test_async_list_matches_sync(self):
+        params = {'category_id': self.category.id, 'page_size': 2}
+        sync_page = self.client.get('/api/assets/', params).json()
+        async_page = self.client.get('/api/async/assets/', params).json()
+        self.assertEqual(async_page['results'], sync_page['results'])
+
+        following = self.client.get(async_page['next']).json()
+        self.assertEqual(following['results'], self.client.get(sync_page['next']).json()['results'])
+
+        search = self.client.get('/api/async/assets/search/', {'q': 'R1'}).json()
+        self.assertEqual(len(search['results']), 2)
+        self.assertEqual(self.client.get('/api/async/assets/search/').status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CT49: Detalhe assíncrono com ETag (304) e 404; sem token volta 401
+    def test_async_detail(self):
+        url = f'/api/async/assets/{self.asset.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.json(), self.client.get(f'/api/assets/{self.asset.id}/').json())
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(self.client.get('/api/async/assets/999999/').status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.credentials()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # CT50: Pelo handler ASGI, a troca de papel também revoga o token
+    async def test_async_role_change(self):
+        headers = {'Authorization': f'Bearer {self.access}'}
+        response = await self.async_client.get('/api/async/assets/', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profile = await Profile.objects.aget(user=self.user)
+        await sync_to_async(profile.change_role)('editor')
+        response = await self.async_client.get('/api/async/assets/', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()['code'], 'role_changed')
+
+
+@override_settings(API_PROFILING=True, API_SLOW_REQUEST_MS=10000)
+class RequestProfilingTests(APITestCase):
+
+    def setUp(self):
+        reset_metrics()
+        self.admin = User.objects.create_user(username='metricas', password='123')
+        self.admin.profile.change_role('admin')
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Monitores', owner=self.admin)
+        Asset.objects.create(patrimonio='MON-01', category=self.category, owner=self.admin)
+
+    # CT51: Métricas por nome de rota em /api/metrics/, somente para administradores
+    def test_metrics_by_url_name(self):
+        self.client.get('/api/assets/')
+        self.client.get(f'/api/categories/{self.category.id}/')
+
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn('api_request_duration_seconds_count{method="GET",view="asset-list"} 1', body)
+        self.assertIn('api_request_db_queries_bucket{method="GET",view="category-detail",le="+Inf"} 1', body)
+        self.assertIn('api_response_size_bytes_sum{method="GET",view="asset-list"}', body)
+
+        viewer = User.objects.create_user(username='curioso', password='123')
+        self.client.force_authenticate(user=viewer)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+    # CT52: Requisições acima do limite são registradas com o SQL executado
+    @override_settings(API_SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged_with_sql(self):
+        with self.assertLogs('api.profiling', level='WARNING') as logs:
+            self.client.get('/api/assets/')
+        self.assertIn('asset-list', logs.output[0])
+        self.assertIn('api_asset', logs.output[0])
+
+    # CT85: No ASGI o middleware é assíncrono e mede as consultas do ORM assíncrono
+    async def test_async_view_is_profiled(self):
+        from asgiref.sync import iscoroutinefunction
+        from .profiling import RequestProfilingMiddleware
+
+        async def get_response(request):
+            return None
+        self.assertTrue(iscoroutinefunction(RequestProfilingMiddleware(get_response)))
+
+        await sync_to_async(self.admin.set_password)('senha-forte-5')
+        await self.admin.asave()
+        token = (await self.async_client.post(
+            '/api/token/', {'username': 'metricas', 'password': 'senha-forte-5'}, content_type='application/json'
+        )).json()['access']
+        response = await self.async_client.get('/api/async/assets/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        body = (await self.async_client.get('/api/metrics/', headers={'Authorization': f'Bearer {token}'})).content.decode()
+        self.assertIn('api_request_duration_seconds_count{method="GET",view="async-asset-list"} 1', body)
+        # A página de ativos, lida pelo ORM assíncrono, foi contada.
+        queries = next(line for line in body.splitlines()
+                       if line.startswith('api_request_db_queries_sum{method="GET",view="async-asset-list"}'))
+        self.assertGreaterEqual(int(queries.split()[-1]), 1)
+
+
+class SeedInventoryTests(APITestCase):
+
+    # CT53: O gerador cria categorias, campos, ativos e valores na escala pedida, mantendo os resumos
+    def test_seed_inventory_scale(self):
+        call_command('seed_inventory', categories=2, fields=3, assets=25, prefix='TESTE', stdout=io.StringIO())
+
+        self.assertEqual(Category.objects.filter(name__startswith='TESTE ').count(), 2)
+        self.assertEqual(FieldDefinition.objects.filter(category__name__startswith='TESTE ').count(), 6)
+        self.assertEqual(Asset.objects.filter(patrimonio__startswith='TESTE-').count(), 50)
+        self.assertEqual(AssetFieldValue.objects.count(), 150)
+        self.assertEqual(sum(AssetStatusCount.objects.values_list('count', flat=True)), 50)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Configuração específica do SQLite')
+class SQLitePerformanceModeTests(APITestCase):
+    """Usa um arquivo temporário: o banco de testes em memória não tem WAL nem locks entre conexões."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'stress.sqlite3')
+
+    def open(self, options, close_on_cleanup=True):
+        # Um ConnectionHandler próprio: não interfere nas conexões do banco de testes.
+        handler = ConnectionHandler({'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.path, 'OPTIONS': options}})
+        wrapper = handler['default']
+        if close_on_cleanup:
+            self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    # CT54: O modo de desempenho liga WAL, synchronous=NORMAL, cache, mmap e busy timeout
+    def test_pragmas_applied(self):
+        wrapper = self.open(settings.SQLITE_PERFORMANCE_OPTIONS)
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -65536)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), settings.SQLITE_PERFORMANCE_OPTIONS['timeout'] * 1000)
+
+    # CT55: Com o busy timeout, um escritor espera o outro terminar em vez de falhar com "database is locked"
+    def test_concurrent_writer_waits_for_lock(self):
+        setup = self.open(settings.SQLITE_PERFORMANCE_OPTIONS)
+        with setup.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, origem TEXT)')
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_write_lock():
+            # Conexões do Django só podem ser fechadas na thread que as criou.
+            holder = self.open(settings.SQLITE_PERFORMANCE_OPTIONS, close_on_cleanup=False)
+            try:
+                with holder.cursor() as cursor:
+                    cursor.execute('BEGIN IMMEDIATE')
+                    cursor.execute("INSERT INTO item (origem) VALUES ('thread')")
+                    locked.set()
+                    release.wait(5)
+                    time.sleep(0.2)
+                    cursor.execute('COMMIT')
+            finally:
+                holder.close()
+
+        thread = threading.Thread(target=hold_write_lock)
+        thread.start()
+        locked.wait(5)
+        try:
+            impatient = self.open({'timeout': 0})
+            with self.assertRaisesMessage(OperationalError, 'database is locked'):
+                with impatient.cursor() as cursor:
+                    cursor.execute("INSERT INTO item (origem) VALUES ('sem timeout')")
+
+            tuned = self.open(settings.SQLITE_PERFORMANCE_OPTIONS)
+            release.set()
+            with tuned.cursor() as cursor:
+                cursor.execute("INSERT INTO item (origem) VALUES ('principal')")
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.pragma(tuned, 'journal_mode'), 'wal')
+        with tuned.cursor() as cursor:
+            cursor.execute('SELECT origem FROM item ORDER BY id')
+            self.assertEqual([row[0] for row in cursor.fetchall()], ['thread', 'principal'])
+
+
+# No PostgreSQL os ids de AssetChange desfeitos pelos testes anteriores deixam
+# buracos recentes na sequência, que seguram o feed (AssetChange.settled_until).
+@override_settings(API_CHANGES_SETTLE_SECONDS=0)
+class FieldSnapshotTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='snapshot', password='123')
+        self.user.profile.role = 'editor'
+        self.user.profile.save()
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Nobreaks', owner=self.user)
+        self.fields = [
+            FieldDefinition.objects.create(category=self.category, name='Potência', field_type='number'),
+            FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text'),
+        ]
+        for i in range(3):
+            asset = Asset.objects.create(patrimonio=f'NB-{i}', category=self.category, owner=self.user)
+            for field in self.fields:
+                AssetFieldValue.objects.create(asset=asset, field_definition=field, value=f'{field.name} {i}')
+        Asset.objects.create(patrimonio='NB-vazio', category=self.category, owner=self.user)
+
+    # CT56: A listagem lê ativos e valores de uma única tabela, em uma consulta
+    def test_list_uses_single_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/assets/', {'category_id': self.category.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        asset_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "api_asset"' in q['sql']]
+        self.assertEqual(len(asset_queries), 1)
+        self.assertNotIn('api_assetfieldvalue', ' '.join(q['sql'] for q in ctx.captured_queries).lower())
+
+        by_patrimonio = {item['patrimonio']: item['field_values'] for item in response.data['results']}
+        self.assertEqual(by_patrimonio['NB-1'], [
+            {'field_definition': self.fields[0].id, 'value': 'Potência 1'},
+            {'field_definition': self.fields[1].id, 'value': 'Marca 1'},
+        ])
+        self.assertEqual(by_patrimonio['NB-vazio'], [])
+
+    # CT57: O detalhe tem o mesmo formato de antes
+    def test_detail_shape(self):
+        asset = Asset.objects.get(patrimonio='NB-0')
+        response = self.client.get(f'/api/assets/{asset.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['value'] for item in response.data['field_values']], ['Potência 0', 'Marca 0'])
+
+    # CT58: Criar e editar pela API mantém o snapshot igual aos valores gravados
+    def test_serializer_keeps_snapshot(self):
+        response = self.client.post('/api/assets/', {
+            'patrimonio': 'NB-novo', 'category': self.category.id,
+            'field_values': [{'field_definition': self.fields[1].id, 'value': 'SMS'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        asset = Asset.objects.get(pk=response.data['id'])
+        self.assertEqual(asset.field_snapshot, {str(self.fields[1].id): 'SMS'})
+
+        response = self.client.put(f'/api/assets/{asset.id}/', {
+            'patrimonio': 'NB-novo', 'category': self.category.id, 'status': 'em_uso',
+            'field_values': [{'field_definition': self.fields[0].id, 'value': '1500'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        asset.refresh_from_db()
+        self.assertEqual(asset.field_snapshot, {str(self.fields[0].id): '1500'})
+        self.assertEqual(list(asset.field_values.values_list('value', flat=True)), ['1500'])
+        self.assertEqual(list(snapshots.find_drift()), [])
+
+    # CT59: Apagar um campo tira o valor dele do snapshot
+    def test_field_delete_updates_snapshot(self):
+        self.fields[1].delete()
+        response = self.client.get('/api/assets/', {'category_id': self.category.id})
+        values = [item['field_values'] for item in response.data['results'] if item['patrimonio'] == 'NB-0']
+        self.assertEqual(values, [[{'field_definition': self.fields[0].id, 'value': 'Potência 0'}]])
+
+    # CT60: check_field_snapshots encontra a divergência e, com --repair, corrige
+    def test_check_command_repairs_drift(self):
+        asset = Asset.objects.get(patrimonio='NB-2')
+        AssetFieldValue.objects.filter(asset=asset, field_definition=self.fields[1]).update(value='Alterado')
+        with self.assertRaises(CommandError):
+            call_command('check_field_snapshots', stdout=io.StringIO())
+
+        call_command('check_field_snapshots', repair=True, stdout=io.StringIO())
+        response = self.client.get(f'/api/assets/{asset.id}/')
+        self.assertEqual(response.data['field_values'][1]['value'], 'Alterado')
+        self.assertEqual(list(snapshots.find_drift()), [])
+        self.assertTrue(AssetChange.objects.filter(asset_id=asset.id, action=AssetChange.UPSERT).exists())
+
+    # CT86: Gravar ou apagar um valor fora da API atualiza o snapshot, o ETag e o feed de alterações
+    def test_direct_value_writes_reach_readers(self):
+        asset = Asset.objects.get(patrimonio='NB-0')
+        url = f'/api/assets/{asset.id}/'
+        detail, listing = self.client.get(url), self.client.get('/api/assets/', {'category_id': self.category.id})
+        since = AssetChange.latest_token()
+
+        value = AssetFieldValue.objects.get(asset=asset, field_definition=self.fields[1])
+        value.value = 'Editado no admin'
+        value.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['field_values'][1]['value'], 'Editado no admin')
+        self.assertEqual(self.client.get('/api/assets/', {'category_id': self.category.id},
+                                         HTTP_IF_NONE_MATCH=listing['ETag']).status_code, status.HTTP_200_OK)
+        changes = self.client.get('/api/assets/changes/', {'since': since}).data
+        self.assertEqual([item['id'] for item in changes['changed']], [asset.id])
+
+        value.delete()
+        self.assertEqual([item['field_definition'] for item in self.client.get(url).data['field_values']],
+                         [self.fields[0].id])
+        self.assertEqual(list(snapshots.find_drift()), [])
+
+    # CT87: Duas gravações com o ativo antigo em memória não apagam a chave uma da outra
+    def test_stale_asset_instance_keeps_other_keys(self):
+        asset = Asset.objects.get(patrimonio='NB-vazio')
+        first = AssetFieldValue(asset=asset, field_definition=self.fields[0], value='1500')
+        second = AssetFieldValue(asset=asset, field_definition=self.fields[1], value='APC')
+        first.save()
+        second.save()
+        asset.refresh_from_db()
+        self.assertEqual(asset.field_snapshot, {str(self.fields[0].id): '1500', str(self.fields[1].id): 'APC'})
+
+
+class LoginTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='porteiro', password='senha-forte-4')
+        self.user.profile.change_role('editor')
+
+    def login(self):
+        response = self.client.post('/api/token/', {'username': 'porteiro', 'password': 'senha-forte-4'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    # CT61: O login busca usuário e perfil em uma consulta e os dois tokens levam o papel
+    def test_login_single_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            tokens = self.login()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('api_profile', ctx.captured_queries[0]['sql'])
+
+        for token in (AccessToken(tokens['access']), RefreshToken(tokens['refresh'])):
+            self.assertEqual(token['role'], 'editor')
+            self.assertEqual(token['role_version'], 1)
+            self.assertEqual(token['username'], 'porteiro')
+
+    # CT62: Senha gravada com outro algoritmo ou outro custo é regravada no login
+    def test_login_rehashes_password(self):
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            self.user.set_password('senha-forte-4')
+            self.user.save()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+        hashers = ['api.hashers.PBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+        with override_settings(PASSWORD_HASHERS=hashers, PBKDF2_ITERATIONS=1000):
+            self.login()
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with override_settings(PASSWORD_HASHERS=hashers, PBKDF2_ITERATIONS=2000):
+            self.login()
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    # CT63: Senha errada e usuário inexistente recebem a mesma resposta
+    def test_login_failures(self):
+        for username, password in (('porteiro', 'errada'), ('ninguem', 'senha-forte-4')):
+            response = self.client.post('/api/token/', {'username': username, 'password': password}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BackgroundJobTests(APITestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.editor = User.objects.create_user(username='tarefeiro', password='123')
+        self.editor.profile.role = 'editor'
+        self.editor.profile.save()
+        self.client.force_authenticate(user=self.editor)
+        self.category = Category.objects.create(name='Projetores', owner=self.editor)
+        self.brand = FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text')
+        self.assets = [
+            Asset.objects.create(patrimonio=f'PRJ-{i}', category=self.category, owner=self.editor) for i in range(3)
+        ]
+
+    def run_worker(self):
+        call_command('run_jobs', once=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+    # CT64: Exportação em segundo plano responde 202 e o arquivo é baixado quando a tarefa termina
+    def test_background_export(self):
+        response = self.client.get(f'/api/assets/export/?category_id={self.category.id}&background=1')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        self.assertTrue(response['Location'].endswith(f"/api/jobs/{response.data['id']}/"))
+
+        self.run_worker()
+        job = self.client.get(f"/api/jobs/{response.data['id']}/").data
+        self.assertEqual((job['status'], job['progress'], job['total'], job['percent']), (Job.SUCCEEDED, 3, 3, 100))
+        download = self.client.get(f"/api/jobs/{job['id']}/download/")
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(io.StringIO(b''.join(download.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual([row[1] for row in rows[1:]], ['PRJ-0', 'PRJ-1', 'PRJ-2'])
+
+    # CT65: Importação em segundo plano grava os ativos no worker e o relatório fica na tarefa
+    def test_background_import(self):
+        response = self.client.post('/api/assets/bulk-import/?background=1', {
+            'category': self.category.id,
+            'file': SimpleUploadedFile('lote.csv', 'patrimonio,Marca\nPRJ-10,Epson\nPRJ-0,Sony\n'.encode()),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Asset.objects.filter(patrimonio='PRJ-10').exists())
+
+        self.run_worker()
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.result['created'], job.result['error_count']), (1, 1))
+        self.assertEqual(Asset.objects.get(patrimonio='PRJ-10').field_snapshot, {str(self.brand.id): 'Epson'})
+
+    # CT66: Em segundo plano o lote aceita mais ids que o limite síncrono
+    def test_background_batch(self):
+        ids = [asset.id for asset in self.assets] + list(range(10_000, 10_000 + BATCH_MAX_IDS))
+        payload = {'ids': ids, 'action': 'set_status', 'status': 'manutencao'}
+        response = self.client.post('/api/assets/batch/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/assets/batch/', payload, format='json', HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.run_worker()
+        progress = self.client.get(f"/api/jobs/{response.data['id']}/progress/").data
+        self.assertEqual(progress['status'], Job.SUCCEEDED)
+        self.assertEqual(progress['total'], len(ids))
+        self.assertEqual(set(Asset.objects.values_list('status', flat=True)), {'manutencao'})
+
+    # CT67: Cancelar na fila impede a execução; cancelar uma tarefa já terminada é recusado
+    def test_cancel_queued_job(self):
+        job_id = self.client.get(f'/api/assets/export/?category_id={self.category.id}&background=1').data['id']
+        response = self.client.post(f'/api/jobs/{job_id}/cancel/')
+        self.assertEqual((response.status_code, response.data['status']), (status.HTTP_200_OK, Job.CANCELLED))
+
+        self.run_worker()
+        self.assertEqual(Job.objects.get(pk=job_id).status, Job.CANCELLED)
+        self.assertEqual(self.client.post(f'/api/jobs/{job_id}/cancel/').status_code, status.HTTP_409_CONFLICT)
+
+    # CT68: Cancelar durante a execução interrompe a tarefa no próximo registro de andamento
+    def test_cancel_running_job(self):
+        def slow(job, context):
+            context.progress(1, 10)
+            jobs.cancel(job.pk)
+            context.progress(2, 10)
+            return {'done': True}
+
+        job = jobs.enqueue(Job.ASSET_BATCH, {}, self.editor.id)
+        with patch.dict(jobs.HANDLERS, {Job.ASSET_BATCH: slow}):
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.result), (Job.CANCELLED, 1, None))
+
+    # CT69: Falhas são repetidas com espera crescente até o limite de tentativas
+    def test_retry_with_backoff(self):
+        def broken(job, context):
+            raise OperationalError('database is locked')
+
+        job = jobs.enqueue(Job.ASSET_BATCH, {}, self.editor.id)
+        with patch.dict(jobs.HANDLERS, {Job.ASSET_BATCH: broken}), self.assertLogs('api.jobs', 'ERROR'):
+            self.run_worker()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+            self.assertIn('database is locked', job.error)
+            self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=settings.JOB_RETRY_BASE_DELAY - 1))
+
+            # Ainda esperando: o worker não pega a tarefa antes de run_after.
+            self.run_worker()
+            self.assertEqual(Job.objects.get(pk=job.pk).attempts, 1)
+
+            for attempt in (2, 3):
+                Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                self.run_worker()
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(jobs.backoff(2), settings.JOB_RETRY_BASE_DELAY * 2)
+
+    # CT70: Cada usuário só acompanha as próprias tarefas
+    def test_jobs_are_private(self):
+        job = jobs.enqueue(Job.ASSET_EXPORT, {}, self.editor.id)
+        other = User.objects.create_user(username='curioso', password='123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/jobs/').data['results'], [])
+
+
+@override_settings(PURGE_CHUNK_SIZE=2, PURGE_CHUNK_PAUSE=0)
+class SoftDeletePurgeTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='faxineiro', password='123')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+        self.client.force_authenticate(user=self.admin)
+        self.category = Category.objects.create(name='Roteadores', owner=self.admin)
+        self.brand = FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text')
+        self.ports = FieldDefinition.objects.create(category=self.category, name='Portas', field_type='number')
+        for i in range(5):
+            self.client.post('/api/assets/', {
+                'patrimonio': f'RT-{i}', 'category': self.category.id,
+                'field_values': [
+                    {'field_definition': self.brand.id, 'value': f'Mikrotik {i}'},
+                    {'field_definition': self.ports.id, 'value': '8'},
+                ],
+            }, format='json')
+        self.other = Category.objects.create(name='Switches', owner=self.admin)
+        Asset.objects.create(patrimonio='SW-1', category=self.other, owner=self.admin)
+
+    def run_worker(self):
+        call_command('run_jobs', once=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+    # CT71: Excluir a categoria a esconde na hora (com os ativos) e o expurgo apaga tudo em lotes
+    def test_category_soft_delete_and_purge(self):
+        response = self.client.delete(f'/api/categories/{self.category.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(Asset.objects.filter(category=self.category).count(), 5)
+
+        self.assertEqual([item['name'] for item in self.client.get('/api/categories/').data['results']], ['Switches'])
+        self.assertEqual([item['patrimonio'] for item in self.client.get('/api/assets/').data['results']], ['SW-1'])
+        self.assertEqual(self.client.get('/api/stats/').data['total'], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_worker()
+        asset_deletes = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE FROM "api_asset" ')]
+        self.assertEqual(len(asset_deletes), 3)
+
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.progress, job.total, job.result), (Job.SUCCEEDED, 5, 5, {'deleted_assets': 5}))
+        self.assertFalse(Category.all_objects.filter(pk=self.category.id).exists())
+        self.assertFalse(AssetFieldValue.objects.filter(field_definition__category_id=self.category.id).exists())
+        self.assertEqual(AssetChange.objects.filter(category_id=self.category.id, action=AssetChange.DELETE).count(), 5)
+
+    # CT72: Excluir um campo o esconde na hora; o expurgo tira os valores e o snapshot dos ativos
+    def test_field_soft_delete_and_purge(self):
+        response = self.client.delete(f'/api/fields/{self.brand.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        fields = self.client.get(f'/api/categories/{self.category.id}/fields/').data
+        self.assertEqual([field['name'] for field in fields], ['Portas'])
+
+        self.run_worker()
+        self.assertFalse(FieldDefinition.all_objects.filter(pk=self.brand.id).exists())
+        self.assertFalse(AssetFieldValue.objects.filter(field_definition_id=self.brand.id).exists())
+        asset = self.client.get('/api/assets/', {'category_id': self.category.id}).data['results'][0]
+        self.assertEqual(asset['field_values'], [{'field_definition': self.ports.id, 'value': '8'}])
+        self.assertEqual(self.client.get('/api/assets/', {'q': 'Mikrotik'}).data['results'], [])
+
+    # CT98: O campo excluído some dos ativos (valores, colunas, busca) antes do expurgo
+    def test_field_hidden_from_assets_before_purge(self):
+        url = '/api/assets/'
+        listing = self.client.get(url, {'category_id': self.category.id})
+        response = self.client.delete(f'/api/fields/{self.brand.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        response = self.client.get(url, {'category_id': self.category.id}, HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for asset in response.data['results']:
+            self.assertEqual(asset['field_values'], [{'field_definition': self.ports.id, 'value': '8'}])
+        asset_id = response.data['results'][0]['id']
+        self.assertEqual(self.client.get(f'{url}{asset_id}/').data['field_values'],
+                         [{'field_definition': self.ports.id, 'value': '8'}])
+        columns = self.client.get(url, {'category_id': self.category.id, 'layout': 'columnar'}).data['results']
+        self.assertNotIn(f'field_{self.brand.id}', columns)
+        self.assertEqual(self.client.get(url, {'q': 'Mikrotik'}).data['results'], [])
+        self.assertTrue(AssetFieldValue.objects.filter(field_definition_id=self.brand.id).exists())
+
+    # CT73: O nome de uma categoria excluída pode ser reutilizado; o de uma ativa, não
+    def test_category_name_reuse(self):
+        response = self.client.post('/api/categories/', {'name': 'Roteadores'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.delete(f'/api/categories/{self.category.id}/')
+        response = self.client.post('/api/categories/', {'name': 'Roteadores'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        call_command('purge_deleted', stdout=io.StringIO())
+        self.assertEqual(list(Category.all_objects.filter(name='Roteadores').values_list('id', flat=True)),
+                         [response.data['id']])
+
+    # CT88: Sem worker (PURGE_IN_BACKGROUND=0), a exclusão expurga na própria requisição
+    @override_settings(PURGE_IN_BACKGROUND=False)
+    def test_inline_purge_without_worker(self):
+        response = self.client.delete(f'/api/categories/{self.category.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Category.all_objects.filter(pk=self.category.id).exists())
+        self.assertFalse(Asset.objects.filter(category_id=self.category.id).exists())
+        self.assertFalse(Job.objects.exists())
+
+    # CT89: O expurgo não pode ser cancelado e continua sendo repetido depois de max_attempts falhas
+    def test_purge_is_not_cancellable_and_always_retried(self):
+        job_id = self.client.delete(f'/api/categories/{self.category.id}/').data['id']
+        response = self.client.post(f'/api/jobs/{job_id}/cancel/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(jobs.cancel(job_id))
+
+        job = Job.objects.get(pk=job_id)
+        job.attempts = job.max_attempts
+        job.status = Job.RUNNING
+        job.save()
+        jobs.retry_or_fail(job, 'OperationalError: database is locked')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    # CT90: Operações em lote tratam os ativos de uma categoria excluída como inexistentes
+    def test_batch_ignores_hidden_assets(self):
+        hidden = Asset.objects.get(patrimonio='RT-0')
+        visible = Asset.objects.get(patrimonio='SW-1')
+        self.client.delete(f'/api/categories/{self.category.id}/')
+        response = self.client.post('/api/assets/batch/', {
+            'ids': [hidden.id, visible.id], 'action': 'set_status', 'status': 'em_uso',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'id': hidden.id, 'result': 'not_found'}, {'id': visible.id, 'result': 'updated'},
+        ])
+        hidden.refresh_from_db()
+        self.assertEqual(hidden.status, 'disponivel')
+
+
+class ResponseEncodingTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='compacto', password='123')
+        self.user.profile.change_role('editor')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Impressoras', owner=self.user)
+        self.model = FieldDefinition.objects.create(category=self.category, name='Modelo', field_type='text')
+        for i in range(30):
+            Asset.objects.create(patrimonio=f'IMP-{i}', category=self.category, owner=self.user,
+                                 field_snapshot={str(self.model.id): f'Laser Ação {i}'})
+
+    # CT74: O renderer orjson gera o mesmo JSON do DRF; o parser recusa JSON inválido com 400
+    def test_orjson_renderer_and_parser(self):
+        from decimal import Decimal
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONParser, ORJSONRenderer
+
+        data = {'preço': Decimal('10.50'), 'quando': timezone.now(), 'texto': gettext_lazy('Ativo'), 1: [None, True]}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO('{"nome": "Ação"}'.encode())), {'nome': 'Ação'})
+
+        response = self.client.generic('POST', '/api/assets/', '{"patrimonio": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CT75: A listagem sai em gzip quando o cliente aceita; o ETag fraco continua revalidando
+    def test_gzip_negotiation_and_etag(self):
+        import gzip
+        plain = self.client.get('/api/assets/', {'category_id': self.category.id})
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        compressed = self.client.get('/api/assets/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), plain.json())
+
+        self.assertEqual(compressed['ETag'], 'W/' + plain['ETag'])
+        revalidated = self.client.get('/api/assets/', {'category_id': self.category.id},
+                                      HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        refused = self.client.get('/api/assets/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(refused.has_header('Content-Encoding'))
+
+    # CT76: Exportações em streaming também são comprimidas
+    def test_streaming_export_is_compressed(self):
+        import gzip
+        url = f'/api/assets/export/?category_id={self.category.id}&file_format=jsonl'
+        plain = b''.join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    # CT77: Com o pacote brotli instalado, "br" tem preferência sobre gzip
+    @skipUnless(compression.brotli, 'brotli não instalado')
+    def test_brotli(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(compression.negotiate('gzip;q=1, br;q=0.5'), 'gzip')
+
+        plain = self.client.get('/api/assets/', {'category_id': self.category.id})
+        response = self.client.get('/api/assets/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(compression.brotli.decompress(response.content)), plain.json())
+
+        url = f'/api/assets/export/?category_id={self.category.id}&file_format=csv'
+        streamed = self.client.get(url, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(compression.brotli.decompress(b''.join(streamed.streaming_content)),
+                         b''.join(self.client.get(url).streaming_content))
+
+    # CT91: Escolha do codificador com e sem o brotli (um módulo falso no lugar do pacote)
+    def test_encoder_selection(self):
+        class FakeCompressor:
+            def __init__(self, quality):
+                self.zlib = zlib.compressobj()
+
+            def process(self, data):
+                return self.zlib.compress(data)
+
+            def finish(self):
+                return self.zlib.flush()
+
+        fake = SimpleNamespace(compress=lambda data, quality: zlib.compress(data), Compressor=FakeCompressor)
+        plain = self.client.get('/api/assets/', {'category_id': self.category.id})
+        url = f'/api/assets/export/?category_id={self.category.id}&file_format=csv'
+
+        with patch.object(compression, 'brotli', None), patch.object(compression, 'SUPPORTED_ENCODINGS', ('gzip',)):
+            self.assertIsNone(compression.negotiate('br'))
+            response = self.client.get('/api/assets/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='br')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.json(), plain.json())
+
+        with patch.object(compression, 'brotli', fake), patch.object(compression, 'SUPPORTED_ENCODINGS', ('br', 'gzip')):
+            self.assertEqual(compression.negotiate('gzip, br'), 'br')
+            response = self.client.get('/api/assets/', {'category_id': self.category.id}, HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertTrue(response['ETag'].startswith('W/'))
+            self.assertEqual(json.loads(zlib.decompress(response.content)), plain.json())
+
+            streamed = self.client.get(url, HTTP_ACCEPT_ENCODING='br')
+            self.assertEqual(streamed['Content-Encoding'], 'br')
+            self.assertEqual(zlib.decompress(b''.join(streamed.streaming_content)),
+                             b''.join(self.client.get(url).streaming_content))
+
+
+class SparseFieldsetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='enxuto', password='senha-forte-4')
+        self.category = Category.objects.create(name='Monitores', owner=self.user)
+        self.brand = FieldDefinition.objects.create(category=self.category, name='Marca', field_type='text')
+        self.size = FieldDefinition.objects.create(category=self.category, name='Polegadas', field_type='number')
+        for i in range(3):
+            snapshot = {str(self.brand.id): f'Marca {i}'}
+            if i:
+                snapshot[str(self.size.id)] = str(20 + i)
+            Asset.objects.create(patrimonio=f'MON-{i}', category=self.category, owner=self.user,
+                                 field_snapshot=snapshot)
+        response = self.client.post('/api/token/', {'username': 'enxuto', 'password': 'senha-forte-4'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def get(self, url='/api/assets/', **params):
+        return self.client.get(url, {'category_id': self.category.id, **params})
+
+    # CT78: ?fields= devolve só os atributos pedidos (mais o id) e a consulta lê só essas colunas
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(fields='patrimonio,status')
+        self.assertEqual(response.data['results'][0], {'id': response.data['results'][0]['id'],
+                                                       'patrimonio': 'MON-0', 'status': 'disponivel'})
+        select = next(q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT "api_asset"."id"'))
+        self.assertNotIn('field_snapshot', select)
+        self.assertNotIn('owner_id', select)
+
+        asset_id = response.data['results'][0]['id']
+        self.assertEqual(set(self.client.get(f'/api/assets/{asset_id}/', {'fields': 'owner'}).data), {'id', 'owner'})
+        response = self.get(fields='patrimonio,senha')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('senha', response.data['fields'])
+
+    # CT79: ?field_defs= filtra os valores personalizados; vazio dispensa o snapshot
+    def test_field_defs(self):
+        results = self.get(field_defs=str(self.size.id)).data['results']
+        self.assertEqual([asset['field_values'] for asset in results],
+                         [[], [{'field_definition': self.size.id, 'value': '21'}],
+                          [{'field_definition': self.size.id, 'value': '22'}]])
+
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.get(field_defs='').data['results']
+        self.assertEqual({len(asset['field_values']) for asset in results}, {0})
+        self.assertFalse(any('field_snapshot' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(self.get(field_defs='1,x').status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CT80: ?layout=columnar traz um cabeçalho e uma lista por coluna, com a mesma paginação
+    def test_columnar_layout(self):
+        rows = self.get(page_size=2).data
+        columnar = self.get(page_size=2, layout='columnar', fields='patrimonio,updated_at,field_values').data
+        self.assertEqual(columnar['next'] is None, rows['next'] is None)
+        results = columnar['results']
+        self.assertEqual(results['columns'],
+                         ['id', 'patrimonio', 'updated_at', f'field_{self.brand.id}', f'field_{self.size.id}'])
+        self.assertEqual(results['values'][:3], [
+            [asset['id'] for asset in rows['results']],
+            ['MON-0', 'MON-1'],
+            [asset['updated_at'] for asset in rows['results']],
+        ])
+        self.assertEqual(results['values'][3:], [['Marca 0', 'Marca 1'], [None, '21']])
+
+        narrow = self.get(layout='columnar', fields='status', field_defs=str(self.size.id)).data['results']
+        self.assertEqual(narrow['columns'], ['id', 'status'])
+        self.assertEqual(self.get(layout='tabela').status_code, status.HTTP_400_BAD_REQUEST)
+
+    # CT81: As leituras assíncronas aceitam as mesmas opções
+    def test_async_views(self):
+        params = {'fields': 'patrimonio,field_values', 'field_defs': str(self.brand.id)}
+        self.assertEqual(self.get('/api/async/assets/', **params).json(), self.get(**params).json())
+        params['layout'] = 'columnar'
+        self.assertEqual(self.get('/api/async/assets/', **params).json(), self.get(**params).json())
+        self.assertEqual(self.get('/api/async/assets/', fields='x').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Específico do PostgreSQL (tsvector e pool do psycopg)')
+class PostgresBackendTests(APITestCase):
+    """
+    Pulados no SQLite padrão. Rode a suíte com DJANGO_DB_ENGINE=postgresql
+    apontando para um PostgreSQL local (ou veja o job "postgresql" do CI).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='postgres', password='123')
+        self.user.profile.change_role('editor')
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(name='Nobreaks', owner=self.user)
+        self.place = FieldDefinition.objects.create(category=self.category, name='Local', field_type='text')
+        for patrimonio, place in (('NB-1', 'Sala de Manutenção'), ('NB-2', 'Depósito Central')):
+            self.client.post('/api/assets/', {
+                'patrimonio': patrimonio, 'category': self.category.id,
+                'field_values': [{'field_definition': self.place.id, 'value': place}],
+            }, format='json')
+
+    def search(self, text):
+        return sorted(asset['patrimonio'] for asset in self.client.get('/api/assets/', {'q': text}).data['results'])
+
+    # CT83: A busca usa o tsvector com índice GIN e ignora acentos como o FTS5 do SQLite
+    def test_tsvector_search_folds_accents(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.search('manutencao'), ['NB-1'])
+        self.assertTrue(any("to_tsquery('simple'" in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(self.search('DEPÓSITO cent'), ['NB-2'])
+        self.assertEqual(self.search('Manutenção deposito'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT document::text FROM api_asset_search ORDER BY asset_id")
+            self.assertIn("'manutencao'", cursor.fetchone()[0])
+
+    # CT84: As conexões vêm do pool configurado e voltam para ele ao fechar
+    def test_connection_pool(self):
+        pool_settings = settings.DATABASES['default']['OPTIONS'].get('pool')
+        if not pool_settings:
+            self.skipTest('Pool desligado (DJANGO_DB_POOL=0)')
+        pool = connection.pool
+        self.assertEqual((pool.min_size, pool.max_size), (pool_settings['min_size'], pool_settings['max_size']))
+
+        errors = []
+
+        def worker():
+            try:
+                with connections['default'].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(pool.max_size * 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(pool.get_stats()['pool_size'], pool.max_size)
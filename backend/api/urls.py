@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     CategoryViewSet, 
     AssetViewSet, 
@@ -12,11 +13,15 @@ from .views import (
     CreateUserView, 
     CustomTokenObtainPairView,
     UserDetailView,
+    InventoryStatsView,
+    MetricsView,
+    JobViewSet,
 )
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'assets', AssetViewSet, basename='asset')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -35,4 +40,12 @@ urlpatterns = [
     # Rota para ver usuários na tab admin
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
     path('users/<int:pk>/update-role/', UserRoleUpdateView.as_view(), name='user-update-role'),
+    # Contagem de ativos por categoria e status (dashboard)
+    path('stats/', InventoryStatsView.as_view(), name='inventory-stats'),
+    # Métricas por rota coletadas pelo middleware de profiling (somente admins)
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    # Leituras de ativos assíncronas, para o servidor ASGI (ver api/async_views.py)
+    path('async/assets/', async_views.asset_list, name='async-asset-list'),
+    path('async/assets/search/', async_views.asset_search, name='async-asset-search'),
+    path('async/assets/<int:pk>/', async_views.asset_detail, name='async-asset-detail'),
 ]
\ No newline at end of file
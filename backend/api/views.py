@@ -1,25 +1,46 @@
+import os
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import check_password, make_password
+from django.db.models import Prefetch
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
 from rest_framework import generics, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import (
     CreateUserSerializer,
     CategorySerializer,
     AssetSerializer,
+    AssetBatchSerializer,
+    JobSerializer,
     AdminUserSerializer,
     UserProfileSerializer,
     FieldDefinitionSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
 )
 
 # Importa as classes de permissão do DRF.
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
 # Importa os modelos do banco de dados.
-from .models import Asset, Category, FieldDefinition
-from .permissions import IsAdminUser, IsAdminOrEditorUser
+from .models import Asset, AssetChange, AssetStatusCount, Category, FieldDefinition, Job
+from .permissions import IsAdminUser, IsAdminOrEditorUser, get_role
+from . import jobs, purge
+from .filters import filter_by_field_values
+from .importers import AssetImporter
+from .batch import AssetBatch
+from .exporters import EXPORTERS, field_columns
+from .search import search_assets
+from .profiling import render_metrics
+from .pagination import KeysetCursorPagination
+from .caching import ALL_CATEGORIES, cached_response, compute_etag, conditional_response, get_asset_watermark
 
 # --- View para criação de novos usuários ---
 # generics.CreateAPIView é uma view genérica que fornece apenas a funcionalidade de POST (criação).
@@ -40,6 +61,9 @@ class CreateUserView(generics.CreateAPIView):
 class CategoryViewSet(viewsets.ModelViewSet):
     # O serializer a ser usado para as categorias.
     serializer_class = CategorySerializer
+    pagination_class = KeysetCursorPagination
+    # Ordenação usada pela paginação por cursor (ver api/pagination.py).
+    cursor_ordering = ('id',)
 
     # Sobrescreve o método que retorna o queryset.
     def get_queryset(self):
@@ -49,7 +73,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
         # Isso impede que um usuário veja as categorias de outro.
         # return Category.objects.filter(owner=self.request.user)
 
-        return Category.objects.all()
+        queryset = Category.objects.all()
+        # Leituras serializam os campos aninhados: busca todas as definições
+        # de campo da página em uma única consulta, em vez de uma por categoria.
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.only('id', 'name', 'owner_id').prefetch_related(
+                Prefetch(
+                    'field_definitions',
+                    queryset=FieldDefinition.objects.only('id', 'name', 'field_type', 'category_id'),
+                )
+            )
+        return queryset
 
     def get_permissions(self):
         # Apenas Admins podem criar, editar ou deletar
@@ -60,27 +94,128 @@ class CategoryViewSet(viewsets.ModelViewSet):
             self.permission_classes = [IsAuthenticated]
         return super().get_permissions()
 
+    # Leituras servidas do cache (com ETag); invalidado pelos signals de Category/FieldDefinition.
+    def list(self, request, *args, **kwargs):
+        build = partial(super().list, request, *args, **kwargs)
+        return cached_response(request, ALL_CATEGORIES, build)
+
+    def retrieve(self, request, *args, **kwargs):
+        build = partial(super().retrieve, request, *args, **kwargs)
+        return cached_response(request, kwargs['pk'], build)
+
     # Ao criar, associa o owner (pode ser útil saber quem criou em uma feature futura)
+    # Usa o id: com JWT, request.user é montado a partir do token e não é uma instância de User.
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        serializer.save(owner_id=self.request.user.id)
+
+    # A categoria some na hora; os ativos dela são apagados em lotes por uma
+    # tarefa em segundo plano (ver api/purge.py), acompanhada em /api/jobs/<id>/.
+    def destroy(self, request, *args, **kwargs):
+        return destroy_in_stages(request, self.get_object())
+
+
+def wants_background(request):
+    """O cliente pediu a operação em segundo plano (?background=1 ou cabeçalho Prefer: respond-async)."""
+    if request.query_params.get('background', '').lower() in ('1', 'true'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+def accepted(request, job):
+    """Resposta 202 de uma operação enviada para a fila: a tarefa e onde acompanhá-la."""
+    location = request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+def destroy_in_stages(request, instance):
+    """Exclusão de categoria/campo: 202 com o expurgo na fila ou, sem worker (PURGE_IN_BACKGROUND=0), 204."""
+    if not settings.PURGE_IN_BACKGROUND:
+        purge.purge_now(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return accepted(request, purge.schedule_purge(instance, request.user.id))
 
 
 # --- ViewSet para o modelo Asset ---
 class AssetViewSet(viewsets.ModelViewSet):
     serializer_class = AssetSerializer
+    pagination_class = KeysetCursorPagination
+    # O `id` desempata ativos criados no mesmo instante.
+    cursor_ordering = ('created_at', 'id')
+
+    # Colunas do modelo lidas por cada atributo do AssetSerializer (ver for_reading).
+    READ_COLUMNS = {'category': 'category_id', 'owner': 'owner_id', 'field_values': 'field_snapshot'}
 
     def get_queryset(self):
         # Todos os usuários logados podem ver todos os ativos
-        queryset = Asset.objects.all()
+        queryset = Asset.objects.visible()
+        if self.action in ['list', 'retrieve']:
+            options = self.read_options(self.request.query_params)
+            queryset = self.for_reading(queryset, options.get('fields'), options.get('field_defs'))
+        return self.apply_filters(queryset, self.request.query_params)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            context.update(self.read_options(self.request.query_params))
+        return context
+
+    @staticmethod
+    def apply_filters(queryset, query_params):
         # Permite filtrar por categoria, como antes
-        category_id = self.request.query_params.get('category_id')
+        category_id = query_params.get('category_id')
         if category_id:
             queryset = queryset.filter(category_id=category_id)
+        asset_status = query_params.get('status')
+        if asset_status:
+            queryset = queryset.filter(status=asset_status)
+        # Filtros por campos personalizados (?field_<id>__gt=...), resolvidos no banco.
+        queryset = filter_by_field_values(queryset, query_params)
+        # Busca textual no patrimônio e nos valores dos campos (?q=...), pelo índice invertido.
+        text = query_params.get('q')
+        if text:
+            queryset = search_assets(queryset, text)
         return queryset
 
+    @staticmethod
+    def read_options(query_params):
+        """
+        Opções das leituras, passadas ao AssetSerializer pelo contexto:
+        ?fields=patrimonio,status (atributos; o `id` sempre vem),
+        ?field_defs=3,7 (campos personalizados em `field_values`; vazio = nenhum)
+        e ?layout=columnar (listagem em colunas, ver AssetSerializer.to_columns).
+        """
+        options = {'layout': query_params.get('layout', 'rows')}
+        if options['layout'] not in ('rows', 'columnar'):
+            raise ValidationError({'layout': "Use 'rows' ou 'columnar'."})
+        if 'fields' in query_params:
+            fields = [name.strip() for name in query_params['fields'].split(',') if name.strip()]
+            unknown = sorted(set(fields) - set(AssetSerializer.Meta.fields))
+            if unknown:
+                raise ValidationError({'fields': f"Atributos desconhecidos: {', '.join(unknown)}."})
+            options['fields'] = ['id', *(name for name in fields if name != 'id')]
+        if 'field_defs' in query_params:
+            ids = [item.strip() for item in query_params['field_defs'].split(',') if item.strip()]
+            if not all(item.isdigit() for item in ids):
+                raise ValidationError({'field_defs': 'Informe ids de campos separados por vírgula.'})
+            options['field_defs'] = [int(item) for item in ids]
+        return options
+
+    @classmethod
+    def for_reading(cls, queryset, fields=None, field_defs=None):
+        # Os valores dos campos vêm de `field_snapshot`, na própria linha do
+        # ativo: listar e detalhar leem uma única tabela. Com ?fields= (ou
+        # ?field_defs= vazio) só as colunas usadas; `id` e `created_at` sempre,
+        # pois o cursor da paginação é montado com eles.
+        names = AssetSerializer.Meta.fields if fields is None else fields
+        if field_defs == []:
+            names = [name for name in names if name != 'field_values']
+        columns = ['id', 'created_at']
+        columns += [cls.READ_COLUMNS.get(name, name) for name in names if name not in columns]
+        return queryset.only(*columns)
+
     def get_permissions(self):
         # Admins e Editores podem criar, editar ou deletar
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'batch']:
             self.permission_classes = [IsAdminOrEditorUser]
         # Qualquer usuário logado pode ver
         else:
@@ -88,7 +223,164 @@ class AssetViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        serializer.save(owner_id=self.request.user.id)
+
+    # Leituras condicionais: o ETag sai da marca d'água da categoria (listagem,
+    # lida do feed de alterações) ou do `updated_at` do ativo (detalhe), então
+    # o 304 não lista os ativos nem executa o serializer.
+    def list(self, request, *args, **kwargs):
+        category_id = request.query_params.get('category_id', '')
+        watermark, last_modified = get_asset_watermark(category_id if category_id.isdigit() else None)
+        etag = compute_etag([request.get_full_path(), watermark])
+        if self.read_options(request.query_params)['layout'] == 'columnar':
+            build = partial(self.list_columnar, request)
+        else:
+            build = partial(super().list, request, *args, **kwargs)
+        return conditional_response(request, etag, last_modified, build)
+
+    def list_columnar(self, request):
+        # Mesma paginação da listagem; `results` traz as colunas em vez dos ativos.
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(self.get_serializer().to_columns(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        build = partial(super().retrieve, request, *args, **kwargs)
+        pk = kwargs['pk']
+        updated_at = Asset.objects.visible().filter(pk=pk).values_list(
+            'updated_at', flat=True
+        ).first() if pk.isdigit() else None
+        if updated_at is None:
+            return build()
+        etag = compute_etag([request.get_full_path(), updated_at])
+        return conditional_response(request, etag, updated_at.timestamp(), build)
+
+    # POST /api/assets/bulk-import/ (multipart: file, category, format opcional)
+    # Com ?background=1 responde 202 e a importação roda no worker (ver JobViewSet).
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Envie o arquivo no campo "file".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            category = Category.objects.get(pk=request.data.get('category'))
+        except (Category.DoesNotExist, ValueError, TypeError):
+            return Response({'error': 'Categoria não encontrada.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # O formato pode ser informado explicitamente ou deduzido pela extensão.
+        file_format = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_format not in ('csv', 'jsonl'):
+            return Response({'error': 'Formato não suportado. Use csv ou jsonl.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if wants_background(request):
+            job = jobs.enqueue(
+                Job.ASSET_IMPORT, {'category_id': category.id, 'format': file_format}, request.user.id, upload
+            )
+            return accepted(request, job)
+
+        importer = AssetImporter(category, request.user.id)
+        reader = importer.read_csv if file_format == 'csv' else importer.read_jsonl
+        try:
+            report = importer.run(reader(upload.file))
+        except ValueError as exc:
+            report = importer.report()
+            report['error'] = str(exc)
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+    # POST /api/assets/batch/ {"ids": [...], "action": "set_status"|"move"|"delete", "status"?, "category"?}
+    # Uma transação para todos os ids; o resultado de cada um vem em `results`
+    # (updated, unchanged, deleted ou not_found). Com ?background=1 aceita até
+    # JOB_BATCH_MAX_IDS ids e responde 202; os resultados ficam na tarefa.
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        background = wants_background(request)
+        context = {'max_ids': settings.JOB_BATCH_MAX_IDS} if background else {}
+        serializer = AssetBatchSerializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if background:
+            category = data.get('category')
+            job = jobs.enqueue(Job.ASSET_BATCH, {
+                'ids': data['ids'], 'action': data['action'],
+                'status': data.get('status'), 'category': category.id if category else None,
+            }, request.user.id)
+            return accepted(request, job)
+        results = AssetBatch(data['ids']).run(data['action'], data.get('status'), data.get('category'))
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    # GET /api/assets/changes/?since=<token>&category_id=<id>&limit=<n>
+    # Sem `since`, devolve apenas o token atual: o cliente guarda o token,
+    # faz a carga inicial pela listagem e dali em diante pede só as diferenças.
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'next': str(AssetChange.latest_token()), 'has_more': False, 'changed': [], 'deleted': []})
+
+        category_id = request.query_params.get('category_id', '')
+        limit = request.query_params.get('limit', str(settings.REST_FRAMEWORK['PAGE_SIZE']))
+        if not since.isdigit() or not limit.isdigit() or (category_id and not category_id.isdigit()):
+            return Response(
+                {'error': 'since, limit e category_id devem ser números inteiros.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(max(int(limit), 1), settings.API_MAX_PAGE_SIZE)
+
+        log = AssetChange.objects.filter(id__gt=int(since)).order_by('id')
+        if category_id:
+            log = log.filter(category_id=int(category_id))
+        entries = list(log.values_list('id', 'asset_id', 'action')[:limit + 1])
+        if entries:
+            # Não passa de um id que ainda pode aparecer (ver AssetChange.settled_until).
+            settled = AssetChange.settled_until(int(since), entries[-1][0])
+            entries = [entry for entry in entries if entry[0] <= settled]
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Vale a última ação de cada ativo dentro da janela.
+        last_action = {asset_id: action for _, asset_id, action in entries}
+        upserts = [asset_id for asset_id, action in last_action.items() if action == AssetChange.UPSERT]
+        assets = self.for_reading(Asset.objects.visible().filter(id__in=upserts)).order_by('id')
+        if category_id:
+            # Um ativo que saiu da categoria depois aparece como remoção mais adiante no feed.
+            assets = assets.filter(category_id=int(category_id))
+        deleted = sorted(asset_id for asset_id, action in last_action.items() if action == AssetChange.DELETE)
+
+        return Response({
+            'next': str(entries[-1][0] if entries else int(since)),
+            'has_more': has_more,
+            'changed': self.get_serializer(assets, many=True).data,
+            'deleted': deleted,
+        })
+
+    # GET /api/assets/export/?category_id=<id>&file_format=csv|jsonl|xlsx
+    # (o parâmetro não se chama `format` porque o DRF reserva esse nome).
+    # Com ?background=1 o arquivo é gerado pelo worker e baixado em /api/jobs/<id>/download/.
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        category_id = request.query_params.get('category_id')
+        category = Category.objects.filter(pk=category_id).first() if category_id and category_id.isdigit() else None
+        if category is None:
+            return Response({'error': 'Informe uma categoria válida em category_id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.query_params.get('file_format', 'csv')
+        exporter = EXPORTERS.get(file_format)
+        if exporter is None:
+            return Response({'error': 'Formato não suportado. Use csv, jsonl ou xlsx.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if wants_background(request):
+            query = request.query_params.copy()
+            query.pop('background', None)
+            job = jobs.enqueue(Job.ASSET_EXPORT, {
+                'category_id': category.id, 'file_format': file_format, 'query': query.urlencode(),
+            }, request.user.id)
+            return accepted(request, job)
+
+        try:
+            return exporter(self.get_queryset(), field_columns(category), f'ativos-{category.id}')
+        except ImportError:
+            return Response({'error': 'Exportação em xlsx requer o pacote openpyxl.'}, status=status.HTTP_400_BAD_REQUEST)
 
 
 # --- View para listar e criar FieldDefinitions para uma categoria específica ---
@@ -106,13 +398,17 @@ class FieldDefinitionListCreateView(generics.ListCreateAPIView):
         # Retorna apenas as definições de campo que pertencem à categoria especificada.
         return FieldDefinition.objects.filter(category_id=category_id)
 
+    def list(self, request, *args, **kwargs):
+        build = partial(super().list, request, *args, **kwargs)
+        return cached_response(request, self.kwargs["category_pk"], build)
+
     # Hook chamado na criação de uma nova definição de campo.
     def perform_create(self, serializer):
         # Pega o ID da categoria da URL novamente.
         category_id = self.kwargs["category_pk"]
         # Busca a instância da categoria, garantindo que ela pertence ao usuário logado
         # para que um usuário não possa adicionar campos a categorias de outros.
-        category = Category.objects.get(pk=category_id, owner=self.request.user)
+        category = Category.objects.get(pk=category_id, owner_id=self.request.user.id)
         # Salva a nova definição de campo, associando-a à categoria correta.
         serializer.save(category=category)
 
@@ -131,12 +427,19 @@ class FieldDefinitionDetailView(generics.RetrieveUpdateDestroyAPIView):
         # A sintaxe `category__owner` atravessa a relação de ForeignKey.
         # Mesmo que um usuário tente acessar /api/.../fields/123, se o campo 123
         # não pertencer a uma de suas categorias, o DRF retornará "Não encontrado".
-        return FieldDefinition.objects.filter(category__owner=self.request.user)
+        return FieldDefinition.objects.filter(category__owner_id=self.request.user.id)
+
+    # Como nas categorias: o campo some na hora e os valores dele são expurgados em lotes.
+    def destroy(self, request, *args, **kwargs):
+        return destroy_in_stages(request, self.get_object())
 
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+    # O serializer lê `profile.role`: o JOIN evita uma consulta por usuário.
+    queryset = User.objects.select_related('profile')
     serializer_class = UserProfileSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ('date_joined', 'id')
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
@@ -145,7 +448,7 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_destroy(self, instance):
         # Impede que o usuário delete a si mesmo
-        if instance == self.request.user:
+        if instance.id == self.request.user.id:
              # Levanta um erro de validação ou permissão
              from rest_framework.exceptions import PermissionDenied
              raise PermissionDenied("Você não pode excluir sua própria conta.")
@@ -167,11 +470,44 @@ class UserRoleUpdateView(APIView):
         if new_role not in ['viewer', 'editor', 'admin']:
             return Response({'error': 'Papel inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user.profile.role = new_role
-        user.profile.save()
+        # Troca o papel e invalida os tokens já emitidos para este usuário.
+        user.profile.change_role(new_role)
         return Response({'message': f'Papel do usuário {user.username} atualizado para {new_role}.'}, status=status.HTTP_200_OK)
 
 
+# --- Estatísticas do inventário para o dashboard ---
+# Lê apenas a tabela resumo AssetStatusCount (uma linha por categoria e status),
+# então o custo não depende da quantidade de ativos.
+class InventoryStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        statuses = [value for value, _ in Asset.STATUS_CHOICES]
+        categories = {}
+        for category_id, name in Category.objects.values_list('id', 'name'):
+            categories[category_id] = {
+                'category': category_id,
+                'name': name,
+                'total': 0,
+                'by_status': dict.fromkeys(statuses, 0),
+            }
+
+        by_status = dict.fromkeys(statuses, 0)
+        for category_id, asset_status, count in AssetStatusCount.objects.values_list('category_id', 'status', 'count'):
+            entry = categories.get(category_id)
+            if entry is None or asset_status not in by_status:
+                continue
+            entry['by_status'][asset_status] += count
+            entry['total'] += count
+            by_status[asset_status] += count
+
+        return Response({
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'categories': list(categories.values()),
+        })
+
+
 class GetSecretQuestionView(APIView):
     permission_classes = [AllowAny]
 
@@ -207,9 +543,16 @@ class ResetPasswordView(APIView):
             )
 
         try:
-            user = User.objects.get(username=username)
+            user = User.objects.select_related('profile').get(username=username)
+            profile = user.profile
+
+            # Como no login, um hash feito com outro algoritmo é regravado com o atual.
+            def rehash_answer(raw_answer):
+                profile.secret_answer = make_password(raw_answer)
+                profile.save(update_fields=['secret_answer'])
+
             # Verifica se a resposta fornecida bate com o hash salvo no banco
-            if check_password(answer, user.profile.secret_answer):
+            if check_password(answer, profile.secret_answer, setter=rehash_answer):
                 user.set_password(new_password)  # Define a nova senha (já faz o hash)
                 user.save()
                 return Response(
@@ -228,4 +571,66 @@ class ResetPasswordView(APIView):
 
 # Classe para visualizarmos role no frontend
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = CustomTokenObtainPairSerializer
+
+# Refresh que coloca no novo token de acesso o papel atual do usuário
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+# --- Tarefas em segundo plano (ver api/jobs.py) ---
+# GET /api/jobs/ e /api/jobs/<id>/: cada usuário vê as próprias tarefas; admins veem todas.
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    # Mais recentes primeiro.
+    cursor_ordering = ('-id',)
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if get_role(self.request.user) != 'admin':
+            queryset = queryset.filter(created_by_id=self.request.user.id)
+        if self.action == 'progress':
+            queryset = queryset.only('id', 'status', 'progress', 'total')
+        return queryset
+
+    # GET /api/jobs/<id>/progress/: resposta mínima para consultas frequentes.
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        job = self.get_object()
+        return Response({
+            'id': job.id,
+            'status': job.status,
+            'progress': job.progress,
+            'total': job.total,
+            'percent': job.percent,
+        })
+
+    # POST /api/jobs/<id>/cancel/: na fila, cancela na hora; em execução, o
+    # worker para no próximo registro de andamento.
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if job.kind in jobs.MUST_FINISH:
+            return Response({'error': 'Esta tarefa não pode ser cancelada.'}, status=status.HTTP_409_CONFLICT)
+        if not jobs.cancel(job.pk):
+            return Response({'error': 'A tarefa já terminou.'}, status=status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
+
+    # GET /api/jobs/<id>/download/: arquivo gerado pela tarefa (ex.: exportação).
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED or not job.output_file:
+            return Response({'error': 'Esta tarefa não tem arquivo para baixar.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(job.output_file.open('rb'), as_attachment=True, filename=os.path.basename(job.output_file.name))
+
+
+# --- Métricas de profiling (formato Prometheus) ---
+# Os números só são coletados com API_PROFILING ligado (ver api/profiling.py).
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
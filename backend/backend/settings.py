@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -36,19 +37,92 @@ ALLOWED_HOSTS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Monta o usuário a partir das claims do token, sem consultar User/Profile.
+        "api.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # Tamanho de página das listagens paginadas por cursor (api.pagination.KeysetCursorPagination,
+    # ligada em cada view: ativos, categorias, usuários e tarefas). As demais listas, como
+    # os campos de uma categoria, continuam devolvendo um array simples.
+    "PAGE_SIZE": 50,
+    # JSON com orjson (api/renderers.py); sem o pacote, cai no json do DRF.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# PAGE_SIZE vale só para as views com pagination_class (ver acima), de propósito.
+SILENCED_SYSTEM_CHECKS = ["rest_framework.W001"]
+
+# Tamanho máximo de página que um cliente pode pedir com ?page_size=
+API_MAX_PAGE_SIZE = 500
+
+# Feed /api/assets/changes/: um buraco na sequência de ids de AssetChange é
+# tratado como transação ainda aberta (o feed para antes dele) até a alteração
+# seguinte ter mais que esse tempo (segundos); depois, como rollback.
+API_CHANGES_SETTLE_SECONDS = 30
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Cache usado pelas respostas de categorias/campos e pelas versões de papel.
+# Por padrão é o cache local do processo; aponte para Redis/Memcached em produção.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "parque-tecnologico"),
+    }
+}
+
+# Tempo máximo (segundos) que uma resposta de categoria/campos fica no cache.
+# Salvar ou apagar uma Category/FieldDefinition já invalida as entradas na hora.
+API_SCHEMA_CACHE_TIMEOUT = 300
+
+# Por quanto tempo (segundos) a versão do papel de cada usuário fica em cache.
+# Com um cache compartilhado (Redis/Memcached) a revogação vale na hora para
+# todos os workers; com o cache local, cada processo pode demorar até esse tempo.
+ROLE_VERSION_CACHE_TIMEOUT = 300
+
+# Profiling das requisições (api/profiling.py): métricas em /api/metrics/ e log
+# das requisições mais lentas que API_SLOW_REQUEST_MS. Desligado por padrão.
+API_PROFILING = os.getenv("DJANGO_API_PROFILING", "0") == "1"
+API_SLOW_REQUEST_MS = int(os.getenv("DJANGO_API_SLOW_REQUEST_MS", "500"))
+
+# Fila de tarefas em segundo plano (api/jobs.py, worker: manage.py run_jobs).
+JOB_MAX_ATTEMPTS = int(os.getenv("DJANGO_JOB_MAX_ATTEMPTS", "3"))
+# Espera antes da nova tentativa: base * 2^(tentativa - 1), limitada ao máximo (segundos).
+JOB_RETRY_BASE_DELAY = 5
+JOB_RETRY_MAX_DELAY = 300
+# Sem sinal de vida do worker por esse tempo (segundos), a tarefa volta para a fila.
+JOB_STALE_TIMEOUT = int(os.getenv("DJANGO_JOB_STALE_TIMEOUT", "600"))
+JOB_POLL_INTERVAL = 1.0
+# Limite de ids de uma alteração em lote em segundo plano (a síncrona aceita BATCH_MAX_IDS).
+JOB_BATCH_MAX_IDS = 100_000
+
+# Expurgo de categorias/campos excluídos (api/purge.py): linhas apagadas por
+# transação e pausa (segundos) entre os lotes para as demais escritas passarem.
+PURGE_CHUNK_SIZE = 1000
+PURGE_CHUNK_PAUSE = 0.05
+# O expurgo roda no worker (run_jobs). Sem worker, use 0: a exclusão expurga
+# na própria requisição (ainda em lotes) e responde 204.
+PURGE_IN_BACKGROUND = os.getenv("DJANGO_PURGE_IN_BACKGROUND", "1") == "1"
+
+# Compressão das respostas (api/compression.py): brotli se o pacote estiver
+# instalado e o cliente aceitar, senão gzip. Qualidade 0-11; acima de ~6 o
+# ganho em bytes não paga o tempo de CPU em respostas dinâmicas.
+API_BROTLI_QUALITY = int(os.getenv("DJANGO_API_BROTLI_QUALITY", "5"))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -64,6 +138,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista para medir a requisição inteira; inativo sem API_PROFILING.
+    'api.profiling.RequestProfilingMiddleware',
+    # Antes dos demais para comprimir a resposta já pronta (o profiling mede os bytes comprimidos).
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,13 +176,89 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite por padrão; PostgreSQL com DJANGO_DB_ENGINE=postgresql (variáveis de
+# ambiente ou arquivo .env, carregado acima pelo load_dotenv).
+DB_ENGINE = os.getenv("DJANGO_DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DJANGO_DB_NAME", "parque_tecnologico"),
+            'USER': os.getenv("DJANGO_DB_USER", "postgres"),
+            'PASSWORD': os.getenv("DJANGO_DB_PASSWORD", ""),
+            'HOST': os.getenv("DJANGO_DB_HOST", "localhost"),
+            'PORT': os.getenv("DJANGO_DB_PORT", "5432"),
+            'OPTIONS': {},
+        }
+    }
+    # Pool de conexões do psycopg 3 (psycopg[pool]) no próprio processo: as
+    # requisições pegam uma conexão já aberta em vez de abrir uma nova.
+    if os.getenv("DJANGO_DB_POOL", "1") == "1":
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", "2")),
+            'max_size': int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", "10")),
+            'timeout': int(os.getenv("DJANGO_DB_POOL_TIMEOUT", "10")),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("DJANGO_CONN_MAX_AGE", "60"))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv("DJANGO_DB_NAME", str(BASE_DIR / 'db.sqlite3')),
+        }
     }
-}
 
+# Modo de desempenho do SQLite para produção (DJANGO_SQLITE_PERFORMANCE=1):
+# - WAL: leitores não bloqueiam o escritor (e vice-versa);
+# - synchronous=NORMAL: seguro com WAL, sem fsync a cada commit;
+# - cache de páginas de 64 MB e leitura do arquivo por mmap (256 MB);
+# - transações abertas com BEGIN IMMEDIATE: o lock de escrita é pego no início,
+#   então escritores concorrentes esperam (até o timeout) em vez de falhar
+#   com "database is locked" ao tentar promover um lock de leitura;
+# - conexões reaproveitadas entre requisições (CONN_MAX_AGE).
+# Fica desligado por padrão porque o modo WAL é gravado no próprio arquivo.
+SQLITE_PERFORMANCE_MODE = os.getenv("DJANGO_SQLITE_PERFORMANCE", "0") == "1"
+SQLITE_PERFORMANCE_OPTIONS = {
+    "timeout": int(os.getenv("DJANGO_SQLITE_BUSY_TIMEOUT", "20")),
+    "transaction_mode": "IMMEDIATE",
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+}
+if SQLITE_PERFORMANCE_MODE and DB_ENGINE != "postgresql":
+    DATABASES['default'].update({
+        'OPTIONS': SQLITE_PERFORMANCE_OPTIONS,
+        'CONN_MAX_AGE': int(os.getenv("DJANGO_CONN_MAX_AGE", "600")),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+
+# Login: o backend traz User e Profile em uma só consulta (api/authentication.py).
+AUTHENTICATION_BACKENDS = ['api.authentication.ProfileModelBackend']
+
+# Algoritmo das senhas (DJANGO_PASSWORD_HASHER): pbkdf2 (padrão), argon2
+# (pip install argon2-cffi), bcrypt (pip install bcrypt) ou scrypt. Os demais
+# continuam na lista só para conferir hashes antigos: no próximo login, a senha
+# é regravada com o algoritmo escolhido. DJANGO_PBKDF2_ITERATIONS muda o custo
+# do PBKDF2 (o padrão é o do Django) e também provoca a regravação.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'api.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHER = os.getenv("DJANGO_PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PBKDF2_ITERATIONS = int(os.getenv("DJANGO_PBKDF2_ITERATIONS", "0")) or None
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,6 +296,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Arquivos enviados e gerados pelas tarefas em segundo plano (importações e exportações).
+MEDIA_ROOT = Path(os.getenv("DJANGO_MEDIA_ROOT", str(BASE_DIR / 'media')))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
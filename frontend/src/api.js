@@ -1,5 +1,5 @@
 import axios from "axios"
-import { ACCESS_TOKEN } from "./constants"
+import { ACCESS_TOKEN, REFRESH_TOKEN } from "./constants"
 
 const api = axios.create({
     baseURL: import.meta.env.VITE_API_URL
@@ -18,4 +18,34 @@ api.interceptors.request.use(
   }
 );
 
+// Quando o papel do usuário muda, o backend recusa o token antigo com o código
+// "role_changed": renova o token de acesso uma vez e repete a requisição.
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refresh = localStorage.getItem(REFRESH_TOKEN);
+    if (error.response?.status === 401 && error.response.data?.code === "role_changed" && refresh && !original._retried) {
+      original._retried = true;
+      const res = await api.post("/api/token/refresh/", { refresh });
+      localStorage.setItem(ACCESS_TOKEN, res.data.access);
+      return api(original);
+    }
+    return Promise.reject(error);
+  }
+);
+
+// Percorre os links "next" da paginação por cursor e junta todos os resultados.
+// Use apenas para listas pequenas (categorias, usuários); ativos são carregados sob demanda.
+export async function fetchAllPages(url, config = {}) {
+  const results = [];
+  let next = url;
+  while (next) {
+    const res = await api.get(next, config);
+    results.push(...res.data.results);
+    next = res.data.next;
+  }
+  return results;
+}
+
 export default api
\ No newline at end of file
@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import api from "../api";
+import api, { fetchAllPages } from "../api";
 import toast from 'react-hot-toast';
 import { jwtDecode } from "jwt-decode";
 import { ACCESS_TOKEN } from "../constants";
@@ -31,9 +31,9 @@ function AdminUserList() {
   }, []);
 
   const getUsers = () => {
-    api.get("/api/users/")
-      .then((res) => {
-        setUsers(res.data);
+    fetchAllPages("/api/users/")
+      .then((results) => {
+        setUsers(results);
         setLoading(false);
       })
       .catch((err) => {
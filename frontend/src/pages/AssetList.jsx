@@ -8,6 +8,8 @@ import ConfirmationModal from "../components/ConfirmationModal";
 function AssetList() {
   const { categoryId } = useParams();
   const [assets, setAssets] = useState([]);
+  // Link da próxima página retornado pela API (paginação por cursor)
+  const [nextPage, setNextPage] = useState(null);
   const [category, setCategory] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [assetToDelete, setAssetToDelete] = useState(null);
@@ -19,8 +21,12 @@ function AssetList() {
        .then((res) => setCategory(res.data))
        .catch(err => { if (err.name !== 'CanceledError') console.error("Erro ao buscar categoria", err) });
 
-    api.get(`/api/assets/?category_id=${categoryId}`, { signal: controller.signal })
-       .then((res) => setAssets(res.data))
+    // Só os atributos que a tabela mostra (sparse fieldset)
+    api.get(`/api/assets/?category_id=${categoryId}&fields=patrimonio,status,field_values`, { signal: controller.signal })
+       .then((res) => {
+         setAssets(res.data.results);
+         setNextPage(res.data.next);
+       })
        .catch(err => { if (err.name !== 'CanceledError') console.error("Erro ao buscar ativos", err) });
 
     return () => {
@@ -28,6 +34,16 @@ function AssetList() {
     }
   }, [categoryId]);
 
+  const handleLoadMore = () => {
+    if (!nextPage) return;
+    api.get(nextPage)
+       .then((res) => {
+         setAssets(prev => [...prev, ...res.data.results]);
+         setNextPage(res.data.next);
+       })
+       .catch(() => toast.error("Não foi possível carregar mais ativos."));
+  };
+
   const handleOpenDeleteModal = (asset) => {
     setAssetToDelete(asset);
     setIsModalOpen(true);
@@ -122,7 +138,10 @@ const renderStatusBadge = (status) => {
                 </tr>
               ))}
             </tbody>
-          </table>        
+          </table>
+          {nextPage && (
+            <button onClick={handleLoadMore} className="load-more-button">Carregar mais</button>
+          )}
         </div>
       </div>
       <ConfirmationModal
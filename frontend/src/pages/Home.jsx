@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { Link, useNavigate } from "react-router-dom";
-import api from "../api";
+import api, { fetchAllPages } from "../api";
 import toast from 'react-hot-toast';
 import "../styles/Home.css"; 
 import OverflowMenu from '../components/OverflowMenu';
@@ -12,13 +12,14 @@ function Home() {
   const navigate = useNavigate();
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [categoryToDelete, setCategoryToDelete] = useState(null);
+  // Contagem de ativos por categoria, vinda do resumo pré-calculado em /api/stats/
+  const [assetCounts, setAssetCounts] = useState({});
 
   useEffect(() => {
     const controller = new AbortController();
-    api
-      .get("/api/categories/", { signal: controller.signal })
-      .then((res) => {
-        setCategories(res.data);
+    fetchAllPages("/api/categories/", { signal: controller.signal })
+      .then((results) => {
+        setCategories(results);
       })
       .catch((err) => {
         if (err.name !== "CanceledError") {
@@ -26,16 +27,26 @@ function Home() {
         }
       });
 
+    api
+      .get("/api/stats/", { signal: controller.signal })
+      .then((res) => {
+        const counts = {};
+        res.data.categories.forEach((entry) => { counts[entry.category] = entry.total; });
+        setAssetCounts(counts);
+      })
+      .catch((err) => {
+        if (err.name !== "CanceledError") console.error("Erro ao buscar estatísticas", err);
+      });
+
     return () => {
       controller.abort();
     };
   }, []);
 
   const getCategories = () => {
-    api
-      .get("/api/categories/")
-      .then((res) => {
-        setCategories(res.data);
+    fetchAllPages("/api/categories/")
+      .then((results) => {
+        setCategories(results);
       })
       .catch((err) => toast.error("Não foi possível recarregar as categorias."));
   };
@@ -130,6 +141,7 @@ function Home() {
                   <OverflowMenu options={menuOptions} />
                 </div>
                 <div className="card-content">
+                    <p>{assetCounts[category.id] ?? 0} ativo(s) registrado(s).</p>
                     <p>Clique no título para ver os ativos.</p>
                 </div>
               </div>